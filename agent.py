@@ -27,6 +27,7 @@ from paper_processor import PaperProcessor
 from content_generator import ContentGenerator
 from image_extractor import ImageExtractor
 from output_formatter import OutputFormatter
+from html_cache import ArxivHTMLCache
 
 # 获取日志器
 logger = logging.getLogger(__name__)
@@ -64,8 +65,10 @@ class ArxivAgent:
         
         # 初始化各个组件
         self.searcher = ArxivSearcher()
-        self.image_extractor = ImageExtractor()
-        self.content_generator = ContentGenerator(api_key)
+        # 图片提取与内容生成共用HTML缓存，论文页面只下载一次
+        self.html_cache = ArxivHTMLCache()
+        self.image_extractor = ImageExtractor(html_cache=self.html_cache)
+        self.content_generator = ContentGenerator(api_key, html_cache=self.html_cache)
         self.output_formatter = OutputFormatter()
         
         # 构建工作流图
@@ -150,6 +153,9 @@ class ArxivAgent:
             error_msg = f"提取图片时出错: {str(e)}"
             state.errors.append(error_msg)
             logger.error(error_msg)
+        finally:
+            # 连接池绑定当前事件循环，本节点结束时关闭
+            await self.image_extractor.aclose()
             
         return state
     
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API密钥池模块
+在多个DashScope密钥间按剩余配额分配LLM调用，限流的密钥在窗口重置前移出轮换
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitError(Exception):
+    """密钥被服务端限流（HTTP 429 / Throttling）"""
+
+
+class APIKeyState:
+    """单个密钥的配额状态"""
+
+    def __init__(self, key: str, requests_per_window: int, tokens_per_window: Optional[int], window: float):
+        self.key = key
+        self.requests_per_window = requests_per_window
+        self.tokens_per_window = tokens_per_window
+        self.window = window
+
+        self.window_start = time.monotonic()
+        self.requests_used = 0
+        self.tokens_used = 0
+        self.throttled_until = 0.0
+
+        # 累计用量
+        self.total_requests = 0
+        self.total_tokens = 0
+        self.throttle_count = 0
+
+    def _roll_window(self, now: float):
+        if now - self.window_start >= self.window:
+            self.window_start = now
+            self.requests_used = 0
+            self.tokens_used = 0
+
+    def remaining(self, now: float) -> float:
+        """当前窗口剩余配额比例（0-1），被限流时为0"""
+        self._roll_window(now)
+        if now < self.throttled_until:
+            return 0.0
+        ratio = 1 - self.requests_used / self.requests_per_window
+        if self.tokens_per_window:
+            ratio = min(ratio, 1 - self.tokens_used / self.tokens_per_window)
+        return max(ratio, 0.0)
+
+    def available_at(self) -> float:
+        """密钥重新可用的时间点"""
+        return max(self.throttled_until, self.window_start + self.window)
+
+    @property
+    def masked(self) -> str:
+        return f"{self.key[:6]}***{self.key[-4:]}" if len(self.key) > 10 else "***"
+
+
+class APIKeyPool:
+    """DashScope密钥池"""
+
+    def __init__(self, keys: List[str], requests_per_window: int = 60, tokens_per_window: Optional[int] = None,
+                 window: float = 60.0, throttle_backoff: float = 5.0):
+        keys = [k.strip() for k in keys if k and k.strip()]
+        if not keys:
+            raise ValueError("密钥池为空，请至少配置一个API密钥")
+        # 去重并保持顺序
+        keys = list(dict.fromkeys(keys))
+        self.throttle_backoff = throttle_backoff  # 限流后至少冷却的时间（秒）
+        self.states = [APIKeyState(k, requests_per_window, tokens_per_window, window) for k in keys]
+        self._by_key = {s.key: s for s in self.states}
+
+    @classmethod
+    def from_env(cls) -> Optional["APIKeyPool"]:
+        """
+        从环境变量构建密钥池
+        API_KEYS: 逗号分隔的多个密钥（未配置时回退到 API_KEY）
+        API_KEY_RPM / API_KEY_TPM: 每个密钥每分钟的请求数/token数配额
+        """
+        raw = os.getenv('API_KEYS') or os.getenv('API_KEY') or ''
+        keys = [k for k in raw.split(',') if k.strip()]
+        if not keys:
+            return None
+        tpm = os.getenv('API_KEY_TPM')
+        return cls(
+            keys,
+            requests_per_window=int(os.getenv('API_KEY_RPM', '60')),
+            tokens_per_window=int(tpm) if tpm else None,
+            window=60.0,
+        )
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    async def acquire(self) -> str:
+        """选取剩余配额最多的密钥并占用一次请求；全部不可用时等待最早重置的密钥"""
+        while True:
+            now = time.monotonic()
+            best = max(self.states, key=lambda s: s.remaining(now))
+            if best.remaining(now) > 0:
+                best.requests_used += 1
+                best.total_requests += 1
+                return best.key
+
+            wait = max(0.05, min(s.available_at() for s in self.states) - now)
+            logger.warning(f"所有API密钥配额耗尽或被限流，等待 {wait:.1f} 秒")
+            await asyncio.sleep(wait)
+
+    def report(self, key: str, tokens: int = 0):
+        """记录一次调用消耗的token"""
+        state = self._by_key.get(key)
+        if state:
+            state.tokens_used += tokens
+            state.total_tokens += tokens
+
+    def mark_throttled(self, key: str):
+        """密钥被限流，窗口重置前移出轮换"""
+        state = self._by_key.get(key)
+        if not state:
+            return
+        now = time.monotonic()
+        state.throttle_count += 1
+        state.throttled_until = max(state.window_start + state.window, now + self.throttle_backoff)
+        logger.warning(f"API密钥 {state.masked} 被限流，{state.throttled_until - now:.1f} 秒内移出轮换")
+
+    def get_usage(self) -> List[Dict[str, Any]]:
+        """各密钥用量报告"""
+        now = time.monotonic()
+        return [{
+            'key': s.masked,
+            'total_requests': s.total_requests,
+            'total_tokens': s.total_tokens,
+            'throttle_count': s.throttle_count,
+            'remaining_ratio': round(s.remaining(now), 3),
+        } for s in self.states]
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成 arXiv e-print 源码包（tar.gz），供基准测试使用
+章节结构与 arxiv_html_fixture.make_latexml_html 一致：主文件用 \\input 引入各章节文件，
+包含无参数宏、注释、行内/行间公式、引用、figure/table 浮动体、参考文献与附录，以及图片等非源码文件
+"""
+
+import io
+import random
+import tarfile
+
+
+def make_eprint_tarball(n_sections: int = 12, n_subsections: int = 4, n_paragraphs: int = 6,
+                        n_appendix: int = 20, n_images: int = 10, seed: int = 0) -> bytes:
+    """
+    生成一篇合成论文的e-print源码包
+
+    Args:
+        n_sections: 正文一级章节数
+        n_subsections: 每个章节的子章节数
+        n_paragraphs: 每个子章节的段落数
+        n_appendix: 附录章节数
+        n_images: 包内图片文件数（每个约200KB，不参与解析）
+        seed: 随机种子
+    """
+    rng = random.Random(seed)
+    words = ["model", "training", "diffusion", "token", "benchmark", "latent", "policy",
+             "外观", "表示", "ü", "—", "≥", "$\\alpha$"]
+    figure_id = 0
+
+    def sentence():
+        body = " ".join(rng.choice(words) for _ in range(rng.randint(8, 20)))
+        if rng.random() < 0.3:
+            body += f" achieves {rng.randint(1, 99)}.{rng.randint(0, 9)}\\% \\cite{{ref{rng.randint(1, 80)},ref{rng.randint(1, 80)}}}"
+        if rng.random() < 0.2:
+            body += " (see Fig.~\\ref{fig:x}) % TODO: check numbers"
+        return body.capitalize() + "."
+
+    def paragraph():
+        return "\n".join(sentence() for _ in range(rng.randint(3, 6))) + "\n\n"
+
+    def figure():
+        nonlocal figure_id
+        figure_id += 1
+        if figure_id % 3 == 1:
+            return ("\\begin{table}[t]\n\\centering\n"
+                    f"\\caption{{{sentence()}}}\\label{{tab:{figure_id}}}\n"
+                    "\\begin{tabular}{lc}\n\\toprule\nMethod & Acc \\\\\n\\midrule\n"
+                    f"Ours & {rng.randint(50, 99)}.{rng.randint(0, 9)} \\\\\n\\bottomrule\n\\end{{tabular}}\n\\end{{table}}\n\n")
+        return ("\\begin{figure*}[t]\n\\centering\n"
+                f"\\includegraphics[width=\\linewidth]{{figures/x{figure_id}.png}}\n"
+                f"\\caption{{{sentence()}}}\\label{{fig:{figure_id}}}\n\\end{{figure*}}\n\n")
+
+    def equation():
+        return "\\begin{equation}\n\\mathcal{L} = \\sum_{i=1}^{N} \\| x_i - \\hat{x}_i \\|^2 \\label{eq:loss}\n\\end{equation}\n"
+
+    files = {}
+    section_titles = ["Introduction", "Related Work", "\\method", "Experiments", "Ablation Study",
+                      "Limitations", "Conclusion"]
+    inputs = []
+    for i in range(n_sections):
+        title = section_titles[i] if i < len(section_titles) else f"Extra Topic {i}"
+        parts = [f"% section {i + 1}\n\\section{{{title}}}\n\\label{{sec:{i + 1}}}\n\n", paragraph()]
+        for j in range(n_subsections):
+            parts.append(f"\\subsection{{{'Overview' if j == 0 else f'Component {j}'}}}\n")
+            for k in range(n_paragraphs):
+                parts.append(paragraph())
+                if k == 1:
+                    parts.append(figure())
+                if k == 2:
+                    parts.append(equation())
+            if j == 1:
+                parts.append(f"\\subsubsection{{Details}}\n{paragraph()}")
+        files[f"sections/s{i + 1}.tex"] = "".join(parts)
+        inputs.append(f"\\input{{sections/s{i + 1}}}\n")
+
+    appendix = []
+    for a in range(n_appendix):
+        appendix.append(f"\\section{{Additional Results {a}}}\n")
+        for _ in range(n_paragraphs * 2):
+            appendix.append(paragraph())
+        appendix.append(figure())
+        appendix.append(f"\\textbf{{Remark.}} {paragraph()}")
+    files["sections/appendix.tex"] = "".join(appendix)
+
+    files["main.tex"] = (
+        "\\documentclass{article}\n\\usepackage{graphicx,amsmath,booktabs,xspace}\n"
+        "\\newcommand{\\method}{SynthNet\\xspace}\n\\newcommand{\\norm}[1]{\\left\\| #1 \\right\\|}\n"
+        "% \\newcommand{\\unused}{x}\n"
+        "\\title{\\method: A Synthetic Model for Benchmarking}\n\\author{A. Author}\n"
+        "\\begin{document}\n\\maketitle\n"
+        f"\\begin{{abstract}}\n{sentence()} {sentence()}\n\\end{{abstract}}\n\n"
+        + "".join(inputs)
+        + "\n\\bibliographystyle{plain}\n\\bibliography{refs}\n\n\\appendix\n\\input{sections/appendix}\n"
+        "\\end{document}\n"
+    )
+    files["refs.bib"] = "".join(f"@article{{ref{n}, title={{A paper {n}}}, year={{2024}}}}\n" for n in range(1, 81))
+
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, text in files.items():
+            _add(tar, name, text.encode("utf-8"))
+        for n in range(n_images):
+            _add(tar, f"figures/x{n + 1}.png", rng.randbytes(200 * 1024))
+    return buffer.getvalue()
+
+
+def _add(tar: tarfile.TarFile, name: str, data: bytes):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    tar.addfile(info, io.BytesIO(data))
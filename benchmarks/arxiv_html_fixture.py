@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成 LaTeXML 风格的 arXiv HTML 页面，供基准测试使用
+结构参照 arxiv.org/html/<id>：package-alerts 警告框、摘要、多级 section、
+嵌套 figure（子图）、表格以及附录
+"""
+
+import random
+
+
+def make_latexml_html(n_sections: int = 12, n_subsections: int = 4, n_paragraphs: int = 6,
+                      n_appendix: int = 20, seed: int = 0) -> str:
+    """
+    生成一篇合成论文的HTML
+
+    Args:
+        n_sections: 正文一级章节数
+        n_subsections: 每个章节的子章节数
+        n_paragraphs: 每个子章节的段落数
+        n_appendix: 附录章节数（用于模拟60页长附录）
+        seed: 随机种子
+    """
+    rng = random.Random(seed)
+    words = ["model", "training", "diffusion", "token", "benchmark", "latent", "policy",
+             "外观", "表示", "ü", "—", "≥", "α"]
+    parts = []
+    figure_id = 0
+
+    def sentence():
+        body = " ".join(rng.choice(words) for _ in range(rng.randint(8, 20)))
+        if rng.random() < 0.3:
+            body += f" achieves {rng.randint(1, 99)}.{rng.randint(0, 9)}% [{rng.randint(1, 80)}, {rng.randint(1, 80)}]"
+        return body.capitalize() + "."
+
+    def paragraph():
+        return ('<div class="ltx_para"><p class="ltx_p">'
+                + " ".join(sentence() for _ in range(rng.randint(3, 6)))
+                + '</p></div>')
+
+    def figure():
+        nonlocal figure_id
+        figure_id += 1
+        if figure_id % 3 == 0:
+            # 子图：外层 figure 内嵌多个 figure panel
+            panels = "".join(
+                f'<figure class="ltx_figure ltx_figure_panel"><img src="x{figure_id}_{k}.png" id="S{figure_id}.g{k}" class="ltx_graphics">'
+                f'<figcaption class="ltx_caption">(panel {k})</figcaption></figure>'
+                for k in range(2)
+            )
+            return (f'<figure id="F{figure_id}" class="ltx_figure"><div class="ltx_flex_figure">{panels}</div>'
+                    f'<figcaption class="ltx_caption"><span class="ltx_tag">Figure {figure_id}: </span>{sentence()}</figcaption></figure>')
+        if figure_id % 3 == 1:
+            return (f'<figure id="T{figure_id}" class="ltx_table"><figcaption class="ltx_caption">Table {figure_id}: {sentence()}</figcaption>'
+                    '<table class="ltx_tabular"><tr><td>Method</td><td>Acc</td></tr>'
+                    f'<tr><td>Ours</td><td>{rng.randint(50, 99)}.{rng.randint(0, 9)}</td></tr></table></figure>')
+        return (f'<figure id="F{figure_id}" class="ltx_figure"><img src="x{figure_id}.png" id="F{figure_id}.g1" class="ltx_graphics">'
+                f'<p class="ltx_p">inner caption text</p>'
+                f'<figcaption class="ltx_caption"><span class="ltx_tag">Figure {figure_id}: </span>{sentence()}</figcaption></figure>')
+
+    parts.append('<!DOCTYPE html><html lang="en"><head><meta charset="UTF-8"><title>Synthetic paper</title></head><body>')
+    parts.append('<nav class="ltx_page_navbar"><a href="#S1">1 Introduction</a></nav>')
+    parts.append('<div class="ltx_page_main"><div class="ltx_page_content">')
+    parts.append('<div class="package-alerts ltx_document" role="status"><p>Conversion report: some packages failed.</p></div>')
+    parts.append('<article class="ltx_document ltx_authors_1line">')
+    parts.append('<h1 class="ltx_title ltx_title_document">SynthNet: A Synthetic Model for Benchmarking</h1>')
+    parts.append('<div class="ltx_authors"><span class="ltx_creator ltx_role_author"><span class="ltx_personname">A. Author</span></span></div>')
+    parts.append('<div class="ltx_abstract"><h6 class="ltx_title ltx_title_abstract">Abstract</h6>'
+                 f'<p class="ltx_p">{sentence()} {sentence()}</p></div>')
+
+    section_titles = ["Introduction", "Related Work", "SynthNet", "Experiments", "Ablation Study",
+                      "Limitations", "Conclusion"]
+    for i in range(n_sections):
+        title = section_titles[i] if i < len(section_titles) else f"Extra Topic {i}"
+        parts.append(f'<section id="S{i + 1}" class="ltx_section"><h2 class="ltx_title ltx_title_section">'
+                     f'<span class="ltx_tag ltx_tag_section">{i + 1} </span>{title}</h2>')
+        parts.append(paragraph())
+        for j in range(n_subsections):
+            parts.append(f'<section id="S{i + 1}.SS{j + 1}" class="ltx_subsection"><h3 class="ltx_title ltx_title_subsection">'
+                         f'<span class="ltx_tag">{i + 1}.{j + 1} </span>{"Overview" if j == 0 else f"Component {j}"}</h3>')
+            for k in range(n_paragraphs):
+                parts.append(paragraph())
+                if k == 1:
+                    parts.append(figure())
+            if j == 1:
+                parts.append(f'<section class="ltx_subsubsection"><h4 class="ltx_title ltx_title_subsubsection">'
+                             f'{i + 1}.{j + 1}.1 Details</h4>{paragraph()}</section>')
+            parts.append('</section>')
+        parts.append('</section>')
+
+    parts.append('<section class="ltx_bibliography"><h2 class="ltx_title ltx_title_bibliography">References</h2>'
+                 '<ul class="ltx_biblist"><li class="ltx_bibitem">Someone. A paper. 2024.</li></ul></section>')
+
+    for a in range(n_appendix):
+        parts.append(f'<section id="A{a + 1}" class="ltx_appendix"><h2 class="ltx_title ltx_title_appendix">'
+                     f'Appendix {chr(65 + a % 26)} Additional Results {a}</h2>')
+        for _ in range(n_paragraphs * 2):
+            parts.append(paragraph())
+        parts.append(figure())
+        parts.append('<h5 class="ltx_title">Remark</h5>')
+        parts.append(paragraph())
+        parts.append('</section>')
+
+    parts.append('</article></div></div><footer class="ltx_page_footer">Generated by LaTeXML</footer></body></html>')
+    return "".join(parts)
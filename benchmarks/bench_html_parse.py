@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+arXiv HTML 下载拼接+解析基准测试
+
+对比：
+- 旧路径：8KB分块各自 decode(errors='ignore')，字符串 += 拼接，html.parser 解析整页
+- 新路径：bytearray 收集字节，lxml + SoupStrainer 只解析 article.ltx_document
+
+每个变体在独立子进程中运行，记录耗时与峰值内存(ru_maxrss)
+
+用法: python benchmarks/bench_html_parse.py [--sections 12] [--appendix 60] [--paragraphs 12] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+import resource
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from arxiv_html_fixture import make_latexml_html  # noqa: E402
+from content_generator import ContentGenerator, HTML_PARSER, ARTICLE_STRAINER  # noqa: E402
+
+CHUNK_SIZE = 8192
+GENERATOR = ContentGenerator("benchmark")
+
+
+def _chunks(data: bytes):
+    for i in range(0, len(data), CHUNK_SIZE):
+        yield data[i:i + CHUNK_SIZE]
+
+
+def build_old(data: bytes):
+    html_content = ""
+    for chunk in _chunks(data):
+        html_content += chunk.decode('utf-8', errors='ignore')
+    return BeautifulSoup(html_content, "html.parser")
+
+
+def build_new(data: bytes):
+    buffer = bytearray()
+    for chunk in _chunks(data):
+        buffer += chunk
+    return BeautifulSoup(bytes(buffer), HTML_PARSER, parse_only=ARTICLE_STRAINER, from_encoding="utf-8")
+
+
+def _worker(name, data, repeat, queue):
+    build = build_old if name == "old" else build_new
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    build_timings, tree_timings = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        soup = build(data)
+        build_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        sections = GENERATOR.parse_arxiv_by_headings(soup, content_root_selector=("article", {"class": "ltx_document"}))
+        tree_timings.append(time.perf_counter() - start)
+        del soup
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((min(build_timings), min(tree_timings), (peak_rss - baseline_rss) / 1024, _count_text(sections)))
+
+
+def _count_text(sections):
+    """统计段落字符总数，分块解码丢弃的多字节字符会体现为字符数减少"""
+    total = 0
+    stack = list(sections)
+    while stack:
+        node = stack.pop()
+        if "text" in node:
+            total += len(node["text"])
+        stack.extend(node.get("subsections", []))
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="arXiv HTML解析基准测试")
+    parser.add_argument("--sections", type=int, default=12)
+    parser.add_argument("--appendix", type=int, default=60)
+    parser.add_argument("--paragraphs", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    html = make_latexml_html(n_sections=args.sections, n_paragraphs=args.paragraphs, n_appendix=args.appendix)
+    data = html.encode("utf-8")
+    print(f"页面大小: {len(data) / 1024 / 1024:.2f} MB, 解析器: {HTML_PARSER}")
+
+    ctx = multiprocessing.get_context("spawn")
+    for name in ("old", "new"):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_worker, args=(name, data, args.repeat, queue))
+        proc.start()
+        build_time, tree_time, peak_mb, chars = queue.get()
+        proc.join()
+        print(f"{name:>4}: 拼接+解析 {build_time * 1000:8.1f} ms, 构建章节树 {tree_time * 1000:8.1f} ms, "
+              f"峰值内存增量 {peak_mb:7.1f} MB, 段落字符数 {chars}")
+
+
+if __name__ == "__main__":
+    main()
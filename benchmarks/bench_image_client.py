@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片下载HTTP客户端基准测试
+
+对比：
+- 旧路径：每个请求新建 httpx.AsyncClient（每张图片都重新建立TCP+TLS连接）
+- 新路径：ImageExtractor 共用的连接池客户端（keep-alive，按域名限制并发）
+
+在本地启动HTTPS图片服务器（自签名证书），可为每个新连接注入握手延迟以模拟公网RTT，
+以 _get_images_concurrently 相同的并发数（5）下载一篇论文的全部图片，统计耗时与建立的连接数
+
+用法: python benchmarks/bench_image_client.py [--images 40] [--size-kb 150] [--connect-latency-ms 60] [--repeat 3]
+"""
+
+import os
+import ssl
+import sys
+import time
+import asyncio
+import argparse
+import datetime
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from cryptography import x509  # noqa: E402
+from cryptography.hazmat.primitives import hashes, serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import ec  # noqa: E402
+from cryptography.x509.oid import NameOID  # noqa: E402
+from image_extractor import ImageExtractor  # noqa: E402
+
+CONCURRENCY = 5
+
+
+def make_certificate(directory: str):
+    """生成 localhost 的自签名证书，返回 (证书路径, 私钥路径)"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number()).not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                  serialization.NoEncryption()))
+    return cert_path, key_path
+
+
+class ImageServer:
+    """支持keep-alive的最小HTTP/1.1图片服务器，新连接先等待 connect_latency 秒（模拟TCP+TLS握手的往返）"""
+
+    def __init__(self, body: bytes, connect_latency: float):
+        self.body = body
+        self.connect_latency = connect_latency
+        self.connections = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        await asyncio.sleep(self.connect_latency)
+        try:
+            while True:
+                request = await reader.readuntil(b"\r\n\r\n")
+                if not request:
+                    break
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: image/png\r\n"
+                             b"Content-Length: " + str(len(self.body)).encode() + b"\r\n\r\n" + self.body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+
+async def fetch_legacy(extractor: ImageExtractor, urls, verify):
+    """旧路径：每个请求一个新客户端（与改动前的 _make_request_with_retry 相同）"""
+    config = {'timeout': extractor.timeout, 'follow_redirects': True, 'verify': verify, 'http2': False}
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def _get(url):
+        async with semaphore:
+            async with httpx.AsyncClient(**config) as client:
+                response = await client.get(url, headers=extractor.headers)
+                return len(response.content)
+
+    return await asyncio.gather(*[_get(url) for url in urls])
+
+
+async def fetch_pooled(extractor: ImageExtractor, urls):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def _get(url):
+        async with semaphore:
+            response = await extractor._make_request_with_retry(url)
+            return len(response.content)
+
+    return await asyncio.gather(*[_get(url) for url in urls])
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = make_certificate(directory)
+        server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        server_context.load_cert_chain(cert_path, key_path)
+        client_context = ssl.create_default_context(cafile=cert_path)
+
+        image_server = ImageServer(os.urandom(args.size_kb * 1024), args.connect_latency_ms / 1000)
+        server = await asyncio.start_server(image_server.handle, "localhost", 0, ssl=server_context)
+        port = server.sockets[0].getsockname()[1]
+        urls = [f"https://localhost:{port}/figures/x{i}.png" for i in range(args.images)]
+
+        print(f"{args.images} 张图片 × {args.size_kb} KB，并发 {CONCURRENCY}，新连接延迟 {args.connect_latency_ms} ms")
+        async with server:
+            for name in ("每请求新建客户端", "共用连接池"):
+                timings = []
+                for _ in range(args.repeat):
+                    image_server.connections = 0
+                    start = time.perf_counter()
+                    if name == "共用连接池":
+                        async with ImageExtractor(output_dir=directory, html_cache=object()) as extractor:
+                            extractor.client_config['verify'] = client_context
+                            sizes = await fetch_pooled(extractor, urls)
+                    else:
+                        extractor = ImageExtractor(output_dir=directory, html_cache=object())
+                        sizes = await fetch_legacy(extractor, urls, client_context)
+                    timings.append(time.perf_counter() - start)
+                    assert len(sizes) == args.images and all(size == args.size_kb * 1024 for size in sizes)
+                print(f"  {name}: {min(timings) * 1000:.0f} ms（最好的一次），建立连接 {image_server.connections} 个")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图片下载HTTP客户端基准测试")
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--size-kb", type=int, default=150)
+    parser.add_argument("--connect-latency-ms", type=float, default=60.0, help="每个新连接的额外延迟（模拟握手往返）")
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
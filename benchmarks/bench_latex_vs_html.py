@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LaTeX e-print 与 arXiv HTML 两种正文来源的对比
+
+对比：
+- 解析耗时：parse_eprint_bytes（内存中读取源码包）与 parse_arxiv_html_bytes
+- 章节识别准确度：以HTML章节树为参照，统计标题（去编号、归一化后按层级）的精确率/召回率，
+  以及规则定位器给出的方法/结论路径是否一致、引言/方法/结论文本的词重合度（仅真实论文）
+
+默认使用合成论文；指定 --ids 时下载真实论文（需联网）
+用法: python benchmarks/bench_latex_vs_html.py [--sections 12] [--appendix 20] [--repeat 3] [--ids 2512.10950v1 ...]
+"""
+
+import os
+import re
+import sys
+import time
+import asyncio
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arxiv_html_fixture import make_latexml_html  # noqa: E402
+from arxiv_eprint_fixture import make_eprint_tarball  # noqa: E402
+from content_generator import ContentGenerator, parse_arxiv_html_bytes  # noqa: E402
+from latex_parser import parse_eprint_bytes  # noqa: E402
+from html_cache import ArxivHTMLCache  # noqa: E402
+from section_locator import SectionLocator, normalize_title  # noqa: E402
+
+GENERATOR = ContentGenerator("benchmark", parse_workers=0)
+LOCATOR = SectionLocator()
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def _timed(func, data, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(data)
+        timings.append(time.perf_counter() - start)
+    return result, min(timings)
+
+
+def _headings(sections):
+    """先序遍历的 (层级, 归一化标题) 计数"""
+    counter = Counter()
+    stack = [(0, section) for section in reversed(sections)]
+    while stack:
+        depth, node = stack.pop()
+        if "title" not in node:
+            continue
+        title = normalize_title(node["title"])
+        if title:
+            counter[(depth, title)] += 1
+        stack.extend((depth + 1, sub) for sub in reversed(node.get("subsections", [])))
+    return counter
+
+
+def _words(text):
+    return set(WORD_PATTERN.findall(text.lower()))
+
+
+def compare(html_paper, latex_paper, text_overlap=True):
+    """以HTML章节树为参照的章节识别准确度（合成论文两种来源的正文随机生成，不比较文本）"""
+    reference, candidate = _headings(html_paper["sections"]), _headings(latex_paper["sections"])
+    matched = sum((reference & candidate).values())
+    result = {
+        'headings': (sum(candidate.values()), sum(reference.values())),
+        'precision': matched / max(1, sum(candidate.values())),
+        'recall': matched / max(1, sum(reference.values())),
+    }
+
+    located = {}
+    for name, paper in (('html', html_paper), ('latex', latex_paper)):
+        keywords = LOCATOR.locate(paper["sections"], paper.get("title") or "")
+        located[name] = {part: (keywords[part], GENERATOR._get_section_content_by_keywords(paper, keywords[part]))
+                         for part in ('introduction', 'method', 'conclusion')}
+    result['same_paths'] = all(
+        [normalize_title(k) for k in located['html'][part][0]] == [normalize_title(k) for k in located['latex'][part][0]]
+        for part in ('method', 'conclusion'))
+    if not text_overlap:
+        result['text_found'] = {part: bool(located['latex'][part][1]) for part in ('introduction', 'method', 'conclusion')}
+        return result
+    overlaps = {}
+    for part in ('introduction', 'method', 'conclusion'):
+        html_words, latex_words = _words(located['html'][part][1]), _words(located['latex'][part][1])
+        overlaps[part] = len(html_words & latex_words) / max(1, len(html_words | latex_words))
+    result['text_overlap'] = overlaps
+    return result
+
+
+def report(name, html_size, latex_size, html_time, latex_time, metrics):
+    print(f"{name}: HTML {html_size / 1024:.0f} KB 解析 {html_time * 1000:.1f} ms | "
+          f"e-print {latex_size / 1024:.0f} KB 解析 {latex_time * 1000:.1f} ms")
+    latex_count, html_count = metrics['headings']
+    print(f"  标题: LaTeX {latex_count} / HTML {html_count}, 精确率 {metrics['precision']:.1%}, 召回率 {metrics['recall']:.1%}, "
+          f"方法/结论路径{'一致' if metrics['same_paths'] else '不一致'}")
+    if 'text_overlap' in metrics:
+        print("  文本词重合度: " + ", ".join(f"{part} {value:.1%}" for part, value in metrics['text_overlap'].items()))
+    else:
+        print("  LaTeX取到文本: " + ", ".join(f"{part} {'是' if found else '否'}" for part, found in metrics['text_found'].items()))
+
+
+async def _download(ids):
+    html_cache = ArxivHTMLCache()
+    eprint_cache = ArxivHTMLCache(cache_dir="cache/eprint", suffix=".eprint")
+    for arxiv_id in ids:
+        html = await html_cache.get(f"https://arxiv.org/html/{arxiv_id}")
+        eprint = await eprint_cache.get(f"https://arxiv.org/e-print/{arxiv_id}")
+        yield arxiv_id, html, eprint
+
+
+async def run_real(ids, repeat):
+    async for arxiv_id, html, eprint in _download(ids):
+        if not html or not eprint:
+            print(f"{arxiv_id}: 下载失败（HTML {len(html)} 字节, e-print {len(eprint)} 字节）")
+            continue
+        html_paper, html_time = _timed(parse_arxiv_html_bytes, html, repeat)
+        latex_paper, latex_time = _timed(parse_eprint_bytes, eprint, repeat)
+        if not latex_paper["sections"]:
+            print(f"{arxiv_id}: e-print 中没有LaTeX源码")
+            continue
+        report(arxiv_id, len(html), len(eprint), html_time, latex_time, compare(html_paper, latex_paper))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LaTeX e-print 与 HTML 正文来源对比")
+    parser.add_argument("--sections", type=int, default=12)
+    parser.add_argument("--appendix", type=int, default=20, help="附录章节数（不超过26，LaTeX附录编号为A–Z）")
+    parser.add_argument("--paragraphs", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--ids", nargs="*", default=None, help="真实论文的arXiv id（建议带版本号）")
+    args = parser.parse_args()
+
+    if args.ids:
+        asyncio.run(run_real(args.ids, args.repeat))
+        return
+
+    if args.appendix > 26:
+        parser.error("--appendix 不能超过26")
+    html = make_latexml_html(n_sections=args.sections, n_paragraphs=args.paragraphs, n_appendix=args.appendix).encode("utf-8")
+    eprint = make_eprint_tarball(n_sections=args.sections, n_paragraphs=args.paragraphs, n_appendix=args.appendix)
+    html_paper, html_time = _timed(parse_arxiv_html_bytes, html, args.repeat)
+    latex_paper, latex_time = _timed(parse_eprint_bytes, eprint, args.repeat)
+    report("合成论文", len(html), len(eprint), html_time, latex_time, compare(html_paper, latex_paper, text_overlap=False))
+
+
+if __name__ == "__main__":
+    main()
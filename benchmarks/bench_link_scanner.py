@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML流式图片/链接扫描基准测试
+
+对比：
+- 旧扫描：每块追加到滚动buffer后对整个buffer重跑 <img>/<a> 正则，超过100KB时截断为最后50KB
+- 新扫描：StreamingLinkScanner 只扫描新文本与上一块末尾未闭合的标签
+
+合成论文页面中加入参考文献锚点与外部链接；统计吞吐量与找到的URL数，
+并列出旧扫描因标签跨越截断位置而漏掉的URL
+
+用法: python benchmarks/bench_link_scanner.py [--sections 12] [--appendix 20] [--links 400] [--chunk-size 65536] [--repeat 5]
+"""
+
+import os
+import re
+import sys
+import time
+import codecs
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arxiv_html_fixture import make_latexml_html  # noqa: E402
+from image_extractor import StreamingLinkScanner, IMG_PATTERN, LINK_PATTERN  # noqa: E402
+
+
+def add_links(html: str, n_links: int, seed: int = 0) -> str:
+    """在段落末尾插入参考文献锚点与外部链接（GitHub、项目主页）"""
+    rng = random.Random(seed)
+    count = 0
+
+    def _link(match):
+        nonlocal count
+        count += 1
+        if count > n_links:
+            return match.group(0)
+        if count % 10 == 0:
+            anchor = f'<a href="https://github.com/example/repo{count}" class="ltx_href">code</a>'
+        elif count % 10 == 5:
+            anchor = f'<a href="https://project{count}.github.io/" class="ltx_href">project page</a>'
+        else:
+            anchor = f'<a href="#bib.bib{rng.randint(1, 200)}" class="ltx_ref">[{rng.randint(1, 200)}]</a>'
+        return f" {anchor}</p>"
+
+    return re.sub(r'</p>', _link, html)
+
+
+def scan_old(data: bytes, chunk_size: int):
+    """改动前的滚动buffer扫描"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    buffer = ""
+    images, links = set(), set()
+    for start in range(0, len(data), chunk_size):
+        buffer += decoder.decode(data[start:start + chunk_size], final=start + chunk_size >= len(data))
+        images.update(IMG_PATTERN.findall(buffer))
+        links.update(LINK_PATTERN.findall(buffer))
+        if len(buffer) > 100000:
+            buffer = buffer[-50000:]
+    return images, links
+
+
+def scan_new(data: bytes, chunk_size: int):
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    scanner = StreamingLinkScanner()
+    images, links = [], []
+    for start in range(0, len(data), chunk_size):
+        final = start + chunk_size >= len(data)
+        new_images, new_links = scanner.feed(decoder.decode(data[start:start + chunk_size], final=final), final=final)
+        images.extend(new_images)
+        links.extend(new_links)
+    return images, links
+
+
+def _timed(func, data, chunk_size, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(data, chunk_size)
+        timings.append(time.perf_counter() - start)
+    return result, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML流式图片/链接扫描基准测试")
+    parser.add_argument("--sections", type=int, default=12)
+    parser.add_argument("--appendix", type=int, default=20)
+    parser.add_argument("--paragraphs", type=int, default=6)
+    parser.add_argument("--links", type=int, default=400, help="插入的链接数")
+    parser.add_argument("--chunk-size", type=int, default=65536)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    html = make_latexml_html(n_sections=args.sections, n_paragraphs=args.paragraphs, n_appendix=args.appendix)
+    data = add_links(html, args.links).encode("utf-8")
+    reference = (set(IMG_PATTERN.findall(data.decode("utf-8"))), set(LINK_PATTERN.findall(data.decode("utf-8"))))
+
+    (old_images, old_links), old_time = _timed(scan_old, data, args.chunk_size, args.repeat)
+    (new_images, new_links), new_time = _timed(scan_new, data, args.chunk_size, args.repeat)
+    assert len(new_images) == len(set(new_images)) and len(new_links) == len(set(new_links)), "新扫描输出了重复URL"
+
+    size_mb = len(data) / 1024 / 1024
+    print(f"页面 {len(data) / 1024:.0f} KB，分块 {args.chunk_size // 1024} KB，"
+          f"整页共 {len(reference[0])} 个图片URL、{len(reference[1])} 个链接URL")
+    for name, images, links, elapsed in (("旧扫描", old_images, old_links, old_time),
+                                         ("新扫描", set(new_images), set(new_links), new_time)):
+        missed = (reference[0] - images) | (reference[1] - links)
+        print(f"  {name}: {elapsed * 1000:.1f} ms（{size_mb / elapsed:.0f} MB/s），"
+              f"图片 {len(images)}，链接 {len(links)}，漏掉 {len(missed)}"
+              + (f"（如 {sorted(missed)[:3]}）" if missed else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+章节树构建等价性检查
+
+对比：
+- 旧实现：find_all 取块级节点，逐个 find_parent 判断是否在摘要/figure内，另行 find_all 统计最大标题层级
+  （照抄单次遍历改动前的 parse_arxiv_by_headings / find_max_heading_level）
+- 新实现：ContentGenerator.parse_arxiv_by_headings（_scan_blocks 单次遍历）
+
+在合成 LaTeXML 页面（多种规模）与手写的边界页面上，分别用 lxml（整页/只解析article）和 html.parser 解析，
+并遍历各种根节点选择器，要求两者输出的章节树完全一致；有差异时以非零状态退出
+
+边界页面包含：摘要内的标题、figure内的标题与段落、低于最大层级的 h5/h6、无class的figure、
+package-alerts 警告框、第一个标题之前的段落
+
+用法: python benchmarks/check_section_tree.py
+"""
+
+import os
+import re
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from arxiv_html_fixture import make_latexml_html  # noqa: E402
+from content_generator import ContentGenerator, ARTICLE_STRAINER  # noqa: E402
+
+FIXTURE_SIZES = [
+    {'n_sections': 1, 'n_subsections': 1, 'n_paragraphs': 2, 'n_appendix': 0},
+    {'n_sections': 4, 'n_subsections': 2, 'n_paragraphs': 3, 'n_appendix': 2},
+    {'n_sections': 12, 'n_subsections': 4, 'n_paragraphs': 6, 'n_appendix': 20},
+]
+
+ROOT_SELECTORS = [
+    None,
+    ("article", {"class": "ltx_document"}),
+    ("div", {"class": "ltx_document"}),
+    "article.ltx_document",
+    ".ltx_document",
+    "main",
+]
+
+EDGE_CASE_HTML = """<!DOCTYPE html><html><head><meta charset="UTF-8"></head><body>
+<div class="package-alerts ltx_document" role="status">
+  <h2>Conversion errors</h2><p>Some packages failed [3].</p>
+</div>
+<article class="ltx_document">
+  <h1 class="ltx_title ltx_title_document">Edge Cases: A Test Page</h1>
+  <p class="ltx_p">Paragraph before any heading [1, 2].</p>
+  <div class="ltx_abstract">
+    <h6 class="ltx_title ltx_title_abstract">Abstract</h6>
+    <h2>Heading inside abstract</h2>
+    <p class="ltx_p">Abstract text.</p>
+    <figure class="ltx_figure"><img src="abs.png" id="abs.g1"></figure>
+  </div>
+  <section class="ltx_section">
+    <h2 class="ltx_title">1 Introduction</h2>
+    <p class="ltx_p">Intro   text [12].</p>
+    <figure class="ltx_figure" id="F1">
+      <h3>Heading inside figure</h3>
+      <p class="ltx_p">paragraph inside figure</p>
+      <img src="f1.png" id="F1.g1">
+      <figure class="ltx_figure ltx_figure_panel"><img src="f1a.png" id="F1.g2"><span class="ltx_caption">(a)</span></figure>
+      <figcaption class="ltx_caption">Figure 1: Overview.</figcaption>
+    </figure>
+    <figure id="U1"><img src="unclassed.png"><p>caption paragraph of an unclassed figure</p></figure>
+    <figure class="ltx_figure" id="F2">
+      <img src="f2a.png" id="F2.g1"><img src="f2b.png" id="F2.g2"><img src="f2c.png" id="F2.g3">
+      <span class="ltx_caption">left</span><span class="ltx_caption">right</span>
+    </figure>
+    <section class="ltx_subsection">
+      <h3 class="ltx_title">1.1 Setting</h3>
+      <p class="ltx_p">Setting text.</p>
+      <h4 class="ltx_title">1.1.1 Detail</h4>
+      <p class="ltx_p">Detail text.</p>
+      <h5>Paragraph heading below the detected level</h5>
+      <p class="ltx_p">After h5.</p>
+      <h6>Another deep heading</h6>
+      <figure class="ltx_table" id="T1"><figcaption>Table 1: Results.</figcaption>
+        <table><tr><td>a</td><td>1.0</td></tr></table></figure>
+    </section>
+    <h3>1.2 Loose subsection</h3>
+    <p class="ltx_p"></p>
+    <p class="ltx_p">Loose text.</p>
+  </section>
+  <h2 class="ltx_title">References</h2>
+  <p>Cited work.</p>
+  <figure class="ltx_graphics"><img src="g.png"></figure>
+</article>
+<main><h2>Main heading</h2><p>Main text.</p></main>
+</body></html>"""
+
+
+def _new_section(title=None):
+    return {
+        "title": title,
+        "figures": [],
+        "tables": [],
+        "subsections": []
+    }
+
+
+def parse_by_headings_baseline(soup: BeautifulSoup, content_root_selector=None):
+    """改动前的 ContentGenerator.parse_arxiv_by_headings（去掉self）"""
+    # 选择解析根节点 未指定回退到默认根节点
+    if content_root_selector:
+        nodes = soup.find_all(*content_root_selector) if isinstance(content_root_selector, tuple) else soup.select(content_root_selector)
+        root = None
+        for node in nodes:
+            # 跳过警告框
+            if "package-alerts" in node.get("class", []):
+                continue
+            root = node
+            break
+        if root is None:
+            root = soup.body or soup
+    else:
+        # 优先正文 <article>，再兜底
+        root = (
+            soup.select_one("article.ltx_document")
+            or soup.select_one("div.ltx_document:not(.package-alerts)")
+            or soup.select_one("main")
+            or soup.body
+            or soup
+        )
+
+    # 用“虚拟根”承载最上层 sections
+    virtual_root = _new_section(title=None)
+    paper = virtual_root["subsections"]
+
+    # 层级映射
+    max_heading_level = find_max_heading_level_baseline(soup)
+    heading_tags = [f"h{i}" for i in range(2, max_heading_level + 1)]
+    level_of = {tag: int(tag[1]) for tag in heading_tags}
+
+    # 栈：[(level, section_dict)]，初始化用虚拟根 level=1
+    stack = [(1, virtual_root)]
+
+    def in_abstract(node):
+        return node.find_parent(class_="ltx_abstract") is not None
+
+    blocks = root.find_all(list(heading_tags) + ["p", "figure"], recursive=True)
+
+    for node in blocks:
+        # 跳过摘要
+        if in_abstract(node):
+            continue
+        # 避免抓到 figure 内部的 p（只保留 figure 自身）
+        if node.name == "p" and node.find_parent("figure") is not None:
+            continue
+
+        # 处理标题：开新层
+        if node.name in heading_tags:
+            title = node.get_text(" ", strip=True)
+            level = level_of[node.name]
+
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+
+            parent_level, parent_sec = stack[-1]
+            new_sec = _new_section(title=title)
+            parent_sec["subsections"].append(new_sec)
+            stack.append((level, new_sec))
+            continue
+
+        _, cur_sec = stack[-1]
+
+        # 段落
+        if node.name == "p":
+            text = node.get_text(" ", strip=True)
+            text = re.sub(r'\[\s*\d+(?:\s*,\s*\d+)*\s*\]', '', text)
+            text = re.sub(r'\s+', ' ', text).strip()
+            if text:
+                cur_sec["subsections"].append({"text": text})
+            continue
+
+        # 图片 or 表格（按 class 判断）
+        if node.name == "figure":
+            classes = set(node.get("class", []))
+            # 表格
+            if "ltx_table" in classes:
+                caption_tag = node.find("figcaption")
+                table_info = {
+                    "id": node.get("id"),
+                    "caption": caption_tag.get_text(" ", strip=True) if caption_tag else None,
+                    "content": node.get_text(" ", strip=True),
+                }
+                cur_sec["tables"].append(table_info)
+                continue
+
+            # 图片
+            if "ltx_figure" in classes or "ltx_graphics" in classes:
+                caption_spans = node.find_all("span", class_='ltx_caption')
+                for idx, img in enumerate(node.find_all("img")):
+                    caption = node.find("figcaption")
+                    if caption:
+                        caption = caption.get_text(" ", strip=True)
+                    else:
+                        if idx < len(caption_spans):
+                            caption = caption_spans[idx].get_text(" ", strip=True)
+                        else:
+                            caption = ""
+                    img_info = {
+                        "id": img.get("id"),
+                        "url": img.get("src") if img else None,
+                        "caption": caption
+                    }
+                    cur_sec["figures"].append(img_info)
+                continue
+
+            # 其它不识别的 figure，忽略
+            continue
+
+    return paper
+
+
+def find_max_heading_level_baseline(soup):
+    """改动前的 ContentGenerator.find_max_heading_level（去掉self）"""
+    max_level = 0
+    for section in soup.find_all("section", class_="ltx_section"):
+        for tag in section.find_all(re.compile(r'^h[1-6]$')):
+            level = int(tag.name[1])
+            if level > max_level:
+                max_level = level
+    return max_level
+
+
+def _soups(html: str):
+    """同一页面的各种解析方式"""
+    data = html.encode("utf-8")
+    yield "lxml", BeautifulSoup(data, "lxml", from_encoding="utf-8")
+    yield "lxml+strainer", BeautifulSoup(data, "lxml", parse_only=ARTICLE_STRAINER, from_encoding="utf-8")
+    yield "html.parser", BeautifulSoup(html, "html.parser")
+
+
+def _first_difference(old, new, path="sections"):
+    """定位两棵章节树的第一处差异，便于排查"""
+    if type(old) is not type(new):
+        return path
+    if isinstance(old, dict):
+        for key in sorted(set(old) | set(new)):
+            found = _first_difference(old.get(key), new.get(key), f"{path}.{key}")
+            if found:
+                return found
+        return None
+    if isinstance(old, list):
+        for i, (a, b) in enumerate(zip(old, new)):
+            found = _first_difference(a, b, f"{path}[{i}]")
+            if found:
+                return found
+        return f"{path}（长度 {len(old)} vs {len(new)}）" if len(old) != len(new) else None
+    return path if old != new else None
+
+
+def check_page(name: str, html: str) -> int:
+    """返回不一致的组合数"""
+    failures = 0
+    for parser_name, soup in _soups(html):
+        if find_max_heading_level_baseline(soup) != ContentGenerator.find_max_heading_level(soup):
+            print(f"  [不一致] {name} / {parser_name}: 最大标题层级不同")
+            failures += 1
+        for selector in ROOT_SELECTORS:
+            old = parse_by_headings_baseline(soup, selector)
+            new = ContentGenerator.parse_arxiv_by_headings(soup, selector)
+            if json.dumps(old, sort_keys=True) != json.dumps(new, sort_keys=True):
+                print(f"  [不一致] {name} / {parser_name} / 根节点 {selector!r}: {_first_difference(old, new)}")
+                failures += 1
+    return failures
+
+
+def main():
+    pages = [(f"合成页面 {size}", make_latexml_html(**size)) for size in FIXTURE_SIZES]
+    pages.append(("边界页面", EDGE_CASE_HTML))
+
+    failures = 0
+    for name, html in pages:
+        page_failures = check_page(name, html)
+        combinations = 3 * (len(ROOT_SELECTORS) + 1)
+        print(f"{name}: {combinations - page_failures}/{combinations} 个组合一致")
+        failures += page_failures
+
+    if failures:
+        print(f"共 {failures} 处不一致")
+        sys.exit(1)
+    print("新旧实现输出的章节树完全一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+两步生成（章节检测 + 生成）与单次调用生成的对比
+
+在固定论文集上分别运行两种模式，记录：
+- 每篇论文的生成耗时、LLM调用次数与token
+- 质量指标：必需部分是否齐全、正文字数是否在450–600字、大纲标题覆盖、【】标注数值能否在原文中找到
+
+需要配置 API_KEY / API_KEYS，结果写入 JSON 文件
+用法: python benchmarks/compare_generation_modes.py [--ids 2512.10950 2512.04677 ...] [--output compare_modes.json]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv  # noqa: E402
+from arxiv_search import ArxivSearcher  # noqa: E402
+from api_key_pool import APIKeyPool  # noqa: E402
+from llm_client import LLMClient  # noqa: E402
+from content_generator import ContentGenerator  # noqa: E402
+from output_formatter import OutputFormatter  # noqa: E402
+
+logging.basicConfig(level=logging.WARNING)
+
+# 固定论文集（方法类论文，章节命名风格各异）
+DEFAULT_IDS = ["2512.10950", "2512.04677", "2512.03350"]
+OUTLINE_HEADINGS = ["研究背景与问题", "方法核心", "实验与结果", "主要贡献与启发"]
+QUOTE_PATTERN = re.compile(r'【([^】]*)】')
+NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+FORMATTER = OutputFormatter(time.strftime('%Y%m%d_%H%M%S'), "./")
+
+
+def _paper_text(paper_structured) -> str:
+    """论文全部段落文本，用于核对【】中的数值"""
+    texts = []
+    stack = list(paper_structured.get('sections', []))
+    while stack:
+        node = stack.pop()
+        if "text" in node:
+            texts.append(node["text"])
+        stack.extend(node.get("subsections", []))
+    return " ".join(texts)
+
+
+def quality_metrics(content: str, source_text: str) -> dict:
+    """资讯内容的质量指标"""
+    parsed = FORMATTER._parse_single_content(content) if content else None
+    summary = parsed['content_summary'] if parsed else 'NOT_PROVIDED'
+    quotes = QUOTE_PATTERN.findall(content or "")
+    numbers = [n for quote in quotes for n in NUMBER_PATTERN.findall(quote)]
+    grounded = [n for n in numbers if n in source_text]
+    return {
+        'complete': bool(parsed) and parsed['title'] != 'NOT_PROVIDED' and summary != 'NOT_PROVIDED',
+        'summary_chars': len(summary) if summary != 'NOT_PROVIDED' else 0,
+        'length_in_range': 450 <= len(summary) <= 600 if summary != 'NOT_PROVIDED' else False,
+        'outline_coverage': sum(heading in summary for heading in OUTLINE_HEADINGS) / len(OUTLINE_HEADINGS),
+        'quoted_numbers': len(numbers),
+        'grounded_numbers': len(grounded),
+    }
+
+
+async def run_mode(mode: str, papers, key_pool: APIKeyPool) -> dict:
+    llm_client = LLMClient(key_pool=key_pool)
+    generator = ContentGenerator(key_pool.states[0].key, llm_client=llm_client, generation_mode=mode,
+                                 stream_generation=False, parse_workers=0)
+    results = []
+    for paper in papers:
+        paper_structured = await generator.parse_arxiv_html_stream(paper['links']['html'])
+        calls_before = llm_client.get_metrics()['calls']
+        start = time.perf_counter()
+        news = await generator.generate_news(paper) or {'content': None}
+        elapsed = time.perf_counter() - start
+        results.append({
+            'id': paper['id'],
+            'seconds': round(elapsed, 2),
+            'llm_calls': llm_client.get_metrics()['calls'] - calls_before,
+            'selected_sections': news.get('selected_sections'),
+            'quality': quality_metrics(news.get('content'), _paper_text(paper_structured)),
+            'content': news.get('content'),
+        })
+        print(f"[{mode}] {paper['id']}: {elapsed:.1f}s, LLM调用 {results[-1]['llm_calls']} 次, 质量 {results[-1]['quality']}")
+    await generator.close()
+
+    routes = llm_client.get_metrics()['routes']
+    tokens = {route: sum(stat['input_tokens'] + stat['output_tokens'] for stat in models.values())
+              for route, models in routes.items()}
+    return {'papers': results, 'tokens': tokens}
+
+
+def summarize(mode_result: dict) -> dict:
+    papers = mode_result['papers']
+    n = len(papers) or 1
+    return {
+        'avg_seconds': round(sum(p['seconds'] for p in papers) / n, 2),
+        'avg_llm_calls': round(sum(p['llm_calls'] for p in papers) / n, 2),
+        'complete_rate': sum(p['quality']['complete'] for p in papers) / n,
+        'length_in_range_rate': sum(p['quality']['length_in_range'] for p in papers) / n,
+        'outline_coverage': round(sum(p['quality']['outline_coverage'] for p in papers) / n, 3),
+        'grounded_number_rate': round(
+            sum(p['quality']['grounded_numbers'] for p in papers)
+            / max(1, sum(p['quality']['quoted_numbers'] for p in papers)), 3),
+        'tokens': mode_result['tokens'],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="两步生成与单次调用生成对比")
+    parser.add_argument('--ids', nargs='*', default=DEFAULT_IDS, help='固定论文集的arXiv id')
+    parser.add_argument('--output', default='compare_generation_modes.json', help='结果文件')
+    args = parser.parse_args()
+
+    load_dotenv()
+    key_pool = APIKeyPool.from_env()
+    if not key_pool:
+        print("请配置 API_KEY 或 API_KEYS")
+        return 1
+
+    papers = ArxivSearcher("./", time.strftime('%Y%m%d_%H%M%S')).search_papers(query=None, id_list=args.ids)
+    report = {}
+    for mode in ('two_step', 'single_call'):
+        mode_result = await run_mode(mode, papers, key_pool)
+        report[mode] = {'summary': summarize(mode_result), **mode_result}
+
+    print(json.dumps({mode: result['summary'] for mode, result in report.items()}, ensure_ascii=False, indent=2))
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"详细结果已保存到: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -5,24 +5,143 @@
 使用千问模型生成arXiv论文的中文资讯内容
 """
 
+import os
 import json
+import codecs
 import logging
 from typing import Dict, Any, List, Optional
-from bs4 import BeautifulSoup
-from dashscope import Generation
+from bs4 import BeautifulSoup, SoupStrainer, Tag
 import asyncio
 import re
-import httpx
 from typing import AsyncGenerator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from llm_client import LLMClient, CircuitOpenError
+from output_formatter import StreamingContentParser
+from prompt_budget import PromptBudgeter, PARAGRAPH_SEPARATOR, estimate_tokens
+from html_cache import ArxivHTMLCache
+from paper_cache import StructuredPaperCache, LazySections
+from section_locator import SectionLocator, SectionSignatureMemo
+from section_index import SectionIndex
+from pdf_parser import extract_pdf_lines, build_pdf_paper, count_pdf_pages, page_ranges
+from latex_parser import parse_eprint_bytes
+from structure_prefetcher import StructurePrefetcher
+from content_validator import ContentValidator, PARSED_KEYS, render_content
 
 logger = logging.getLogger(__name__)
 
+# 优先使用lxml解析（C实现），未安装时回退到标准库html.parser
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# 只解析正文 <article class="ltx_document">，跳过导航、页脚和 package-alerts 警告框
+# 过滤发生在class拆分之前，需用正则匹配多值class
+ARTICLE_STRAINER = SoupStrainer("article", class_=re.compile(r"(^|\s)ltx_document(\s|$)"))
+
+# 段落中的参考文献标记，如 [3], [72, 33] 等
+CITATION_PATTERN = re.compile(r'\[\s*\d+(?:\s*,\s*\d+)*\s*\]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# 单次调用模式：不放入摘录的章节，以及模型输出首行的所选章节
+EXCERPT_SKIP_PATTERN = re.compile(r'reference|bibliograph|acknowledg|appendix|introduction', re.IGNORECASE)
+SELECTION_PATTERN = re.compile(r'^\s*选用章节[：:]([^\n]*)\n?', re.MULTILINE)
+
+# 正文结构来源 -> paper['links'] 中的链接
+STRUCTURE_SOURCE_LINKS = {'html': 'html', 'latex': 'e-print', 'pdf': 'pdf'}
+
+# 多版本生成的风格（依次分配给各版本，版本数多于风格数时循环使用）
+VARIANT_STYLES = {
+    'default': "",
+    'casual': "语气轻松活泼，多用生活化的比喻或例子帮助理解，可适当使用表情符号，但技术内容与数值仍需准确。",
+    'brief': "要点速览式写法，每个大纲部分用2–4个短句或要点概括，信息密度高，避免铺垫。",
+    'story': "以研究动机为线索叙述，从一个具体问题或应用场景切入，再引出方法与结果。",
+}
+# 同一风格的多个版本由多候选采样得到，提高温度以拉开差异
+VARIANT_SAMPLE_TEMPERATURE = 0.8
+
+# 补写提示词中各部分的要求（与生成提示词一致）
+REPAIR_REQUIREMENTS = {
+    '标题': "简洁明了且吸睛的标题（20字以内）",
+    '备选标题': "5个候选标题，不要过于相似，用逗号分隔",
+    '详细内容总结': "保持专业严谨，保留原有的大纲标题，字数控制在 {length} 字",
+    '话题标签': "6-8个话题，包括领域、应用方向及相关技术，确保标签多样化且相关性强，用逗号分隔",
+}
+SUMMARY_LENGTH_REQUIREMENTS = {'full_text': '450–600', 'abstract': '250–350'}
+REPAIR_MAX_TOKENS = {'详细内容总结': 1200}
+
 class ContentGenerator:
     """内容生成器"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, llm_client: LLMClient = None, stream_generation: bool = True, on_section=None,
+                 section_token_budget: Dict[str, int] = None, parse_workers: Optional[int] = None,
+                 html_cache: ArxivHTMLCache = None, paper_cache: StructuredPaperCache = None,
+                 section_locator: SectionLocator = None, section_memo: SectionSignatureMemo = None,
+                 generation_mode: str = 'two_step', single_call_excerpt_budget: int = None,
+                 structure_sources=('html', 'pdf'), pdf_cache: ArxivHTMLCache = None,
+                 eprint_cache: ArxivHTMLCache = None, prefetch_concurrency: int = 0,
+                 prefetch_cache_size: int = 32, validate_output: bool = True,
+                 content_validator: ContentValidator = None, variants: int = 1, variant_styles: List[str] = None):
         self.api_key = api_key
-        self.model = "qwen-plus-2025-09-11"  # Qwen3
+        # arXiv HTML磁盘缓存，可与 ImageExtractor 共用同一实例
+        self.html_cache = html_cache or ArxivHTMLCache()
+        # 正文结构来源及尝试顺序：html（LaTeXML页面）、latex（e-print源码包）、pdf
+        # 前一个来源解析不出章节（新提交无HTML、转换失败等）时尝试下一个，下载内容同样只缓存一次
+        unknown = set(structure_sources) - set(STRUCTURE_SOURCE_LINKS)
+        if unknown or not structure_sources:
+            raise ValueError(f"未知的正文结构来源: {sorted(unknown)}")
+        self.structure_sources = tuple(structure_sources)
+        self.structure_source_counts = {source: 0 for source in self.structure_sources}
+        self.pdf_cache = pdf_cache or ArxivHTMLCache(cache_dir="cache/pdf", suffix=".pdf")
+        self.eprint_cache = eprint_cache or ArxivHTMLCache(cache_dir="cache/eprint", suffix=".eprint")
+        # 解析后的章节树缓存（按 id+版本），重新生成时跳过下载与解析
+        self.paper_cache = paper_cache or StructuredPaperCache()
+        # 本地规则定位方法/结论章节，置信度不足时才调用LLM检测
+        self.section_locator = section_locator or SectionLocator()
+        # 章节结构签名备忘录：结构相同的论文复用已确认的章节路径
+        self.section_memo = section_memo or SectionSignatureMemo()
+        # 共享LLM调用客户端（模型路由+对冲请求+熔断器），未传入时单独创建
+        # 章节检测走 section_detection 路由，资讯生成走 news_generation 路由
+        self.llm_client = llm_client or LLMClient(api_key)
+        # 流式生成资讯：逐部分解析，NOT_PROVIDED时提前中止
+        self.stream_generation = stream_generation
+        self.on_section = on_section  # 回调 on_section(paper_id, 部分名, 内容)
+        # 引言/方法/结论的token配额，如 {'introduction': 1200, 'method': 1500, 'conclusion': 600}
+        self.prompt_budgeter = PromptBudgeter(section_token_budget)
+        self.prompt_budget_reports = {}  # {paper_id: 提示词裁剪统计}
+        # 生成模式：two_step 先检测章节再生成；single_call 章节标题+摘录一次性交给模型选取并生成
+        if generation_mode not in ('two_step', 'single_call'):
+            raise ValueError(f"未知的生成模式: {generation_mode}")
+        self.generation_mode = generation_mode
+        # 单次调用模式下引言以外各章节摘录的总token配额，默认为方法与结论配额之和
+        self.single_call_excerpt_budget = single_call_excerpt_budget or (
+            self.prompt_budgeter.budgets['method'] + self.prompt_budgeter.budgets['conclusion'])
+        self.single_call_selections = {}  # {paper_id: 模型选用的章节}
+        # HTML/LaTeX解析、PDF文本提取与章节树构建在进程池中执行，避免阻塞事件循环
+        # None 表示使用全部CPU核心，0 表示在当前进程内同步解析
+        self.parse_workers = (os.cpu_count() or 1) if parse_workers is None else parse_workers
+        self._parse_pool = None
+        # 正文结构预取器：质量评分阶段提前下载并解析可能入选的论文，0 表示不预取
+        self.prefetcher = StructurePrefetcher(
+            self.parse_paper_structure, max_concurrency=prefetch_concurrency, max_entries=prefetch_cache_size
+        ) if prefetch_concurrency > 0 else None
+        # 生成后立即校验四个部分、长度与【】标注，不合格的部分单独补写
+        self.validate_output = validate_output
+        self.content_validator = content_validator or ContentValidator()
+        self.repair_stats = {'validated': 0, 'passed': 0, 'repaired': 0, 'unresolved': 0}
+        # 生成时使用的（裁剪后）正文章节，补写详细内容总结时据此引用原句
+        self.repair_sources = {}  # {paper_id: 章节文本}
+        # 多版本生成：每篇论文生成 variants 个不同风格的版本，共用解析结果与裁剪后的提示词
+        # 第一个版本为默认风格（即 content），其余版本与之并发生成，同一风格的多个版本合并为一次多候选请求
+        variant_styles = list(variant_styles or VARIANT_STYLES)
+        unknown = set(variant_styles) - set(VARIANT_STYLES)
+        if unknown or variants < 1:
+            raise ValueError(f"未知的资讯风格: {sorted(unknown)}" if unknown else f"版本数需大于0: {variants}")
+        self.variants = variants
+        self.variant_styles = [variant_styles[i % len(variant_styles)] for i in range(variants)]
+        self.variant_results = {}  # {paper_id: [(风格, 内容)]}
         
         # 提示词模板
         self.content_prompt_template_method = """
@@ -93,42 +212,373 @@ class ContentGenerator:
             话题标签：[话题标签1, 话题标签2]
             """
 
+        # 快速草稿：只用检索结果中已有的元数据，不下载正文，正文解读生成后覆盖
+        self.content_prompt_template_abstract = """
+            你是一个学术资讯生成器, 请根据论文摘要为面向科技兴趣读者的小红书写一篇第三人称视角的中文快讯，确保内容简洁、专业、易懂，字数控制在 250–350 字。
+            请注意：你**只能**使用给定的论文信息（标题、摘要、备注、分类），**不得凭空捏造任何数据和信息**，所有提具体数值需要用【】标注原句。摘要中未提及的实验细节不要补充。如果某些信息在输入中不存在，请在对应字段返回"NOT_PROVIDED"。
+
+            要求：
+            1. 标题：简洁明了且吸睛的标题（20字以内）
+            2. 候选标题：5个候选标题，不要过于相似
+            3. 详细论文总结：输出时需要保留所要求的大纲标题，大纲如下：
+            研究背景与问题（约 60–80 字）：论文要解决的问题及其重要性。
+            方法核心（约 100–140 字）：摘要中描述的方法思路与创新点，保持关键术语。
+            主要结果（约 50–80 字）：摘要中给出的主要结果；摘要未给出具体结果时简要说明论文声称的效果。
+            4. 话题标签：6-8个话题，包括领域、应用方向及相关技术
+            5. 领域内难以翻译的术语可以保留英文，但要提供中文解释
+
+            论文信息：
+            标题：{title}
+            作者：{authors}
+            摘要：{summary}
+            备注：{comment}
+            分类：{categories}
+
+            请按照以下格式输出：
+            标题：[生成的标题]
+
+            备选标题：[候选标题1, 候选标题2]
+
+            详细内容总结：[详细总结内容]
+
+            话题标签：[话题标签1, 话题标签2]
+            """
+
+        # 补写提示词：只重新生成不合格的部分，输入为论文元数据、已生成的资讯，
+        # 补写详细内容总结时另附生成时使用的正文章节（【】需引用其中的原句）
+        self.content_repair_prompt_template = """
+            你是一个学术资讯生成器。下面是一篇论文的小红书中文资讯贴，其中「{part}」部分不合格：{problem}。
+            请只重新生成「{part}」部分，不要输出其他部分。
+            要求：{requirement}
+            请注意：你**只能**使用给定的论文信息和已有资讯内容，**不得凭空捏造任何数据和信息**。{marker_requirement}
+
+            论文信息：
+            标题：{title}
+            摘要：{summary}
+            {source}
+
+            已有资讯内容：
+            {content}
+
+            请按照以下格式输出：
+            {part}：[{part}内容]
+            """
+
    
     async def generate_news(self, paper: Dict[str, Any]) -> Dict[str, Any]:
         """生成单篇论文的资讯内容"""
         try:
             logger.info(f"开始生成论文 {paper.get('id', 'unknown')} 的资讯内容")
             
-            paper_structured = await self.parse_arxiv_html_stream(paper['links']['html'])
+            paper_structured = None
+            if self.prefetcher is not None:
+                paper_structured = await self.prefetcher.take(paper)
+            if paper_structured is None:
+                paper_structured = await self.parse_paper_structure(paper)
 
             if paper_structured is None:
                 logger.warning(f"论文 {paper.get('id', 'unknown')} 结构化失败")
                 return {'content': None}
 
             # 生成正文内容
-            content_method = await self._generate_content_method(paper, paper_structured)
+            if self.generation_mode == 'single_call':
+                content_method = await self._generate_content_single_call(paper, paper_structured)
+            else:
+                content_method = await self._generate_content_method(paper, paper_structured)
             
             if content_method == "":
                 logger.warning(f"论文 {paper.get('id', 'unknown')} 资讯内容生成失败")
+                self.variant_results.pop(paper.get('id', 'unknown'), None)
+                self.repair_sources.pop(paper.get('id', 'unknown'), None)
                 return {'content': None}
+            source_text = self.repair_sources.pop(paper.get('id', 'unknown'), None)
+            content_method, repairs = await self._validate_and_repair(paper, content_method, 'full_text', source_text)
+            variants = await self._finish_variants(paper, content_method, repairs, source_text)
 
             # 组合结果
             news = {
                 'content': content_method,
-                # 'content_B': content_B,
-                # 'content_C': content_C,
+                'content_source': 'full_text',
+                'repairs': repairs,
+                'variants': variants,
+                'prompt_budget': self.prompt_budget_reports.pop(paper.get('id', 'unknown'), None),
             }
+            if self.generation_mode == 'single_call':
+                news['selected_sections'] = self.single_call_selections.pop(paper.get('id', 'unknown'), None)
 
             logger.info(f"论文 {paper.get('id', 'unknown')} 资讯内容生成完成")
             return news
-            
+
+        except CircuitOpenError:
+            # 熔断期间不再逐篇慢速失败，推迟该论文
+            logger.warning(f"LLM熔断中，论文 {paper.get('id', 'unknown')} 推迟生成")
+            return {'content': None, 'deferred': True}
+
         except Exception as e:
             import traceback
             error_details = traceback.format_exc()
             logger.error(f"生成资讯内容时出错: {str(e)}")
             logger.error(f"详细错误信息:\n{error_details}")
             return None
+
+    async def generate_news_fast(self, paper: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        仅依据检索元数据（标题/摘要/备注/分类）生成资讯草稿，跳过正文下载、解析与章节检测
+
+        Returns:
+            资讯内容，draft 为 True；之后的正文生成结果写入同一输出位置
+        """
+        paper_id = paper.get('id', 'unknown')
+        try:
+            logger.info(f"开始生成论文 {paper_id} 的摘要草稿")
+            prompt = self.content_prompt_template_abstract.format(
+                title=paper.get('title', ''),
+                authors=', '.join(paper.get('authors', [])),
+                summary=paper.get('summary', ''),
+                comment=paper.get('comment') or '无',
+                categories=', '.join(paper.get('categories', [])),
+            )
+            if self.stream_generation:
+                response = await self._call_qwen_api_stream(prompt, paper_id, route='news_draft')
+            else:
+                response = await self._call_qwen_api(prompt, route='news_draft')
+            content = response.strip()
+
+            if content == "":
+                logger.warning(f"论文 {paper_id} 摘要草稿生成失败")
+                return {'content': None}
+
+            content, repairs = await self._validate_and_repair(paper, content, 'abstract')
+
+            logger.info(f"论文 {paper_id} 摘要草稿生成完成")
+            return {'content': content, 'draft': True, 'content_source': 'abstract', 'repairs': repairs}
+
+        except CircuitOpenError:
+            logger.warning(f"LLM熔断中，论文 {paper_id} 推迟生成")
+            return {'content': None, 'deferred': True}
+
+        except Exception as e:
+            logger.error(f"生成摘要草稿时出错: {str(e)}")
+            return None
+
+    async def _generate_from_prompt(self, prompt: str, paper_id: str) -> str:
+        """
+        按提示词生成资讯内容；多版本模式下其余风格的版本与主版本并发生成，结果存入 variant_results
+
+        Returns:
+            主版本（默认风格）的内容
+        """
+        if self.variants <= 1:
+            return await self._call_main(prompt, paper_id)
+
+        # 同一风格的版本合并为一次多候选请求；默认风格的第一个版本走原有的（流式）调用
+        counts = {}
+        for style in self.variant_styles:
+            counts[style] = counts.get(style, 0) + 1
+        counts[self.variant_styles[0]] -= 1
+        styles = [style for style, count in counts.items() if count > 0]
+        results = await asyncio.gather(
+            self._call_main(self._styled_prompt(prompt, self.variant_styles[0]), paper_id),
+            *[self.llm_client.call_samples(self._styled_prompt(prompt, style), counts[style], route='news_generation',
+                                           temperature=VARIANT_SAMPLE_TEMPERATURE if self.variant_styles.count(style) > 1 else 0.3)
+              for style in styles],
+            return_exceptions=True,
+        )
+        main, samples = results[0], results[1:]
+        if isinstance(main, BaseException):
+            raise main
+
+        variants = [(self.variant_styles[0], main)]
+        for style, texts in zip(styles, samples):
+            if isinstance(texts, BaseException):
+                logger.warning(f"论文 {paper_id} 的 {style} 风格版本生成失败: {str(texts)}")
+                continue
+            variants.extend((style, text) for text in texts)
+        self.variant_results[paper_id] = variants
+        logger.info(f"论文 {paper_id} 生成 {len(variants)}/{self.variants} 个版本")
+        return main
+
+    async def _call_main(self, prompt: str, paper_id: str) -> str:
+        if self.stream_generation:
+            return await self._call_qwen_api_stream(prompt, paper_id)
+        return await self._call_qwen_api(prompt, route='news_generation')
+
+    @staticmethod
+    def _styled_prompt(prompt: str, style: str) -> str:
+        """在输出格式说明之前加入风格要求"""
+        if not VARIANT_STYLES[style]:
+            return prompt
+        instruction = f"风格要求：{VARIANT_STYLES[style]}\n\n            "
+        if "请按照以下格式输出" in prompt:
+            return prompt.replace("请按照以下格式输出", instruction + "请按照以下格式输出", 1)
+        return prompt + "\n" + instruction
+
+    async def _finish_variants(self, paper: Dict[str, Any], content: str, repairs: List[Dict[str, Any]],
+                               source_text: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        整理多版本结果：主版本使用已校验的内容，其余版本去掉所选章节行后并发校验/补写
+
+        Returns:
+            [{"style": 风格, "content": 内容, "repairs": 补写记录}]，非多版本模式为空列表
+        """
+        variants = self.variant_results.pop(paper.get('id', 'unknown'), None)
+        if not variants:
+            return []
+        others = [SELECTION_PATTERN.sub('', text, count=1).strip() for _, text in variants[1:]]
+        checked = await asyncio.gather(*[self._validate_and_repair(paper, text, 'full_text', source_text)
+                                         for text in others if text])
+        styles = [style for (style, _), text in zip(variants[1:], others) if text]
+        return [{'style': variants[0][0], 'content': content, 'repairs': repairs}] + [
+            {'style': style, 'content': text, 'repairs': variant_repairs}
+            for style, (text, variant_repairs) in zip(styles, checked)
+        ]
+
+    async def _validate_and_repair(self, paper: Dict[str, Any], content: str, content_source: str,
+                                   source_text: Optional[str] = None):
+        """
+        校验生成结果，不合格的部分用补写提示词单独重新生成（各部分并发，各补写一次）
+
+        Args:
+            source_text: 生成时使用的正文章节；content_source 为 full_text 而没有正文时，
+                【】标注问题无法引用原句，不补写（记为未解决）
+
+        Returns:
+            (资讯内容, 补写记录列表)；补写后仍不合格的部分保留原内容（缺失的部分接受补写结果）
+        """
+        if not self.validate_output:
+            return content, []
+        paper_id = paper.get('id', 'unknown')
+        require_markers = paper.get('paper_type', 'method') != 'survey' or content_source == 'abstract'
+        self.repair_stats['validated'] += 1
+        issues = self.content_validator.validate(content, content_source, require_markers)
+        if not issues:
+            self.repair_stats['passed'] += 1
+            return content, []
+
+        logger.warning(f"论文 {paper_id} 生成结果不合格: " + "；".join(f"{issue['part']} {issue['message']}" for issue in issues))
+        parsed = self.content_validator.parse(content)
+        values = await asyncio.gather(*[
+            self._repair_part(paper, content, issue, content_source, require_markers, source_text)
+            for issue in issues
+        ])
+        repairs = []
+        for issue, value in zip(issues, values):
+            remaining = None if value is None else self.content_validator.check_part(
+                issue['part'], value, content_source, require_markers)
+            accepted = value is not None and (remaining is None or issue['reason'] == 'missing')
+            if accepted:
+                parsed[PARSED_KEYS[issue['part']]] = value
+                if self.on_section:
+                    self.on_section(paper_id, issue['part'], value)
+            self.repair_stats['repaired' if accepted and remaining is None else 'unresolved'] += 1
+            repairs.append({**issue, 'repaired': accepted, 'remaining': remaining and remaining['message']})
+            logger.info(f"论文 {paper_id} 补写「{issue['part']}」{'成功' if accepted and remaining is None else '未完全解决'}")
+
+        if not any(repair['repaired'] for repair in repairs):
+            return content, repairs
+        return render_content(parsed), repairs
+
+    async def _repair_part(self, paper: Dict[str, Any], content: str, issue: Dict[str, str],
+                           content_source: str, require_markers: bool, source_text: Optional[str] = None):
+        """用简短提示词重新生成单个部分，失败或无法补写时返回None"""
+        part = issue['part']
+        # 摘要草稿的原句来自摘要本身；正文生成的结果没有正文章节时无从引用原句，不补写标注
+        has_source = content_source == 'abstract' or bool(source_text)
+        if issue['reason'] == 'markers' and not has_source:
+            logger.info(f"论文 {paper.get('id', 'unknown')} 缺少正文章节，跳过「{part}」的【】标注补写")
+            return None
+        source = ""
+        if part == '详细内容总结' and source_text:
+            source = f"正文章节（生成时使用的节选）：\n{source_text}"
+        requirement = REPAIR_REQUIREMENTS[part].format(length=SUMMARY_LENGTH_REQUIREMENTS.get(content_source, '450–600'))
+        prompt = self.content_repair_prompt_template.format(
+            part=part,
+            problem=issue['message'],
+            requirement=requirement,
+            marker_requirement=("" if not (require_markers and part == '详细内容总结') else
+                                "所有提具体数值需要用【】标注摘要或正文章节中的原句。" if source else
+                                "所有提具体数值需要用【】标注原句。"),
+            title=paper.get('title', ''),
+            summary=paper.get('summary', ''),
+            source=source,
+            content=content,
+        )
+        try:
+            response = await self.llm_client.call(prompt, route='news_repair', max_tokens=REPAIR_MAX_TOKENS.get(part, 300),
+                                                  temperature=0.3)
+        except Exception as e:
+            logger.warning(f"论文 {paper.get('id', 'unknown')} 补写「{part}」失败: {str(e)}")
+            return None
+
+        response = response.strip()
+        value = self.content_validator.parse(response)[PARSED_KEYS[part]]
+        if value in ('NOT_PROVIDED', []) and not StreamingContentParser.HEADER_PATTERN.search(response):
+            # 模型未输出部分名时整段作为该部分内容
+            value = StreamingContentParser._split_items(response) if part in ('备选标题', '话题标签') else response
+        return value if value not in ('NOT_PROVIDED', '', []) else None
+
+    async def generate_news_batch(self, papers: List[Dict[str, Any]], max_concurrency: int = 4,
+                                  paper_timeout: Optional[float] = 600.0, fast: bool = False) -> List[Dict[str, Any]]:
+        """
+        并发生成多篇论文的资讯内容
+        
+        Args:
+            papers: 论文列表
+            max_concurrency: 同时处理的论文数上限（API限流由密钥池控制）
+            paper_timeout: 单篇论文的超时时间（秒），None表示不限时
+            fast: 只依据摘要等元数据生成草稿（generate_news_fast）
+        
+        Returns:
+            与papers顺序一致的资讯列表，失败或超时的论文 content 为 None
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        finished = 0
+
+        async def _generate(paper: Dict[str, Any]) -> Dict[str, Any]:
+            nonlocal finished
+            paper_id = paper.get('id', 'unknown')
+            async with semaphore:
+                logger.info(f"生成论文 {paper_id} 的资讯内容")
+                try:
+                    generate = self.generate_news_fast if fast else self.generate_news
+                    news = await asyncio.wait_for(generate(paper), timeout=paper_timeout)
+                except asyncio.TimeoutError:
+                    logger.warning(f"论文 {paper_id} 资讯生成超过 {paper_timeout} 秒，已放弃")
+                    news = {'content': None, 'timeout': True}
+            finished += 1
+            logger.info(f"资讯生成进度: {finished}/{len(papers)}")
+            return news if news is not None else {'content': None}
+
+        return await asyncio.gather(*[_generate(paper) for paper in papers])
     
+    async def parse_paper_structure(self, paper: Dict[str, Any]) -> dict:
+        """
+        按 structure_sources 的顺序尝试各正文来源，返回第一个解析出章节的结果
+
+        Args:
+            paper: 论文信息字典（需含 links）
+
+        Returns:
+            论文数据结构，所有来源均失败时章节为空
+        """
+        parsers = {
+            'html': self.parse_arxiv_html_stream,
+            'latex': self.parse_arxiv_eprint,
+            'pdf': self.parse_arxiv_pdf,
+        }
+        paper_structured = {"title": None, "sections": []}
+        for source in self.structure_sources:
+            url = paper['links'].get(STRUCTURE_SOURCE_LINKS[source])
+            if not url:
+                continue
+            paper_structured = await parsers[source](url)
+            if paper_structured["sections"]:
+                self.structure_source_counts[source] += 1
+                if source != self.structure_sources[0]:
+                    logger.info(f"论文 {paper.get('id', 'unknown')} 使用 {source} 来源提取正文")
+                break
+        return paper_structured
+
     async def parse_arxiv_html_stream(self, url: str) -> dict:
         """
         流式解析arXiv HTML内容
@@ -147,29 +597,127 @@ class ContentGenerator:
             "sections": []
         }
         
-        # 收集所有HTML内容
-        html_content = ""
-        async for chunk in self.fetch_arxiv_html_stream(url):
-            html_content += chunk
-        
-        # 使用BeautifulSoup解析完整的HTML
-        soup = BeautifulSoup(html_content, "html.parser")
-        
-        # 标题
-        title_tag = soup.find("h1", class_="ltx_title")
-        if title_tag:
-            html_paper["title"] = title_tag.get_text(" ", strip=True)
+        # 同一arXiv版本的内容不会变化，带版本号时直接复用已解析的章节树
+        cache_key, versioned = ArxivHTMLCache.cache_key(url)
+        if versioned:
+            cached = self.paper_cache.get(cache_key)
+            if cached is not None:
+                return cached
 
-        # 章节递归解析
+        # 收集完整HTML字节（一次性拼接，由解析器统一解码）
+        html_bytes = await self.fetch_arxiv_html(url)
+        if not html_bytes:
+            return html_paper
 
-        html_paper["sections"] = self.parse_arxiv_by_headings(
-                soup,
-                content_root_selector=("article", {"class": "ltx_document"})
-            )
-        
+        # 解析与章节树构建是CPU密集操作，交给进程池，只传回紧凑的章节树
+        html_paper = await self._run_parse(parse_arxiv_html_bytes, html_bytes)
+
+        if versioned and html_paper["sections"]:
+            self.paper_cache.put(cache_key, html_paper)
         return html_paper
 
-    def _new_section(self, title=None):
+    async def parse_arxiv_pdf(self, url: str) -> dict:
+        """
+        从arXiv PDF提取论文数据结构（HTML不可用时的后备）
+
+        Args:
+            url: arXiv PDF URL
+
+        Returns:
+            与 parse_arxiv_html_stream 相同结构的论文数据
+        """
+        # PDF结构与HTML结构分开缓存，之后HTML可用时仍优先使用HTML
+        cache_key, versioned = ArxivHTMLCache.cache_key(url)
+        cache_key += "_pdf"
+        if versioned:
+            cached = self.paper_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        pdf_bytes = await self.pdf_cache.get(url)
+        if not pdf_bytes:
+            return {"title": None, "sections": []}
+
+        try:
+            page_count = count_pdf_pages(pdf_bytes)
+        except Exception as e:
+            logger.warning(f"PDF打开失败 {url}: {str(e)}")
+            return {"title": None, "sections": []}
+
+        # 按页分组并行提取文本行，标题识别与章节树构建在当前进程内完成（需按文档顺序）
+        chunks = await asyncio.gather(*[
+            self._run_parse(extract_pdf_lines, pdf_bytes, start, stop)
+            for start, stop in page_ranges(page_count, max(1, self.parse_workers))
+        ])
+        pages = [page for chunk in chunks for page in chunk]
+
+        pdf_paper = build_pdf_paper(pages)
+        logger.info(f"PDF正文提取完成: {page_count} 页, {len(pdf_paper['sections'])} 个一级章节")
+        if versioned and pdf_paper["sections"]:
+            self.paper_cache.put(cache_key, pdf_paper)
+        return pdf_paper
+
+    async def parse_arxiv_eprint(self, url: str) -> dict:
+        """
+        从arXiv e-print源码包提取论文数据结构
+
+        Args:
+            url: arXiv e-print URL
+
+        Returns:
+            与 parse_arxiv_html_stream 相同结构的论文数据，e-print无LaTeX源码（仅PDF）时章节为空
+        """
+        cache_key, versioned = ArxivHTMLCache.cache_key(url)
+        cache_key += "_latex"
+        if versioned:
+            cached = self.paper_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        eprint_bytes = await self.eprint_cache.get(url)
+        if not eprint_bytes:
+            return {"title": None, "sections": []}
+
+        try:
+            latex_paper = await self._run_parse(parse_eprint_bytes, eprint_bytes)
+        except Exception as e:
+            logger.warning(f"e-print解析失败 {url}: {str(e)}")
+            return {"title": None, "sections": []}
+
+        if versioned and latex_paper["sections"]:
+            self.paper_cache.put(cache_key, latex_paper)
+        return latex_paper
+
+    async def _run_parse(self, func, *args):
+        """在解析进程池中执行解析函数；未启用进程池或进程池异常退出时在当前进程内执行"""
+        pool = self._get_parse_pool()
+        if pool is not None:
+            try:
+                return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+            except BrokenProcessPool:
+                logger.warning("解析进程池异常退出，改为在当前进程内解析")
+                self._parse_pool = None
+        return func(*args)
+
+    def _get_parse_pool(self) -> Optional[ProcessPoolExecutor]:
+        """按需创建HTML/PDF/LaTeX解析进程池"""
+        if self.parse_workers <= 0:
+            return None
+        if self._parse_pool is None:
+            self._parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+            logger.info(f"解析进程池已启动，进程数: {self.parse_workers}")
+        return self._parse_pool
+
+    async def close(self):
+        """取消未完成的预取任务并关闭HTML解析进程池（在线程中等待进程池退出，不阻塞事件循环）"""
+        if self.prefetcher is not None:
+            await self.prefetcher.close()
+        if self._parse_pool is not None:
+            pool, self._parse_pool = self._parse_pool, None
+            await asyncio.get_running_loop().run_in_executor(None, pool.shutdown, True)
+
+    @staticmethod
+    def _new_section(title=None):
         return {
             "title": title,
             "figures": [],
@@ -178,7 +726,8 @@ class ContentGenerator:
         }
 
     
-    def parse_arxiv_by_headings(self, soup: BeautifulSoup, content_root_selector=None):  # 例如 ("div", {"class": "ltx_document"})
+    @staticmethod
+    def parse_arxiv_by_headings(soup: BeautifulSoup, content_root_selector=None):  # 例如 ("div", {"class": "ltx_document"})
         """
         解析 arXiv HTML（无嵌套<section>的情况），基于 h2/h3/h4 构建层级树。
 
@@ -187,187 +736,226 @@ class ContentGenerator:
         - figure.ltx_table  -> 当前层的 tables
         - 跳过 .ltx_abstract 内的内容
         返回: {"sections": [ ...h2-level sections... ]}
+
+        只遍历一次DOM：摘要/figure上下文随遍历栈传递，不再对每个节点回溯祖先；
+        最大标题层级在同一次遍历中统计，遍历结束后再按层级组装章节树
         """
-        # 选择解析根节点 未指定回退到默认根节点
-        if content_root_selector:
-            nodes = soup.find_all(*content_root_selector) if isinstance(content_root_selector, tuple) else soup.select(content_root_selector)
-            root = None
-            for node in nodes:
-                # 跳过警告框
-                if "package-alerts" in node.get("class", []):
-                    continue
-                root = node
-                break
-            if root is None:
-                root = soup.body or soup
-        else:
-            # 优先正文 <article>，再兜底
-            root = (
-                soup.select_one("article.ltx_document")
-                or soup.select_one("div.ltx_document:not(.package-alerts)")
-                or soup.select_one("main")
-                or soup.body
-                or soup
-                )   
+        root = ContentGenerator._select_content_root(soup, content_root_selector)
+        max_heading_level, blocks = ContentGenerator._scan_blocks(soup, root)
+        level_of = {f"h{i}": i for i in range(2, max_heading_level + 1)}  # {"h2":2, "h3":3, "h4":4}
 
         # 用“虚拟根”承载最上层 sections
-        virtual_root = self._new_section(title=None)
+        virtual_root = ContentGenerator._new_section(title=None)
         paper = virtual_root["subsections"]
 
-        # 层级映射
-        max_heading_level = self.find_max_heading_level(soup)
-        heading_tags = [f"h{i}" for i in range(2, max_heading_level + 1)]
-        level_of = {tag: int(tag[1]) for tag in heading_tags}  # {"h2":2, "h3":3, "h4":4}
-
         # 栈：[(level, section_dict)]，初始化用虚拟根 level=1
         stack = [(1, virtual_root)]
 
-        def in_abstract(node):
-            return node.find_parent(class_="ltx_abstract") is not None
-
-        # 顺序遍历：只拿我们关心的“块级节点”，避免抓到 figcaption 内的 p
-        blocks = root.find_all(list(heading_tags) + ["p", "figure"], recursive=True)
-
         for node in blocks:
-            # 跳过摘要
-            if in_abstract(node):
-                continue
-            # 避免抓到 figure 内部的 p（只保留 figure 自身）
-            if node.name == "p" and node.find_parent("figure") is not None:
-                continue
+            name = node.name
 
-            # 处理标题：开新层
-            if node.name in heading_tags:
+            # 处理标题：开新层（超过最大层级的标题不参与分层）
+            if name[0] == "h":
+                level = level_of.get(name)
+                if level is None:
+                    continue
                 title = node.get_text(" ", strip=True)
-                level = level_of[node.name]
 
                 # 退栈到比当前 level 小的层
-                while stack and stack[-1][0] >= level:
+                while stack[-1][0] >= level:
                     stack.pop()
 
-                parent_level, parent_sec = stack[-1]
-                new_sec = self._new_section(title=title)
+                parent_sec = stack[-1][1]
+                new_sec = ContentGenerator._new_section(title=title)
                 parent_sec["subsections"].append(new_sec)
                 stack.append((level, new_sec))
                 continue
 
             # 确定当前层（如果还没遇到任何标题，则挂到虚拟根）
-            _, cur_sec = stack[-1]
+            cur_sec = stack[-1][1]
 
             # 段落
-            if node.name == "p":
-                text = node.get_text(" ", strip=True)
-                # 移除参考文献标记，如 [3], [72, 33] 等
-                text = re.sub(r'\[\s*\d+(?:\s*,\s*\d+)*\s*\]', '', text)
-                # 清理可能产生的多余空格
-                text = re.sub(r'\s+', ' ', text).strip()
+            if name == "p":
+                text = ContentGenerator._clean_paragraph_text(node.get_text(" ", strip=True))
                 if text:
                     cur_sec["subsections"].append({"text": text})
                 continue
 
             # 图片 or 表格（按 class 判断）
-            if node.name == "figure":
-                classes = set(node.get("class", []))
-                # 表格
-                if "ltx_table" in classes:
-                    caption_tag = node.find("figcaption")
-                    table_info = {
-                        "id": node.get("id"),
-                        "caption": caption_tag.get_text(" ", strip=True) if caption_tag else None,
-                        "content": node.get_text(" ", strip=True),
-                    }
-                    cur_sec["tables"].append(table_info)
-                    continue
+            classes = node.get("class") or ()
+            # 表格
+            if "ltx_table" in classes:
+                caption_tag = node.find("figcaption")
+                cur_sec["tables"].append({
+                    "id": node.get("id"),
+                    "caption": caption_tag.get_text(" ", strip=True) if caption_tag else None,
+                    "content": node.get_text(" ", strip=True),
+                })
+            # 图片
+            elif "ltx_figure" in classes or "ltx_graphics" in classes:
+                cur_sec["figures"].extend(ContentGenerator._extract_figure_images(node))
+            # 其它不识别的 figure，忽略
+
+        return paper
 
-                # 图片
-                if "ltx_figure" in classes or "ltx_graphics" in classes:
-                    caption_spans = node.find_all("span", class_='ltx_caption')
-                    for idx, img in enumerate(node.find_all("img")):
-                        caption = node.find("figcaption")
-                        if caption:
-                            caption = caption.get_text(" ", strip=True)
-                        else:
-                            # 检查是否有足够的caption span
-                            if idx < len(caption_spans):
-                                caption = caption_spans[idx].get_text(" ", strip=True)
-                            else:
-                                caption = ""  # 如果没有对应的caption，使用空字符串
-                        img_info = {
-                            "id": img.get("id"),
-                            "url": img.get("src") if img else None,
-                            "caption": caption
-                        }    
-                        cur_sec["figures"].append(img_info)
+    @staticmethod
+    def _select_content_root(soup: BeautifulSoup, content_root_selector=None):
+        """选择解析根节点，未指定时回退到默认根节点"""
+        if content_root_selector:
+            nodes = soup.find_all(*content_root_selector) if isinstance(content_root_selector, tuple) else soup.select(content_root_selector)
+            for node in nodes:
+                # 跳过警告框
+                if "package-alerts" in node.get("class", []):
                     continue
+                return node
+            return soup.body or soup
 
-                # 其它不识别的 figure，忽略
-                continue
+        # 优先正文 <article>，再兜底
+        return (
+            soup.select_one("article.ltx_document")
+            or soup.select_one("div.ltx_document:not(.package-alerts)")
+            or soup.select_one("main")
+            or soup.body
+            or soup
+        )
 
-        return paper
+    @staticmethod
+    def _scan_blocks(soup: BeautifulSoup, root):
+        """
+        单次深度优先遍历，按文档顺序收集根节点下的标题、段落和figure
 
-    def find_max_heading_level(self, soup):
+        - 摘要(.ltx_abstract)内的节点全部跳过
+        - figure 内部的 p 跳过（只保留 figure 自身），嵌套的 figure 仍逐个收集
+        - 同时统计 section.ltx_section 内出现的最大标题层级
+
+        Returns:
+            (最大标题层级, 块级节点列表)
+        """
+        max_level = 0
+        blocks = []
+
+        # 栈元素：(节点, 是否在摘要内, 是否在figure内, 是否在ltx_section内, 是否在根节点下)
+        stack = [(soup, False, False, False, soup is root)]
+        while stack:
+            node, in_abstract, in_figure, in_section, in_root = stack.pop()
+            name = node.name
+
+            if in_root and not in_abstract:
+                if name == "p":
+                    if not in_figure:
+                        blocks.append(node)
+                elif name == "figure":
+                    blocks.append(node)
+
+            if len(name) == 2 and name[0] == "h" and name[1] in "123456":
+                if in_section and int(name[1]) > max_level:
+                    max_level = int(name[1])
+                if in_root and not in_abstract and name != "h1":
+                    blocks.append(node)
+
+            classes = node.get("class") or ()
+            child_state = (
+                in_abstract or "ltx_abstract" in classes,
+                in_figure or name == "figure",
+                in_section or (name == "section" and "ltx_section" in classes),
+                in_root or node is root,
+            )
+            for child in reversed(node.contents):
+                if isinstance(child, Tag):
+                    stack.append((child, *child_state))
+
+        return max_level, blocks
+
+    @staticmethod
+    def _clean_paragraph_text(text: str) -> str:
+        """移除参考文献标记（如 [3], [72, 33]）并清理多余空格"""
+        text = CITATION_PATTERN.sub('', text)
+        return WHITESPACE_PATTERN.sub(' ', text).strip()
+
+    @staticmethod
+    def _extract_figure_images(node) -> List[Dict[str, Any]]:
+        """提取 figure 内每张图片的id、url与caption"""
+        images = node.find_all("img")
+        if not images:
+            return []
+        caption = node.find("figcaption")
+        caption_text = caption.get_text(" ", strip=True) if caption else None
+        caption_spans = node.find_all("span", class_='ltx_caption') if caption is None else []
+
+        figures = []
+        for idx, img in enumerate(images):
+            if caption_text is not None:
+                img_caption = caption_text
+            elif idx < len(caption_spans):
+                img_caption = caption_spans[idx].get_text(" ", strip=True)
+            else:
+                img_caption = ""  # 如果没有对应的caption，使用空字符串
+            figures.append({
+                "id": img.get("id"),
+                "url": img.get("src"),
+                "caption": img_caption
+            })
+        return figures
+
+    @staticmethod
+    def find_max_heading_level(soup):
         """
         在论文正文中寻找出现的最大 h 标签层级（h1-h6）。
-        返回如 'h4'，如果没有找到任何 h 标签，则返回 None。
+        返回如 4，如果没有找到任何 h 标签，则返回 0。
         
         Args:
             soup: BeautifulSoup对象，已经解析好的HTML
         """
-        max_level = 0
-
+        return ContentGenerator._scan_blocks(soup, None)[0]
 
-        for section in soup.find_all("section", class_="ltx_section"):
-            for tag in section.find_all(re.compile(r'^h[1-6]$')):
-                level = int(tag.name[1])  # 取数字部分
-                if level > max_level:
-                    max_level = level
-                    # max_tag = tag.name
-        return max_level
-
-    async def fetch_arxiv_html_stream(self, url: str, chunk_size: int = 8192) -> AsyncGenerator[str, None]:
+    async def fetch_arxiv_html(self, url: str) -> bytes:
         """
-        使用httpx库流式读取arXiv HTML内容
+        获取完整的arXiv HTML字节内容（经磁盘缓存，同一版本只下载一次）
         
         Args:
             url: arXiv HTML页面URL
-            chunk_size: 每次读取的字节块大小
         
-        Yields:
-            解码后的HTML文本块
+        Returns:
+            HTML字节内容，失败时返回空字节串
         """
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                async with client.stream('GET', url) as response:
-                    response.raise_for_status()
-                    
-                    buffer = ""
-                    async for chunk in response.aiter_bytes(chunk_size=chunk_size):
-                        try:
-                            # 解码字节块并添加到缓冲区
-                            chunk_text = chunk.decode('utf-8', errors='ignore')
-                            buffer += chunk_text
-                            
-                            # 当缓冲区达到一定大小时，yield出去
-                            if len(buffer) >= chunk_size:
-                                yield buffer
-                                buffer = ""
-                        
-                        except UnicodeDecodeError as e:
-                            logger.warning(f"解码错误: {e}")
-                            continue
-                    
-                    # 返回剩余的缓冲区内容
-                    if buffer:
-                        yield buffer
-                        
+            return await self.html_cache.get(url)
         except Exception as e:
             import traceback
             error_details = traceback.format_exc()
-            logger.error(f"流式读取HTML内容失败: {str(e)}")
+            logger.error(f"读取HTML内容失败: {str(e)}")
             logger.error(f"URL: {url}")
             logger.error(f"详细错误信息:\n{error_details}")
+            return b""
+
+    async def fetch_arxiv_html_stream(self, url: str, chunk_size: int = 8192) -> AsyncGenerator[str, None]:
+        """
+        分块读取arXiv HTML内容（经磁盘缓存）
+        
+        Args:
+            url: arXiv HTML页面URL
+            chunk_size: 每次读取的字节块大小
+        
+        Yields:
+            解码后的HTML文本块
+        """
+        html_bytes = await self.fetch_arxiv_html(url)
+        if not html_bytes:
             # 返回空字符串，避免后续处理出错
             yield ""
+            return
+        
+        # 增量解码器会保留跨块边界的多字节字符，避免截断的中文/符号被丢弃
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        for start in range(0, len(html_bytes), chunk_size):
+            text = decoder.decode(html_bytes[start:start + chunk_size])
+            if text:
+                yield text
+        
+        # 返回解码器中剩余的内容
+        text = decoder.decode(b"", final=True)
+        if text:
+            yield text
 
     async def _generate_content_method(self, paper: Dict[str, Any], paper_structured: Dict[str, Any]) -> str:
         """生成正文内容"""
@@ -382,7 +970,8 @@ class ContentGenerator:
             
             while try_count < 3:
                 try_count += 1
-                method_keywords = await self.detect_section_keywords(paper_structured)
+                # 首次尝试优先使用签名备忘录和本地规则，取不到内容时改用LLM重新检测
+                method_keywords = await self.detect_section_keywords(paper_structured, use_rules=try_count == 1)
                 if method_keywords is None:
                     continue
                 
@@ -419,10 +1008,30 @@ class ContentGenerator:
                         if method_content == "":
                             logger.warning(f"第{try_count}次检测，method章节内容提取失败")
             
+            # LLM检测的路径提取成功后记入备忘录，结构相同的论文不再调用LLM
+            if (method_keywords and method_keywords.get('source') == 'llm'
+                    and introduction_content != "" and method_content != "" and conclusion_content != ""):
+                self.section_memo.store(paper_structured.get('sections', []), method_keywords)
+            
             # 如果三次尝试后仍不满足条件，返回空字符串
             if introduction_content == "" or conclusion_content == "":
                 logger.error("经过3次尝试，章节内容均提取失败，不继续处理")
                 return ""
+
+            # 按token配额裁剪章节，保留开头段落和含数字的句子
+            budgeted, budget_report = self.prompt_budgeter.apply({
+                'introduction': introduction_content,
+                'method': method_content,
+                'conclusion': conclusion_content,
+            })
+            introduction_content = budgeted['introduction']
+            method_content = budgeted['method']
+            conclusion_content = budgeted['conclusion']
+            self.prompt_budget_reports[paper.get('id', 'unknown')] = budget_report
+            self.repair_sources[paper.get('id', 'unknown')] = (
+                f"引言：{introduction_content}\n\n方法：{method_content}\n\n结论：{conclusion_content}")
+            logger.info(f"论文 {paper.get('id', 'unknown')} 章节输入估算 {budget_report['original_tokens']} tokens，"
+                        f"裁剪后 {budget_report['trimmed_tokens']} tokens，节省 {budget_report['saved_tokens']} tokens")
             
             if paper_type == 'method':
                 prompt_method = self.content_prompt_template_method.format(
@@ -445,11 +1054,14 @@ class ContentGenerator:
                     conclusion=conclusion_content,
                 )
             
-            response = await self._call_qwen_api(prompt_method)
+            response = await self._generate_from_prompt(prompt_method, paper.get('id', 'unknown'))
             content = response.strip()
             
             return content
-            
+
+        except CircuitOpenError:
+            raise
+
         except Exception as e:
             import traceback
             error_details = traceback.format_exc()
@@ -457,9 +1069,121 @@ class ContentGenerator:
             logger.error(f"详细错误信息:\n{error_details}")
             return ""
 
-    
+    async def _generate_content_single_call(self, paper: Dict[str, Any], paper_structured: Dict[str, Any]) -> str:
+        """
+        单次调用生成：章节标题与各章节摘录放入同一提示词，由模型选取方法/结论章节并直接生成资讯，
+        省去章节检测这一轮LLM调用
+        """
+        paper_id = paper.get('id', 'unknown')
+        try:
+            index = self._get_section_index(paper_structured)
+            intro_index = index.find_path('introduction')
+            introduction_content = index.text(intro_index) if intro_index is not None else ""
+            if introduction_content == "":
+                logger.error("introduction章节内容提取失败，不继续处理")
+                return ""
+
+            budgeted, budget_report = self.prompt_budgeter.apply({'introduction': introduction_content})
+            excerpts, excerpt_report = self._build_section_excerpts(index)
+            if not excerpts:
+                logger.error("未找到可供选取的章节，不继续处理")
+                return ""
+            for key in ('original_tokens', 'trimmed_tokens'):
+                budget_report[key] += excerpt_report[key]
+            budget_report['saved_tokens'] = budget_report['original_tokens'] - budget_report['trimmed_tokens']
+            budget_report['sections']['excerpts'] = excerpt_report
+            self.prompt_budget_reports[paper_id] = budget_report
+            self.repair_sources[paper_id] = f"引言：{budgeted['introduction']}\n\n章节摘录：\n{excerpts}"
+            logger.info(f"论文 {paper_id} 单次调用输入估算 {budget_report['original_tokens']} tokens，"
+                        f"裁剪后 {budget_report['trimmed_tokens']} tokens（{excerpt_report['sections']} 个章节摘录）")
+
+            template = (self.content_prompt_template_survey if paper.get('paper_type', 'method') == 'survey'
+                        else self.content_prompt_template_method)
+            prompt = template.format(
+                title=paper.get('title', ''),
+                authors=', '.join(paper.get('authors', [])),
+                summary=paper.get('summary', ''),
+                categories=', '.join(paper.get('categories', [])),
+                introduction=budgeted['introduction'],
+                method="（请从下方章节摘录中选取方法概述相关章节）",
+                conclusion="（请从下方章节摘录中选取结论章节，无结论时选取讨论/总结章节）",
+            )
+            prompt = prompt.replace("请按照以下格式输出：", f"""章节摘录（按论文顺序，缩进表示子章节，每节为节选）：
+{excerpts}
+
+            请先从章节摘录中选出方法概述章节和结论章节，方法与结论部分只能依据所选章节的摘录撰写。
+
+            请按照以下格式输出（第一行写明所选章节）：
+            选用章节：[方法章节标题] | [结论章节标题]
+""", 1)
+
+            response = await self._generate_from_prompt(prompt, paper_id)
+
+            # 取出首行的所选章节，其余为与两步模式相同格式的资讯内容
+            selection = SELECTION_PATTERN.search(response)
+            if selection:
+                self.single_call_selections[paper_id] = selection.group(1).strip()
+                logger.info(f"论文 {paper_id} 模型选用章节: {self.single_call_selections[paper_id]}")
+                response = SELECTION_PATTERN.sub('', response, count=1)
+            return response.strip()
+
+        except CircuitOpenError:
+            raise
+
+        except Exception as e:
+            import traceback
+            error_details = traceback.format_exc()
+            logger.error(f"单次调用生成正文内容失败: {str(e)}")
+            logger.error(f"详细错误信息:\n{error_details}")
+            return ""
+
+    def _build_section_excerpts(self, index: SectionIndex, max_depth: int = 2):
+        """
+        生成章节标题列表及每节摘录（保留开头与含数字的句子）
+
+        Returns:
+            (摘录文本, 统计)
+        """
+        candidates = [i for i in range(len(index))
+                      if index.labels[i] and index.depths[i] <= max_depth
+                      and not any(EXCERPT_SKIP_PATTERN.search(index.titles[j]) for j in [i] + self._ancestors(index, i))]
+        with_text = [i for i in candidates if index.text(i)]
+        per_section = max(60, self.single_call_excerpt_budget // max(1, len(with_text)))
+
+        lines = []
+        original_tokens = trimmed_tokens = 0
+        for i in candidates:
+            indent = "  " * index.depths[i]
+            text = index.text(i)
+            if not text:
+                lines.append(f"{indent}- {index.labels[i]}")
+                continue
+            excerpt = self.prompt_budgeter.trim(text, per_section).replace(PARAGRAPH_SEPARATOR, ' ')
+            original_tokens += estimate_tokens(text)
+            trimmed_tokens += estimate_tokens(excerpt)
+            lines.append(f"{indent}- {index.labels[i]}：{excerpt}")
+
+        return "\n".join(lines), {
+            'sections': len(with_text),
+            'budget': self.single_call_excerpt_budget,
+            'original_tokens': original_tokens,
+            'trimmed_tokens': trimmed_tokens,
+        }
+
+    @staticmethod
+    def _ancestors(index: SectionIndex, i: int) -> List[int]:
+        ancestors = []
+        while index.parents[i] != -1:
+            i = index.parents[i]
+            ancestors.append(i)
+        return ancestors
+
     def _find_section_by_keyword(self, sections, keyword):
         keyword = keyword.lower()
+        if isinstance(sections, LazySections):
+            # 缓存读取的章节：先用标题大纲定位一级章节，只解码这一个
+            index = sections.first_match(keyword)
+            return None if index is None else self._find_section_by_keyword([sections[index]], keyword)
         for sec in sections:
             if keyword in sec.get("title", "").lower():
                 return sec
@@ -498,6 +1222,10 @@ class ContentGenerator:
         Returns:
             所有 title 的列表
         """
+        if isinstance(sections, LazySections):
+            # 缓存读取的章节：标题直接取自大纲，无需解码章节内容
+            return sections.titles()
+
         titles = []
         
         for section in sections:
@@ -512,20 +1240,39 @@ class ContentGenerator:
         
         return titles
 
-    async def detect_section_keywords(self, paper_structured: Dict[str, Any]) -> Dict[str, List[str]]:
+    async def detect_section_keywords(self, paper_structured: Dict[str, Any], use_rules: bool = True) -> Dict[str, List[str]]:
         """
-        使用千问 API 自动检测方法章节的关键词路径
+        自动检测方法章节的关键词路径：依次尝试签名备忘录、本地规则，均未命中时使用千问 API
         
         Args:
             paper_structured: 结构化的论文数据，包含 sections
+            use_rules: 是否先尝试签名备忘录与本地规则定位
             
         Returns:
             包含检测结果的列表，格式如 ['WorldDreamer', 'overall framework']
             列表中元素依次表示从根章节到目标章节的查找路径
         """
         try:
-            # 提取所有标题
             sections = paper_structured.get('sections', [])
+
+            if use_rules:
+                remembered = self.section_memo.lookup(sections)
+                if remembered is not None:
+                    logger.info(f"章节结构签名命中备忘录: method={remembered['method']}, conclusion={remembered['conclusion']}")
+                    remembered['source'] = 'memo'
+                    return remembered
+
+                located = self.section_locator.locate(sections, paper_structured.get('title') or '')
+                confident = self.section_locator.is_confident(located)
+                self.section_locator.record(confident)
+                if confident:
+                    logger.info(f"规则定位章节成功（置信度 {located['confidence']:.2f}）: "
+                                f"method={located['method']}, conclusion={located['conclusion']}")
+                    located['source'] = 'rules'
+                    return located
+                logger.info(f"规则定位置信度不足（{located['confidence']:.2f}），使用LLM检测章节")
+
+            # 提取所有标题
             all_titles = self.extract_titles_from_sections(sections)
             
             if not all_titles:
@@ -537,13 +1284,17 @@ class ContentGenerator:
             prompt = self._build_section_detection_prompt(all_titles, paper_structured.get('title', ''))
             
             # 调用千问 API
-            response = await self._call_qwen_api(prompt)
+            response = await self._call_qwen_api(prompt, route='section_detection')
             
             # 解析响应
             result = self._parse_section_detection_response(response)
+            result['source'] = 'llm'
             
             return result
-            
+
+        except CircuitOpenError:
+            raise
+
         except Exception as e:
             logger.error(f"检测章节关键词失败: {e}")
             return None
@@ -640,11 +1391,17 @@ class ContentGenerator:
             章节内容文本
         """
         try:
-            sections = paper_structured.get('sections', [])
-            section = self._find_section_by_keyword_path(sections, *keywords)
+            if "" in keywords:
+                # 空关键词会命中段落节点，索引不收录段落，按原方式遍历
+                section = self._find_section_by_keyword_path(paper_structured.get('sections', []), *keywords)
+                text = self._collect_texts(section) if section else None
+            else:
+                index = self._get_section_index(paper_structured)
+                found = index.find_path(*keywords)
+                text = index.text(found) if found is not None else None
             
-            if section:
-                return self._collect_texts(section)
+            if text is not None:
+                return text
             else:
                 logger.warning(f"未找到关键词对应的章节: {keywords}")
                 return ""
@@ -654,6 +1411,14 @@ class ContentGenerator:
             return ""
 
     
+    def _get_section_index(self, paper_structured: Dict[str, Any]) -> SectionIndex:
+        """章节树只展平一次，索引随结构化论文数据保存"""
+        index = paper_structured.get('section_index')
+        if index is None:
+            index = SectionIndex(paper_structured.get('sections', []))
+            paper_structured['section_index'] = index
+        return index
+
     def _collect_texts(self, sec):
         """
         收集章节及其子章节中的所有 'text' 字段，用 '/n' 连接
@@ -670,38 +1435,69 @@ class ContentGenerator:
             #     texts.append(self._collect_texts(sub))
         return '/n'.join(filter(None, texts))  # 过滤空字符串，避免多余 '/n'
     
-    async def _call_qwen_api(self, prompt: str) -> str:
-        """调用千问API"""
+    async def _call_qwen_api(self, prompt: str, route: str = 'news_generation') -> str:
+        """按调用类型路由调用千问API"""
         try:
-            # 使用异步方式调用千问API
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, 
-                self._sync_call_qwen_api, 
-                prompt
-            )
-            return response
-            
+            return await self.llm_client.call(prompt, route=route, max_tokens=2000, temperature=0.3)
+
         except Exception as e:
             logger.error(f"调用千问API失败: {str(e)}")
             raise e
-    
-    def _sync_call_qwen_api(self, prompt: str) -> str:
-        """同步调用千问API"""
+
+    async def _call_qwen_api_stream(self, prompt: str, paper_id: str, route: str = 'news_generation') -> str:
+        """流式调用千问API，每生成完一个部分即解析，缺少必需部分时提前中止并返回空字符串"""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        def _emit(name, value):
+            # 解析在工作线程中进行，回到事件循环中通知
+            elapsed = loop.time() - start
+            logger.info(f"论文 {paper_id} 的「{name}」部分已生成 ({elapsed:.1f}秒)")
+            if self.on_section:
+                loop.call_soon_threadsafe(self.on_section, paper_id, name, value)
+
+        parser = StreamingContentParser(on_section=_emit)
         try:
-            response = Generation.call(
-                model=self.model,
-                prompt=prompt,
-                api_key=self.api_key,
-                max_tokens=2000,
-                temperature=0.3
-            )
-            
-            if response.status_code == 200:
-                return response.output.text
-            else:
-                raise Exception(f"API调用失败: {response.message}")
-                
+            response = await self.llm_client.stream(prompt, on_delta=parser.feed, route=route, max_tokens=2000, temperature=0.3)
+
         except Exception as e:
-            logger.error(f"千问API调用失败: {str(e)}")
+            logger.error(f"流式调用千问API失败: {str(e)}")
             raise e
+
+        parser.close()
+        if parser.aborted:
+            logger.warning(f"论文 {paper_id} 生成结果缺少必需部分，已提前中止")
+            return ""
+        return response
+
+
+def parse_arxiv_html_bytes(html_bytes: bytes) -> dict:
+    """
+    解析arXiv HTML字节为论文数据结构（进程池工作函数，需定义在模块顶层以便pickle）
+
+    Args:
+        html_bytes: 完整的HTML字节内容
+
+    Returns:
+        {"title": 标题, "sections": 章节树}
+    """
+    html_paper = {
+        "title": None,
+        "sections": []
+    }
+
+    # 使用BeautifulSoup解析正文部分
+    soup = BeautifulSoup(html_bytes, HTML_PARSER, parse_only=ARTICLE_STRAINER, from_encoding="utf-8")
+
+    # 标题
+    title_tag = soup.find("h1", class_="ltx_title")
+    if title_tag:
+        html_paper["title"] = title_tag.get_text(" ", strip=True)
+
+    # 章节递归解析
+    html_paper["sections"] = ContentGenerator.parse_arxiv_by_headings(
+        soup,
+        content_root_selector=("article", {"class": "ltx_document"})
+    )
+
+    return html_paper
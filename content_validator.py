@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+资讯内容校验模块
+生成结束后立即检查 标题/备选标题/详细内容总结/话题标签 四个部分是否齐全、长度是否在范围内、
+具体数值是否用【】标注原句；不合格的部分由 ContentGenerator 用简短的补写提示词单独重新生成，
+不必整篇重跑
+"""
+
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+from output_formatter import StreamingContentParser
+
+REQUIRED_PARTS = ('标题', '备选标题', '详细内容总结', '话题标签')
+PARSED_KEYS = {'标题': 'title', '备选标题': 'alternative_titles', '详细内容总结': 'content_summary', '话题标签': 'tags'}
+
+# 详细内容总结的字数范围（不含空白），在提示词要求的基础上留有余量
+SUMMARY_LENGTH_LIMITS = {
+    'full_text': (360, 800),  # 提示词要求 450–600 字
+    'abstract': (200, 480),  # 提示词要求 250–350 字
+}
+TITLE_MAX_CHARS = 30  # 提示词要求 20 字以内
+ALTERNATIVE_TITLE_RANGE = (2, 8)  # 提示词要求 5 个
+TAG_RANGE = (3, 12)  # 提示词要求 6–8 个
+
+MARKER_PATTERN = re.compile(r'【[^【】]*】')
+# 需要用【】标注的具体数值：百分比、小数、倍数（排除 Qwen2.5、v1.5 等名称中的数字）
+NUMBER_PATTERN = re.compile(r'(?<![A-Za-z0-9.\-])\d+(?:\.\d+)?\s*(?:%|％|倍|x\b|×)|(?<![A-Za-z0-9.\-])\d+\.\d+')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+class ContentValidator:
+    """资讯内容校验器"""
+
+    def __init__(self, summary_limits: Dict[str, Tuple[int, int]] = None, title_max_chars: int = TITLE_MAX_CHARS,
+                 alternative_title_range: Tuple[int, int] = ALTERNATIVE_TITLE_RANGE, tag_range: Tuple[int, int] = TAG_RANGE):
+        self.summary_limits = dict(SUMMARY_LENGTH_LIMITS)
+        if summary_limits:
+            self.summary_limits.update(summary_limits)
+        self.title_max_chars = title_max_chars
+        self.alternative_title_range = alternative_title_range
+        self.tag_range = tag_range
+
+    @staticmethod
+    def parse(content: str) -> Dict[str, Any]:
+        """解析为与 OutputFormatter._parse_single_content 相同结构的结果"""
+        return StreamingContentParser.parse(content)
+
+    def validate(self, content: str, content_source: str = 'full_text', require_markers: bool = True) -> List[Dict[str, str]]:
+        """
+        校验资讯内容
+
+        Args:
+            content: 模型输出的资讯内容
+            content_source: full_text 或 abstract，决定详细内容总结的字数范围
+            require_markers: 是否要求具体数值用【】标注（综述模板不要求）
+
+        Returns:
+            问题列表 [{"part": 部分名, "reason": missing/too_short/too_long/too_few/too_many/markers, "message": 说明}]，
+            合格时为空列表
+        """
+        parsed = self.parse(content)
+        issues = []
+        for part in REQUIRED_PARTS:
+            issue = self.check_part(part, parsed[PARSED_KEYS[part]], content_source, require_markers)
+            if issue:
+                issues.append(issue)
+        return issues
+
+    def check_part(self, part: str, value, content_source: str = 'full_text',
+                   require_markers: bool = True) -> Optional[Dict[str, str]]:
+        """校验单个部分，合格时返回None"""
+        if value in ('NOT_PROVIDED', '', []) or value is None:
+            return _issue(part, 'missing', "缺少该部分")
+
+        if part == '标题':
+            if len(value) > self.title_max_chars:
+                return _issue(part, 'too_long', f"标题 {len(value)} 字，需在20字以内")
+        elif part == '详细内容总结':
+            minimum, maximum = self.summary_limits.get(content_source, self.summary_limits['full_text'])
+            length = len(WHITESPACE_PATTERN.sub('', value))
+            if length < minimum:
+                return _issue(part, 'too_short', f"仅 {length} 字，少于 {minimum} 字")
+            if length > maximum:
+                return _issue(part, 'too_long', f"共 {length} 字，超过 {maximum} 字")
+            if require_markers:
+                unmarked = unmarked_numbers(value)
+                if unmarked:
+                    return _issue(part, 'markers', f"以下数值未用【】标注原句: {', '.join(unmarked[:5])}")
+        else:
+            minimum, maximum = self.alternative_title_range if part == '备选标题' else self.tag_range
+            if len(value) < minimum:
+                return _issue(part, 'too_few', f"仅 {len(value)} 个，少于 {minimum} 个")
+            if len(value) > maximum:
+                return _issue(part, 'too_many', f"共 {len(value)} 个，超过 {maximum} 个")
+        return None
+
+
+def unmarked_numbers(text: str) -> List[str]:
+    """【】之外出现的具体数值"""
+    return [match.group(0).strip() for match in NUMBER_PATTERN.finditer(MARKER_PATTERN.sub('', text))]
+
+
+def render_content(parsed: Dict[str, Any]) -> str:
+    """按生成提示词要求的格式重新拼接各部分"""
+    return (f"标题：{parsed['title']}\n\n"
+            f"备选标题：{', '.join(parsed['alternative_titles'])}\n\n"
+            f"详细内容总结：{parsed['content_summary']}\n\n"
+            f"话题标签：{', '.join(parsed['tags'])}")
+
+
+def _issue(part: str, reason: str, message: str) -> Dict[str, str]:
+    return {'part': part, 'reason': reason, 'message': message}
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+arXiv HTML缓存模块
+按 arXiv id+版本 将HTML页面缓存到磁盘，供内容生成与图片提取共用：
+- 同一版本的页面只下载一次，未带版本号或超过有效期的条目用 ETag/Last-Modified 条件请求重新验证
+- 缓存总大小超过上限时按最近访问时间淘汰
+同样可用于缓存arXiv PDF（另设缓存目录与文件后缀）
+"""
+
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import weakref
+from typing import Dict, Any, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# arxiv.org/html/2512.10950v1 -> ("2512.10950", "v1")
+ARXIV_ID_PATTERN = re.compile(r'(\d{4}\.\d{4,5})(v\d+)?')
+
+
+class ArxivHTMLCache:
+    """arXiv HTML磁盘缓存"""
+
+    def __init__(self, cache_dir: str = "cache/html", max_bytes: int = 512 * 1024 * 1024,
+                 revalidate_after: float = 24 * 3600, timeout: float = 30.0, max_retries: int = 3,
+                 retry_delay: float = 2.0, headers: Dict[str, str] = None, suffix: str = ".html"):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes  # 缓存总大小上限（字节）
+        self.revalidate_after = revalidate_after  # 带版本号的条目超过该时长（秒）后才重新验证
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.headers = headers or {}
+        self.suffix = suffix  # 缓存文件后缀，如 ".html" / ".pdf"
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # {缓存键: asyncio.Lock}，同一页面的并发请求只下载一次；弱引用，无请求持有时条目自动移除
+        self._locks = weakref.WeakValueDictionary()
+        self._evict_lock = asyncio.Lock()  # 淘汰扫描串行执行，避免重复删除与重复计数
+
+        self.stats = {
+            'hits': 0,
+            'revalidated': 0,
+            'misses': 0,
+            'errors': 0,
+            'bytes_downloaded': 0,
+            'evicted': 0,
+        }
+
+    @staticmethod
+    def cache_key(url: str) -> Tuple[str, bool]:
+        """
+        从URL解析缓存键
+
+        Returns:
+            (缓存键, 是否带版本号)
+        """
+        match = ARXIV_ID_PATTERN.search(url)
+        if match:
+            arxiv_id, version = match.groups()
+            return (arxiv_id + version, True) if version else (arxiv_id, False)
+        return hashlib.sha1(url.encode('utf-8')).hexdigest(), False
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, key)
+        return base + self.suffix, base + ".json"
+
+    def _load(self, key: str) -> Tuple[Optional[bytes], Dict[str, Any]]:
+        html_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(html_path, 'rb') as f:
+                return f.read(), meta
+        except (OSError, ValueError):
+            return None, {}
+
+    def _store(self, key: str, content: bytes, meta: Dict[str, Any]):
+        html_path, meta_path = self._paths(key)
+        # 先写临时文件再替换，避免中断时留下半截缓存
+        for path, data, mode in ((html_path, content, 'wb'), (meta_path, meta, 'w')):
+            tmp_path = path + ".tmp"
+            if mode == 'wb':
+                with open(tmp_path, mode) as f:
+                    f.write(data)
+            else:
+                with open(tmp_path, mode, encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+
+    def _touch(self, key: str):
+        """更新访问时间，用于LRU淘汰"""
+        html_path, _ = self._paths(key)
+        try:
+            os.utime(html_path)
+        except OSError:
+            pass
+
+    async def get(self, url: str) -> bytes:
+        """
+        获取页面HTML字节内容，优先读缓存
+
+        Args:
+            url: arXiv HTML页面URL
+
+        Returns:
+            HTML字节内容，失败时返回空字节串
+        """
+        key, versioned = self.cache_key(url)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+        async with lock:
+            # 磁盘读写放到线程中执行，不阻塞事件循环
+            content, meta = await asyncio.to_thread(self._load, key)
+            if content is not None:
+                fresh = versioned and time.time() - meta.get('validated_at', 0) < self.revalidate_after
+                if fresh:
+                    self.stats['hits'] += 1
+                    await asyncio.to_thread(self._touch, key)
+                    logger.debug(f"HTML缓存命中: {key}")
+                    return content
+
+            # 条件请求：服务端返回304时沿用缓存内容
+            conditional = {}
+            if content is not None:
+                if meta.get('etag'):
+                    conditional['If-None-Match'] = meta['etag']
+                if meta.get('last_modified'):
+                    conditional['If-Modified-Since'] = meta['last_modified']
+
+            status, body, headers = await self._fetch(url, conditional)
+            if status == 304 and content is not None:
+                self.stats['revalidated'] += 1
+                meta['validated_at'] = time.time()
+                await asyncio.to_thread(self._store, key, content, meta)
+                logger.debug(f"HTML缓存重新验证通过: {key}")
+                return content
+
+            if status != 200:
+                self.stats['errors'] += 1
+                if content is not None:
+                    logger.warning(f"重新验证 {url} 失败，使用已缓存的内容")
+                    return content
+                return b""
+
+            self.stats['misses'] += 1
+            self.stats['bytes_downloaded'] += len(body)
+            await asyncio.to_thread(self._store, key, body, {
+                'url': url,
+                'etag': headers.get('etag'),
+                'last_modified': headers.get('last-modified'),
+                'size': len(body),
+                'validated_at': time.time(),
+            })
+            async with self._evict_lock:
+                self.stats['evicted'] += await asyncio.to_thread(self._evict)
+            return body
+
+    async def _fetch(self, url: str, conditional: Dict[str, str]) -> Tuple[Optional[int], bytes, Dict[str, str]]:
+        """带重试的下载，返回 (状态码, 内容, 响应头)"""
+        request_headers = {**self.headers, **conditional}
+        for attempt in range(self.max_retries):
+            try:
+                async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True) as client:
+                    async with client.stream('GET', url, headers=request_headers) as response:
+                        if response.status_code in (403, 429, 500, 502, 503, 504):
+                            wait_time = self.retry_delay * (2 ** attempt) + random.uniform(0, 1)
+                            logger.warning(f"请求失败 {url}, 状态码: {response.status_code}, 等待 {wait_time:.1f}秒后重试")
+                            await asyncio.sleep(wait_time)
+                            continue
+                        if response.status_code != 200:
+                            if response.status_code != 304:
+                                logger.warning(f"请求失败 {url}, 状态码: {response.status_code}")
+                            return response.status_code, b"", dict(response.headers)
+
+                        # 写入同一个可变缓冲区，避免反复拼接产生的二次复制
+                        buffer = bytearray()
+                        async for chunk in response.aiter_bytes(chunk_size=65536):
+                            buffer += chunk
+                        return 200, bytes(buffer), dict(response.headers)
+
+            except httpx.TimeoutException:
+                logger.warning(f"请求超时 {url}, 尝试 {attempt + 1}/{self.max_retries}")
+            except httpx.RequestError as e:
+                logger.error(f"请求异常 {url}: {str(e)}")
+            if attempt < self.max_retries - 1:
+                await asyncio.sleep(self.retry_delay)
+
+        return None, b"", {}
+
+    def _evict(self) -> int:
+        """缓存总大小超过上限时，按最近访问时间从旧到新淘汰，返回淘汰的条目数"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.suffix):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name[:-len(self.suffix)]))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return 0
+
+        evicted = 0
+        entries.sort()
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+            evicted += 1
+            logger.info(f"HTML缓存超过上限，淘汰 {key}")
+        return evicted
+
+    def get_stats(self) -> Dict[str, Any]:
+        """缓存命中统计"""
+        requests = self.stats['hits'] + self.stats['revalidated'] + self.stats['misses']
+        return {
+            **self.stats,
+            'hit_rate': round((self.stats['hits'] + self.stats['revalidated']) / requests, 3) if requests else None,
+        }
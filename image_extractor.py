@@ -8,11 +8,12 @@
 
 import os
 import re
+import codecs
 import requests
 import asyncio
 import httpx
 import random
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 import logging
 import sys
@@ -26,16 +27,74 @@ import tempfile
 import fitz  # PyMuPDF
 import urllib.parse
 from tqdm import tqdm
+from html_cache import ArxivHTMLCache
 # from hero_image_selector import HeroImageSelector
 
+# HTTP/2 需要可选依赖 h2（pip install httpx[http2]），未安装时使用HTTP/1.1
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 
 # 初始化日志
 logger = logging.getLogger(__name__)
 
+# 论文页面之外需要探索的链接类型（各保留一个链接）
+CRAWL_URL_TYPES = ('github', 'project')
+
+# 图片链接与超链接正则表达式
+IMG_PATTERN = re.compile(r'<img[^>]+src=["\']([^"\']+)["\'][^>]*>', re.IGNORECASE)
+LINK_PATTERN = re.compile(r'<a[^>]+href=["\']([^"\']+)["\'][^>]*>', re.IGNORECASE)
+
+
+class StreamingLinkScanner:
+    """
+    流式HTML的增量图片/链接扫描器
+    每次只扫描新到达的文本，加上上一块末尾未闭合的标签（从最后一个未闭合的 '<' 开始）；
+    完整的标签只会被扫描一次，每个图片URL/链接URL只输出一次
+    """
+
+    def __init__(self, max_carry: int = 16384):
+        self.max_carry = max_carry  # 未闭合标签的最大长度，超出时丢弃（如脚本中的 '<' 比较运算符）
+        self.carry = ""
+        self.seen_images = set()
+        self.seen_links = set()
+
+    def feed(self, text: str, final: bool = False) -> Tuple[List[str], List[str]]:
+        """
+        输入一段解码后的HTML文本
+
+        Returns:
+            (新出现的图片URL列表, 新出现的链接URL列表)，按文档顺序
+        """
+        text = self.carry + text
+        # 最后一个 '>' 之后若还有 '<'，从该处开始的内容可能是被截断的标签，留到下一块
+        cut = len(text)
+        if not final:
+            last_open = text.rfind('<')
+            if last_open > text.rfind('>'):
+                cut = last_open
+        self.carry = text[cut:] if len(text) - cut <= self.max_carry else ""
+        return (self._new(IMG_PATTERN.findall(text, 0, cut), self.seen_images),
+                self._new(LINK_PATTERN.findall(text, 0, cut), self.seen_links))
+
+    @staticmethod
+    def _new(urls: List[str], seen: set) -> List[str]:
+        fresh = []
+        for url in urls:
+            if url not in seen:
+                seen.add(url)
+                fresh.append(url)
+        return fresh
+
 class ImageExtractor:
     """图片提取器"""
     
-    def __init__(self, output_dir: str = "output"):
+    def __init__(self, output_dir: str = "output", html_cache: ArxivHTMLCache = None, http2: bool = False,
+                 max_connections: int = 20, max_connections_per_host: int = 6, keepalive_expiry: float = 30.0,
+                 max_link_depth: int = 1, crawl_delay: float = 0.5):
         self.output_dir = output_dir
         self.supported_formats = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.svg'}
         
@@ -56,14 +115,64 @@ class ImageExtractor:
         self.max_retries = 3
         self.retry_delay = 2
         
-        # httpx客户端配置
+        # httpx客户端配置：所有请求共用一个连接池（keep-alive），避免每个请求重新建立TCP+TLS连接
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("未安装h2，HTTP/2不可用，使用HTTP/1.1")
         self.client_config = {
             'timeout': self.timeout,
             'follow_redirects': True,
             'verify': True,  # SSL验证
-            'http2': False,   # 禁用HTTP/2避免兼容性问题
+            'http2': http2 and HTTP2_AVAILABLE,  # 默认关闭，部分项目主页的HTTP/2实现有兼容性问题
+            'limits': httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                                   keepalive_expiry=keepalive_expiry),
         }
+        # 每个域名的并发请求数上限（httpx的连接池只有总数限制）
+        self.max_connections_per_host = max_connections_per_host
+        self._host_semaphores = {}
+        self._client = None
+        # GitHub/项目主页的页面备忘录 {url: 任务}：同一页面每次运行只请求、解析一次，
+        # 图片提取与链接发现共用结果
+        self._page_memo = {}
+        self.page_stats = {'fetches': 0, 'reused': 0}
+        # 链接探索：深度限制（0 表示只抓取论文页面中的链接），同一域名页面请求的最小间隔（秒）
+        self.max_link_depth = max_link_depth
+        self.crawl_delay = crawl_delay
+        self._crawl_locks = {}
+        self._crawl_last_request = {}
+
+        # arXiv HTML磁盘缓存，与 ContentGenerator 共用时论文页面只下载一次
+        self.html_cache = html_cache or ArxivHTMLCache(headers=self.headers, timeout=self.timeout,
+                                                       max_retries=self.max_retries, retry_delay=self.retry_delay)
         
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        """关闭共用的HTTP连接池并清空页面备忘录与链接探索状态"""
+        # 信号量绑定在当前事件循环上，关闭后复用时需在新的事件循环中重建
+        self._host_semaphores.clear()
+        self._page_memo.clear()
+        self._crawl_locks.clear()
+        self._crawl_last_request.clear()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """按需创建共用的HTTP客户端（需在事件循环中调用）"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(**self.client_config)
+        return self._client
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return self._host_semaphores[host]
+
     async def extract_images(self, paper: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         从论文中提取图片和表格
@@ -142,6 +251,7 @@ class ImageExtractor:
                 img['extraction_time'] = datetime.now().isoformat()
             
             logger.info(f"论文 {paper_id} 图片提取完成，共 {len(unique_images)} 张")
+            logger.info(f"GitHub/项目页面: 请求 {self.page_stats['fetches']} 次，复用 {self.page_stats['reused']} 次")
             return unique_images
             
         except Exception as e:
@@ -155,24 +265,20 @@ class ImageExtractor:
         # 完整 URL 必须有 scheme（如 https）和 netloc（如 arxiv.org）
         return bool(parsed.scheme) and bool(parsed.netloc)
         
-    def _collect_and_categorize_urls(self, buffer: str, base_url: str, seen_urls: set, url_collector: Dict[str, List], image_collector: List ,paper_id: str) -> None:
+    def _collect_and_categorize_urls(self, img_matches: List[str], link_matches: List[str], base_url: str, seen_urls: set,
+                                     url_collector: Dict[str, List], image_collector: List, paper_id: str) -> None:
         """
-        从HTML buffer中收集和分类URL
+        收集和分类扫描器新发现的URL
         
         Args:
-            buffer: HTML内容buffer
+            img_matches: 新发现的图片URL
+            link_matches: 新发现的链接URL
             base_url: 基础URL
             seen_urls: 已见过的URL集合
             url_collector: URL收集器字典
             paper_id: 论文ID
         """
-        # 图片链接正则表达式
-        img_pattern = re.compile(r'<img[^>]+src=["\']([^"\']+)["\'][^>]*>', re.IGNORECASE)
-        # 链接正则表达式
-        link_pattern = re.compile(r'<a[^>]+href=["\']([^"\']+)["\'][^>]*>', re.IGNORECASE)
-        
         # 收集图片
-        img_matches = img_pattern.findall(buffer)
         for img_url in img_matches:
             if img_url not in seen_urls and self._is_valid_image_url(img_url):
                 seen_urls.add(img_url)
@@ -184,7 +290,6 @@ class ImageExtractor:
                 })
         
         # 收集链接
-        link_matches = link_pattern.findall(buffer)
         for link_url in link_matches:
             # 过滤掉包含论文ID的URL
             if paper_id in link_url or 'LaTeX' in link_url or not self.is_absolute_url(link_url) or 'arxiv' in link_url:
@@ -220,92 +325,95 @@ class ImageExtractor:
     
     async def _process_additional_links(self, url_collector: Dict[str, List], image_collector: List, paper: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
-        处理其他类型链接，获取配图候选
+        并发探索GitHub/项目主页链接，获取配图候选
+
+        两类链接的页面同时请求，页面中新发现的链接立即加入抓取队列；按URL去重，
+        从论文页面中的链接起最多向外发现 max_link_depth 层，同一域名的页面请求间隔至少 crawl_delay 秒
         
         Args:
             url_collector: URL收集器
+            image_collector: 图片收集器
             paper: 论文信息
             
         Returns:
-            额外的图片列表
+            加入额外图片后的图片列表
         """
-        
-        
-        # 当url_collector状态为false时不断循环处理
-        while not url_collector['state']:
-            # 处理GitHub链接
-            waiting_url_types = ['github', 'project']   
-            for url_type in waiting_url_types:
-                if url_collector[url_type].get('url', None) and not url_collector[url_type].get('check', False):
-                    logger.info(f"处理{url_type}链接 {url_collector[url_type]['url']}")
-                    try:
-                        image_collector, url_collector = await self._process_and_update_collector(image_collector, url_collector, paper, url_type)
-                    except Exception as e:
-                        url_collector[url_type]['check'] = True
-                        logger.error(f"{url_type}链接处理失败: {str(e)}")
-                        # url_collector[url_type].update({'url':None, 'check':True})
-                        
-            if all(url_collector[url_type]['check'] for url_type in waiting_url_types):
-                url_collector['state'] = True
-                logger.info("所有链接处理完成")
-                
-           
-            # 短暂等待避免过度占用CPU
-            await asyncio.sleep(0.1)
+        crawled_urls = set()
+        scheduled = []  # 按调度顺序合并各页面的图片
+        depths = {}  # {任务: (链接类型, 深度)}
+
+        def _schedule(url_type: str, depth: int) -> Optional[asyncio.Future]:
+            url = url_collector[url_type].get('url')
+            if not url or url_collector[url_type].get('check') or url in crawled_urls:
+                return None
+            crawled_urls.add(url)
+            logger.info(f"处理{url_type}链接 {url}（深度 {depth}）")
+            task = asyncio.ensure_future(self._crawl_link(url_collector, paper, url_type, depth))
+            scheduled.append(task)
+            depths[task] = (url_type, depth)
+            return task
+
+        pending = {task for task in (_schedule(url_type, 0) for url_type in CRAWL_URL_TYPES) if task}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                url_type, depth = depths[task]
+                _, discovered_types = task.result()
+                for target_type in discovered_types:
+                    logger.info(f"从{url_type}页面更新{target_type}链接: {url_collector[target_type]['url']}")
+                    task = _schedule(target_type, depth + 1)
+                    if task:
+                        pending.add(task)
+        logger.info("所有链接处理完成")
+
+        for task in scheduled:
+            image_collector.extend(task.result()[0])
+        for url_type in CRAWL_URL_TYPES:
+            if not url_collector[url_type].get('url'):
+                url_collector[url_type].update({'url': None, 'check': True})
 
         paper['links'].update({'github':url_collector['github']['url'], 'project':url_collector['project']['url']})
         return image_collector 
 
-    async def _process_and_update_collector(self, image_collector: List, url_collector:Dict[str,List], paper: Dict[str, Any], url_type: str):
-        """处理并更新图像收集器和url收集器"""
-    
+    async def _crawl_link(self, url_collector: Dict[str, List], paper: Dict[str, Any], url_type: str,
+                          depth: int) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        抓取一个链接页面：提取图片，并在深度限制内认领页面中尚未收集的其他类型链接
+
+        Returns:
+            (页面中的图片, 新认领的链接类型列表)
+        """
+        current_url = url_collector[url_type]
         try:
-            current_url = url_collector[url_type]
-            target_type = 'project' if url_type == 'github' else 'github'
-            
-            # 从当前url提取图片
-            response = await self._make_request_with_retry(current_url['url'])
-            if response:
-                # content = response.text
-                
+            # 页面经备忘录只请求一次，图片提取与链接发现复用同一结果
+            current_images = await self._get_images_from_url(current_url, url_type, paper)
+            current_url['check'] = True
 
-                current_images = await self._get_images_from_url(current_url, url_type, paper)
-            
-                if current_images:
-                    image_collector.extend(current_images)
+            discovered_types = []
+            if depth < self.max_link_depth:
+                for target_type in CRAWL_URL_TYPES:
+                    if url_collector[target_type]:
+                        continue
+                    target_url = await self._get_interested_links_from_url(current_url, paper, target_type)
+                    # 另一页面可能已在等待期间认领了同类链接
+                    if target_url and target_url['url'] and not url_collector[target_type]:
+                        url_collector[target_type].update(target_url)
+                        discovered_types.append(target_type)
+            return current_images, discovered_types
 
-            current_url['check'] = True
-            
-            # 检查当前页面中是否有其他关注链接
-            if not url_collector[target_type]:
-                target_url = await self._get_interested_links_from_url(current_url, paper, target_type)
-                # project_links = await self._extract_project_links_from_github_links(url, paper)
-                if target_url:
-                    url_collector[target_type].update(target_url)
-                    logger.info(f"从{url_type}页面更新{target_type}链接: {target_url['url']}")
-                else:
-                    url_collector[target_type].update({'url':None, 'check':True})
-            
         except Exception as e:
-            logger.warning(f"处理{url_type}链接失败: {str(e)}")
-            return image_collector, url_collector
-        
-        return image_collector, url_collector
+            current_url['check'] = True
+            logger.error(f"{url_type}链接处理失败: {str(e)}")
+            return [], []
 
     async def _get_images_from_url(self, current_url: str ,url_type:str, paper: Dict[str, Any]) -> List[Dict[str, Any]]:
         """从当前url提取图片"""
         try:
-            response = await self._make_request_with_retry(current_url['url'])
-            if not response:
+            page = await self._fetch_page(current_url['url'])
+            if not page:
                 return []
-            
-            content = response.text
-            
-            # 提取图片
-            img_pattern = re.compile(r'<img[^>]+src=["\']([^"\']+)["\'][^>]*>', re.IGNORECASE)
-            img_matches = img_pattern.findall(content)
 
-            img_filter = self._filter_images(img_matches, current_url['url'], url_type)
+            img_filter = self._filter_images(page['images'], current_url['url'], url_type)
 
             return img_filter
 
@@ -420,18 +528,13 @@ class ImageExtractor:
     async def _get_interested_links_from_url(self, current_url: str, paper: Dict[str, Any], target_url_type: str) -> List[Dict[str, Any]]:
         """从当前url提取感兴趣的链接"""
         try:
-            response = await self._make_request_with_retry(current_url['url'])
-            if not response:
+            page = await self._fetch_page(current_url['url'])
+            if not page:
                 return []
             
-            content = response.text
-            
             # 提取感兴趣的链接
             interested_links = []
-            link_pattern = re.compile(r'<a[^>]+href=["\']([^"\']+)["\'][^>]*>', re.IGNORECASE)
-            link_matches = link_pattern.findall(content)
-            
-            for link_url in link_matches:
+            for link_url in page['links']:
                 if paper['id'] in link_url or 'LaTeX' in link_url or not self.is_absolute_url(link_url) or 'arxiv' in link_url:
                     continue    
                 if self._categorize_url(link_url) == target_url_type:
@@ -448,24 +551,60 @@ class ImageExtractor:
             return []
                    
 
+    async def _fetch_page(self, url: str) -> Optional[Dict[str, List[str]]]:
+        """
+        获取页面并一次扫描出全部图片与链接；同一URL每次运行只请求一次，并发调用共享同一请求
+
+        Returns:
+            {"images": 图片URL列表, "links": 链接URL列表}，请求失败时返回None
+        """
+        task = self._page_memo.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._load_page(url))
+            self._page_memo[url] = task
+            self.page_stats['fetches'] += 1
+        else:
+            self.page_stats['reused'] += 1
+        return await asyncio.shield(task)
+
+    async def _load_page(self, url: str) -> Optional[Dict[str, List[str]]]:
+        await self._wait_for_host(url)
+        response = await self._make_request_with_retry(url)
+        if not response:
+            return None
+        images, links = StreamingLinkScanner().feed(response.text, final=True)
+        return {'images': images, 'links': links}
+
+    async def _wait_for_host(self, url: str):
+        """同一域名的页面请求之间至少间隔 crawl_delay 秒（只约束请求的发起，不串行化整个请求）"""
+        host = urlparse(url).netloc
+        lock = self._crawl_locks.setdefault(host, asyncio.Lock())
+        loop = asyncio.get_running_loop()
+        async with lock:
+            wait = self._crawl_last_request.get(host, float('-inf')) + self.crawl_delay - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._crawl_last_request[host] = loop.time()
+
     async def _make_request_with_retry(self, url: str, method: str = 'GET', **kwargs) -> Optional[httpx.Response]:
         """带重试机制的请求"""
+        client = self._get_client()
         for attempt in range(self.max_retries):
             try:
-                async with httpx.AsyncClient(**self.client_config) as client:
+                async with self._host_semaphore(url):
                     response = await client.request(method, url, headers=self.headers, **kwargs)
                     
-                    if response.status_code == 200:
-                        return response
-                    elif response.status_code in [403, 429, 500, 502, 503, 504]:
-                        # 服务器错误，等待后重试
-                        wait_time = self.retry_delay * (2 ** attempt) + random.uniform(0, 1)
-                        logger.warning(f"请求失败 {url}, 状态码: {response.status_code}, 等待 {wait_time:.1f}秒后重试")
-                        await asyncio.sleep(wait_time)
-                        continue
-                    else:
-                        logger.warning(f"请求失败 {url}, 状态码: {response.status_code}")
-                        return None
+                if response.status_code == 200:
+                    return response
+                elif response.status_code in [403, 429, 500, 502, 503, 504]:
+                    # 服务器错误，等待后重试（等待期间不占用该域名的并发名额）
+                    wait_time = self.retry_delay * (2 ** attempt) + random.uniform(0, 1)
+                    logger.warning(f"请求失败 {url}, 状态码: {response.status_code}, 等待 {wait_time:.1f}秒后重试")
+                    await asyncio.sleep(wait_time)
+                    continue
+                else:
+                    logger.warning(f"请求失败 {url}, 状态码: {response.status_code}")
+                    return None
                         
             except httpx.TimeoutException:
                 logger.warning(f"请求超时 {url}, 尝试 {attempt + 1}/{self.max_retries}")
@@ -494,9 +633,9 @@ class ImageExtractor:
             
             logger.info(f"开始从HTML提取图片: {html_url}")
             
-            # 带重试机制的请求
-            response = await self._make_request_with_retry(html_url)
-            if not response:
+            # 经磁盘缓存获取页面（同一版本只下载一次）
+            html_bytes = await self.html_cache.get(html_url)
+            if not html_bytes:
                 logger.warning(f"无法获取HTML内容: {html_url}")
                 return []
             
@@ -506,21 +645,19 @@ class ImageExtractor:
                 url_collector = {   
                     'github': {},      # GitHub链接
                     'project': {},     # 项目链接
-                    'state': False     # 状态标识
                 }
-                buffer = ""
-                
-                # # 编译正则表达式模式
-                # img_pattern = re.compile(r'<img[^>]+src=["\']([^"\']+)["\'][^>]*>', re.IGNORECASE)
-                # link_pattern = re.compile(r'<a[^>]+href=["\']([^"\']+)["\'][^>]*>', re.IGNORECASE)
-                
+                # 增量扫描：每块只扫描新文本及上一块末尾未闭合的标签
+                scanner = StreamingLinkScanner()
                 seen_urls = set()
 
-                # 获取内容长度用于进度条
-                content_length = response.headers.get('content-length')
-                total_size = int(content_length) if content_length else None
+                # 内容长度用于进度条
+                total_size = len(html_bytes)
+                chunk_size = 65536
+                
+                logger.info(f"开始流式解析HTML，内容大小: {total_size/1024:.1f} KB")
                 
-                logger.info(f"开始流式解析HTML，内容大小: {total_size/1024:.1f} KB" if total_size else "开始流式解析HTML")
+                # 增量解码器会保留跨块边界的多字节字符
+                decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
                 
                 # 创建进度条
                 with tqdm(
@@ -528,41 +665,18 @@ class ImageExtractor:
                     total=total_size,
                     unit='B',
                     unit_scale=True,
-                    unit_divisor=1024,
-                    disable=total_size is None
+                    unit_divisor=1024
                 ) as pbar:
-                    if total_size:
-                        # 使用字节流可视化html读取进度
-                        async for chunk in response.aiter_bytes():
-                            chunk_size = len(chunk)
-                            buffer += chunk.decode('utf-8', errors='ignore')
-                            pbar.update(chunk_size)
-                            
-                            # 收集和分类URL
-                            self._collect_and_categorize_urls(
-                                buffer, html_url, seen_urls, url_collector, self.image_collector, paper.get('id', '')
-                            )
-                            
-                            # 控制buffer大小
-                            if len(buffer) > 100000:  # 100KB
-                                buffer = buffer[-50000:]  # 保留后半部分
-                    else:
-                        # 使用文本流但显示处理进度
-                        processed_size = 0
-                        async for chunk in response.aiter_text():
-                            chunk_size = len(chunk.encode('utf-8'))
-                            buffer += chunk
-                            processed_size += chunk_size
-                            pbar.update(chunk_size)
-                            
-                            # 收集和分类URL
-                            self._collect_and_categorize_urls(
-                                buffer, html_url, seen_urls, url_collector, self.image_collector, paper.get('id', '')
-                            )
-                            
-                            # 控制buffer大小
-                            if len(buffer) > 100000:  # 100KB 
-                                buffer = buffer[-50000:]  # 保留后半部分
+                    for start in range(0, total_size, chunk_size):
+                        chunk = html_bytes[start:start + chunk_size]
+                        final = start + chunk_size >= total_size
+                        img_urls, link_urls = scanner.feed(decoder.decode(chunk, final=final), final=final)
+                        pbar.update(len(chunk))
+                        
+                        # 收集和分类URL
+                        self._collect_and_categorize_urls(
+                            img_urls, link_urls, html_url, seen_urls, url_collector, self.image_collector, paper.get('id', '')
+                        )
                 
                 # 统计收集到的URL
                 total_images = len(self.image_collector)
@@ -595,7 +709,7 @@ class ImageExtractor:
                 logger.warning(f"流式读取失败，尝试完整读取: {str(e)}")
                 # 回退到完整读取
                 try:
-                    html_content = response.text
+                    html_content = html_bytes.decode('utf-8', errors='replace')
                     return await self._parse_html_content(html_content, html_url, paper)
                 except Exception as e2:
                     logger.error(f"完整读取也失败: {str(e2)}")
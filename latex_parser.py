@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LaTeX源码解析模块
+从arXiv e-print（tar.gz源码包或gzip压缩的单个.tex）提取章节结构：
+在内存中顺序读取源码包成员（不落盘），从主文件展开 \\input / \\include，
+按 \\section / \\subsection / \\subsubsection / \\paragraph 构建与 parse_arxiv_html_bytes 相同结构的章节树，
+标题编号方式与LaTeXML一致（"3 Method", "3.1 Overview", "Appendix A ..."）
+"""
+
+import io
+import re
+import gzip
+import tarfile
+import posixpath
+from typing import Dict, Any, Optional, Tuple
+
+TEX_SUFFIXES = ('.tex', '.ltx')
+MAX_INPUT_DEPTH = 8
+
+SECTION_LEVELS = {'section': 1, 'subsection': 2, 'subsubsection': 3, 'paragraph': 4}
+# 章节命令、\appendix 与参考文献
+STRUCTURE_PATTERN = re.compile(
+    r'\\(section|subsection|subsubsection|paragraph)(\*?)\s*(?:\[[^\]]*\])?\s*\{'
+    r'|\\(appendix)\b'
+    r'|\\(bibliography)\s*\{[^}]*\}|\\(printbibliography)\b(?:\[[^\]]*\])?'
+    r'|\\begin\{(thebibliography)\}.*?\\end\{thebibliography\}',
+    re.DOTALL)
+
+COMMENT_LINE_PATTERN = re.compile(r'^[ \t]*%.*\n?', re.MULTILINE)
+COMMENT_PATTERN = re.compile(r'(?<!\\)%.*')
+INPUT_PATTERN = re.compile(r'\\(?:input|include|subfile)\s*\{([^}]+)\}')
+MACRO_PATTERN = re.compile(r'\\(?:re)?newcommand\*?\s*\{?\\([A-Za-z]+)\}?\s*\{|\\def\s*\\([A-Za-z]+)\s*\{')
+# 不能被同名宏覆盖的命令
+PROTECTED_MACROS = set(SECTION_LEVELS) | {'begin', 'end', 'input', 'include', 'caption', 'appendix', 'bibliography'}
+DOCUMENT_PATTERN = re.compile(r'\\begin\{document\}(.*?)(?:\\end\{document\}|$)', re.DOTALL)
+TITLE_PATTERN = re.compile(r'\\title\s*(?:\[[^\]]*\])?\s*\{')
+
+# 浮动体：标题放入 figures / tables，正文中移除
+FLOAT_PATTERN = re.compile(r'\\begin\{(figure|table|wrapfigure|wraptable)(\*?)\}(.*?)\\end\{\1\2\}', re.DOTALL)
+CAPTION_PATTERN = re.compile(r'\\caption\s*(?:\[[^\]]*\])?\s*\{')
+# 不进入段落文本的环境与公式
+DROPPED_PATTERN = re.compile(
+    r'\\begin\{(abstract|equation|align|gather|multline|eqnarray|displaymath|math|algorithm|algorithmic|tabular|'
+    r'tabularx|verbatim|lstlisting|minted|tikzpicture|comment)(\*?)\}.*?\\end\{\1\2\}'
+    r'|(?<!\\)\\\[.*?\\\]|\$\$.*?\$\$',
+    re.DOTALL)
+# 连同参数一起删除的命令
+REMOVED_COMMANDS = ('cite', 'citep', 'citet', 'citealp', 'citeauthor', 'citeyear', 'label', 'footnote',
+                    'thanks', 'vspace', 'hspace', 'includegraphics', 'bibliographystyle', 'ref', 'eqref',
+                    'autoref', 'cref', 'Cref', 'pageref', 'maketitle', 'centering', 'noindent', 'newpage', 'clearpage',
+                    'title', 'author', 'date', 'affiliation', 'email', 'keywords')
+REMOVED_COMMAND_PATTERN = re.compile(r'\\(' + '|'.join(REMOVED_COMMANDS) + r')\*?(?![A-Za-z])\s*(?:\[[^\]]*\]\s*)*')
+# 转义字符；花括号与$先换成占位符，删除LaTeX分组符号后再还原
+ESCAPES = {'\\%': '%', '\\&': '&', '\\_': '_', '\\#': '#', '\\$': '\ue000', '\\{': '\ue001', '\\}': '\ue002'}
+RESTORED = (('\ue000', '$'), ('\ue001', '{'), ('\ue002', '}'))
+ESCAPE_PATTERN = re.compile(r'\\[%&_#${}]')
+COMMAND_PATTERN = re.compile(r'\\[A-Za-z]+\*?(?:\[[^\]]*\])?|\\.')
+ENVIRONMENT_MARKER_PATTERN = re.compile(r'\\(?:begin|end)\s*\{[^}]*\}(?:\[[^\]]*\])?')
+PARAGRAPH_BREAK_PATTERN = re.compile(r'\n[ \t]*\n')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def read_eprint_sources(data: bytes) -> Dict[str, str]:
+    """
+    读取e-print中的LaTeX源文件
+
+    Returns:
+        {包内路径: 文本}，e-print为PDF时返回空dict
+    """
+    sources = {}
+    try:
+        # 流式模式按顺序读取成员，无需随机访问与临时文件
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r|*") as tar:
+            for member in tar:
+                if member.isfile() and member.name.lower().endswith(TEX_SUFFIXES):
+                    sources[posixpath.normpath(member.name)] = _decode(tar.extractfile(member).read())
+        return sources
+    except tarfile.ReadError:
+        pass
+
+    # 单文件投稿：gzip压缩的.tex
+    try:
+        raw = gzip.decompress(data)
+    except OSError:
+        raw = data
+    if raw.startswith(b'%PDF') or b'\\begin{document}' not in raw:
+        return {}
+    return {'main.tex': _decode(raw)}
+
+
+def _decode(raw: bytes) -> str:
+    try:
+        return raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return raw.decode('latin-1')
+
+
+def strip_comments(text: str) -> str:
+    """删除注释；整行注释连同换行一起删除，避免产生空行被误认为分段"""
+    return COMMENT_PATTERN.sub('', COMMENT_LINE_PATTERN.sub('', text))
+
+
+def find_main_file(sources: Dict[str, str]) -> Optional[str]:
+    """主文件：含 \\documentclass 与 \\begin{document} 的文件，多个时取未被其它文件引用、内容最长的"""
+    candidates = [name for name, text in sources.items()
+                  if '\\documentclass' in text and '\\begin{document}' in text]
+    if not candidates:
+        return None
+    referenced = {posixpath.splitext(posixpath.basename(match))[0]
+                  for text in sources.values() for match in INPUT_PATTERN.findall(text)}
+    candidates.sort(key=lambda name: (posixpath.splitext(posixpath.basename(name))[0] in referenced,
+                                      -len(sources[name])))
+    return candidates[0]
+
+
+def expand_inputs(text: str, sources: Dict[str, str], base_dir: str, depth: int = 0, seen=frozenset()) -> str:
+    """递归展开 \\input / \\include（找不到的文件与循环引用忽略）"""
+    def _replace(match):
+        path = _resolve(match.group(1).strip(), sources, base_dir)
+        if path is None or path in seen or depth >= MAX_INPUT_DEPTH:
+            return ''
+        return "\n" + expand_inputs(strip_comments(sources[path]), sources, base_dir, depth + 1, seen | {path}) + "\n"
+
+    return INPUT_PATTERN.sub(_replace, text)
+
+
+def _resolve(name: str, sources: Dict[str, str], base_dir: str) -> Optional[str]:
+    for candidate in (name, name + '.tex'):
+        path = posixpath.normpath(posixpath.join(base_dir, candidate))
+        if path in sources:
+            return path
+    return None
+
+
+def braced_argument(text: str, start: int) -> Tuple[str, int]:
+    """
+    读取从 start（'{' 之后）开始的花括号参数
+
+    Returns:
+        (参数内容, 右花括号之后的位置)
+    """
+    depth = 1
+    index = start
+    while index < len(text):
+        char = text[index]
+        if char == '\\':
+            index += 2
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:index], index + 1
+        index += 1
+    return text[start:], len(text)
+
+
+def collect_macros(text: str) -> Dict[str, str]:
+    """无参数宏定义，如 \\newcommand{\\method}{SynthNet}（论文中常用于方法名）"""
+    macros = {}
+    for match in MACRO_PATTERN.finditer(text):
+        name = match.group(1) or match.group(2)
+        body, end = braced_argument(text, match.end())
+        # 跳过带参数的宏（\newcommand{\x}[1]{...} 的 "{" 不紧跟名称，不会进入这里；\def 的参数形如 #1）
+        if '#' not in body and name not in PROTECTED_MACROS:
+            macros[name] = body.replace('\\xspace', '')
+    return macros
+
+
+def expand_macros(text: str, macros: Dict[str, str]) -> str:
+    if not macros:
+        return text
+    pattern = re.compile(r'\\(' + '|'.join(sorted(map(re.escape, macros), key=len, reverse=True)) + r')(?![A-Za-z])')
+    for _ in range(2):  # 宏内引用其它宏
+        text = pattern.sub(lambda m: macros[m.group(1)], text)
+    return text
+
+
+def latex_to_text(fragment: str) -> str:
+    """将一段LaTeX转为纯文本"""
+    text = _remove_commands(fragment)
+    text = text.replace('``', '"').replace("''", '"').replace('---', '—').replace('--', '–').replace('~', ' ')
+    text = ESCAPE_PATTERN.sub(lambda m: ESCAPES[m.group(0)], text)
+    text = ENVIRONMENT_MARKER_PATTERN.sub(' ', text)
+    text = COMMAND_PATTERN.sub(' ', text)
+    text = text.replace('{', '').replace('}', '').replace('$', '')
+    for placeholder, char in RESTORED:
+        text = text.replace(placeholder, char)
+    return WHITESPACE_PATTERN.sub(' ', text).strip()
+
+
+def _remove_commands(text: str) -> str:
+    """删除引用、标签、脚注等命令及其花括号参数"""
+    parts = []
+    position = 0
+    for match in REMOVED_COMMAND_PATTERN.finditer(text):
+        if match.start() < position:
+            continue
+        parts.append(text[position:match.start()])
+        position = match.end()
+        if position < len(text) and text[position] == '{':
+            _, position = braced_argument(text, position + 1)
+    parts.append(text[position:])
+    return ''.join(parts)
+
+
+def _new_section(title=None) -> Dict[str, Any]:
+    return {
+        "title": title,
+        "figures": [],
+        "tables": [],
+        "subsections": []
+    }
+
+
+def parse_latex_document(text: str) -> Dict[str, Any]:
+    """
+    解析已展开 \\input 的LaTeX文档
+
+    Returns:
+        {"title": 标题, "sections": 章节树}
+    """
+    macros = collect_macros(text)
+    title_match = TITLE_PATTERN.search(text)
+    title = None
+    if title_match:
+        title = latex_to_text(expand_macros(braced_argument(text, title_match.end())[0], macros)) or None
+
+    document = DOCUMENT_PATTERN.search(text)
+    body = expand_macros(document.group(1) if document else text, macros)
+    # 摘要与公式等在切分章节前删除；浮动体保留到所属章节内再提取标题
+    body = DROPPED_PATTERN.sub('\n', body)
+
+    virtual_root = _new_section()
+    stack = [(0, virtual_root)]
+    counters = [0, 0, 0]
+    appendix = False
+    position = 0
+
+    for match in STRUCTURE_PATTERN.finditer(body):
+        if match.start() < position:
+            continue
+        _add_content(stack[-1][1], body[position:match.start()])
+        position = match.end()
+        command, starred = match.group(1), match.group(2)
+
+        if command is None:
+            if match.group(3):
+                appendix = True
+                counters = [0, 0, 0]
+                continue
+            # 参考文献：与LaTeXML一样保留为一级章节，不收集条目
+            command, heading = 'section', "References"
+        else:
+            raw_title, position = braced_argument(body, position)
+            heading = latex_to_text(raw_title)
+            level = SECTION_LEVELS[command]
+            if not starred and level <= 3:
+                counters[level - 1] += 1
+                counters[level:] = [0] * (3 - level)
+                number = ".".join(str(n) for n in counters[:level])
+                if appendix:
+                    number = chr(64 + counters[0]) + number[len(str(counters[0])):]
+                    heading = f"Appendix {number} {heading}" if level == 1 else f"{number} {heading}"
+                else:
+                    heading = f"{number} {heading}"
+
+        level = SECTION_LEVELS[command]
+        while stack[-1][0] >= level:
+            stack.pop()
+        section = _new_section(title=heading)
+        stack[-1][1]["subsections"].append(section)
+        stack.append((level, section))
+
+    _add_content(stack[-1][1], body[position:])
+    return {"title": title, "sections": virtual_root["subsections"]}
+
+
+def _add_content(section: Dict[str, Any], fragment: str):
+    """章节正文：浮动体标题放入 figures / tables，其余按空行分段"""
+    def _float(match):
+        environment, content = match.group(1), match.group(3)
+        caption_match = CAPTION_PATTERN.search(content)
+        caption = latex_to_text(braced_argument(content, caption_match.end())[0]) if caption_match else ""
+        if environment.endswith('table'):
+            section["tables"].append({"id": None, "caption": caption, "content": ""})
+        else:
+            section["figures"].append({"id": None, "url": None, "caption": caption})
+        return '\n\n'
+
+    fragment = FLOAT_PATTERN.sub(_float, fragment)
+    for paragraph in PARAGRAPH_BREAK_PATTERN.split(fragment):
+        text = latex_to_text(paragraph)
+        if text:
+            section["subsections"].append({"text": text})
+
+
+def parse_eprint_bytes(data: bytes) -> Dict[str, Any]:
+    """
+    解析arXiv e-print字节为论文数据结构（进程池工作函数，需定义在模块顶层以便pickle）
+
+    Returns:
+        {"title": 标题, "sections": 章节树}，无LaTeX源码时章节为空
+    """
+    sources = read_eprint_sources(data)
+    main_file = find_main_file(sources)
+    if main_file is None:
+        return {"title": None, "sections": []}
+    text = expand_inputs(strip_comments(sources[main_file]), sources, posixpath.dirname(main_file),
+                         seen=frozenset([main_file]))
+    return parse_latex_document(text)
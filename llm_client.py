@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享LLM调用模块
+为评分、章节检测、资讯生成等环节提供统一的千问调用入口，
+支持模型路由、对冲请求（hedged request）与熔断器（circuit breaker），并导出调用指标
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from dashscope import Generation
+from model_router import ModelRouter
+from api_key_pool import APIKeyPool, RateLimitError
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态时抛出，调用方应推迟处理当前论文"""
+
+
+class CircuitBreaker:
+    """基于滑动窗口错误率的熔断器"""
+
+    def __init__(self, failure_threshold: float = 0.5, window_size: int = 20, min_calls: int = 5, cooldown: float = 60.0):
+        self.failure_threshold = failure_threshold  # 错误率阈值
+        self.window_size = window_size  # 滑动窗口大小（调用次数）
+        self.min_calls = min_calls  # 窗口内最少调用次数，避免样本过少时误判
+        self.cooldown = cooldown  # 打开后多久进入半开状态（秒）
+
+        self.state = "closed"  # closed / open / half_open
+        self.opened_at = 0.0
+        self.outcomes = deque(maxlen=window_size)  # True表示成功
+        self.probe_in_flight = False
+
+        # 指标
+        self.open_count = 0
+        self.rejected_count = 0
+
+    def allow(self) -> bool:
+        """判断当前是否允许发起调用"""
+        if self.state == "open":
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = "half_open"
+                self.probe_in_flight = False
+                logger.info("熔断器进入半开状态，允许一次探测调用")
+            else:
+                self.rejected_count += 1
+                return False
+
+        if self.state == "half_open":
+            # 半开状态只放行一次探测调用
+            if self.probe_in_flight:
+                self.rejected_count += 1
+                return False
+            self.probe_in_flight = True
+
+        return True
+
+    def record_success(self):
+        """记录一次成功调用"""
+        if self.state == "half_open":
+            self.state = "closed"
+            self.outcomes.clear()
+            logger.info("探测调用成功，熔断器关闭")
+        self.probe_in_flight = False
+        self.outcomes.append(True)
+
+    def record_failure(self):
+        """记录一次失败调用"""
+        self.probe_in_flight = False
+        if self.state == "half_open":
+            self._open()
+            return
+
+        self.outcomes.append(False)
+        if len(self.outcomes) >= self.min_calls:
+            error_rate = self.outcomes.count(False) / len(self.outcomes)
+            if error_rate >= self.failure_threshold and self.state == "closed":
+                self._open()
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.open_count += 1
+        logger.warning(f"LLM调用错误率过高，熔断器打开，{self.cooldown:.0f}秒内快速失败")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取熔断器指标"""
+        return {
+            "state": self.state,
+            "open_count": self.open_count,
+            "rejected_count": self.rejected_count,
+            "window_error_rate": self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0,
+        }
+
+
+class LLMClient:
+    """千问调用客户端：模型路由 + 对冲请求 + 熔断器 + 指标"""
+
+    def __init__(self, api_key: str = None, hedge_quantile: float = 0.95, hedge_min_samples: int = 10,
+                 hedge_min_delay: float = 5.0, latency_window: int = 100, breaker: CircuitBreaker = None,
+                 router: ModelRouter = None, key_pool: APIKeyPool = None):
+        # 多密钥时传入key_pool，按剩余配额分配调用；只有单个密钥时退化为单密钥池
+        self.key_pool = key_pool or APIKeyPool([api_key])
+        self.hedge_quantile = hedge_quantile  # 超过该分位数延迟时发起对冲请求
+        self.hedge_min_samples = hedge_min_samples  # 延迟样本不足时不对冲
+        self.hedge_min_delay = hedge_min_delay  # 对冲等待时间下限（秒），避免短调用被频繁对冲
+        self.latency_window = latency_window
+        self.breaker = breaker or CircuitBreaker()
+        self.router = router or ModelRouter(latency_window=latency_window)
+
+        self.latencies = {}  # {model: deque[秒]}
+        self.metrics = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "fallbacks": 0,
+            "hedges_issued": 0,
+            "hedge_wins": 0,
+            "stream_aborts": 0,
+        }
+
+    def _resolve_models(self, route: str, model: Optional[str]) -> List[str]:
+        """显式指定模型时只用该模型，否则使用路由表中的回退链"""
+        if model:
+            return [model]
+        return self.router.models_for(route)
+
+    async def call(self, prompt: str, route: str = 'news_generation', model: str = None,
+                   max_tokens: int = 2000, temperature: float = 0.3) -> str:
+        """
+        按路由调用千问API，模型失败时沿回退链切换；
+        单次调用耗时超过该模型的p95延迟时发起一次对冲请求，取先返回者
+
+        Args:
+            route: 调用类型，如 'scoring'、'section_detection'、'news_generation'
+            model: 显式指定模型（覆盖路由）
+
+        Raises:
+            CircuitOpenError: 熔断器打开，调用被快速拒绝
+        """
+        models = self._resolve_models(route, model)
+        if not self.breaker.allow():
+            raise CircuitOpenError("LLM熔断器已打开，请稍后重试")
+
+        self.metrics["calls"] += 1
+        last_error = None
+        for index, current_model in enumerate(models):
+            if index > 0:
+                self.metrics["fallbacks"] += 1
+                logger.warning(f"路由 {route} 回退到模型 {current_model}")
+            try:
+                text = await self._hedged_call(prompt, route, current_model, max_tokens, temperature)
+            except Exception as e:
+                last_error = e
+                continue
+
+            self.metrics["successes"] += 1
+            self.breaker.record_success()
+            return text
+
+        self.metrics["failures"] += 1
+        self.breaker.record_failure()
+        raise last_error
+
+    async def call_samples(self, prompt: str, n: int, route: str = 'news_generation', model: str = None,
+                           max_tokens: int = 2000, temperature: float = 0.8) -> List[str]:
+        """
+        同一提示词生成n个候选：模型支持 n 参数时单次请求返回多个候选（输入token只计一次），
+        否则并发发起n次调用；模型失败时沿回退链切换（不发起对冲请求）
+
+        Returns:
+            候选文本列表（个数可能少于n）
+
+        Raises:
+            CircuitOpenError: 熔断器打开，调用被快速拒绝
+        """
+        models = self._resolve_models(route, model)
+        if not self.breaker.allow():
+            raise CircuitOpenError("LLM熔断器已打开，请稍后重试")
+
+        self.metrics["calls"] += 1
+        last_error = None
+        for index, current_model in enumerate(models):
+            if index > 0:
+                self.metrics["fallbacks"] += 1
+                logger.warning(f"路由 {route} 回退到模型 {current_model}")
+            per_call = min(n, self.router.max_samples(current_model))
+            counts = [per_call] * (n // per_call) + ([n % per_call] if n % per_call else [])
+            start = time.monotonic()
+            results = await asyncio.gather(*[
+                self._call_with_key(prompt, current_model, max_tokens, temperature, samples=count) for count in counts
+            ], return_exceptions=True)
+            texts = []
+            usage = [0, 0]
+            for result in results:
+                if isinstance(result, Exception):
+                    last_error = result
+                    continue
+                batch, (input_tokens, output_tokens) = result
+                texts.extend(batch)
+                usage[0] += input_tokens
+                usage[1] += output_tokens
+            if not texts:
+                self.router.record(route, current_model, time.monotonic() - start, success=False)
+                continue
+
+            self.router.record(route, current_model, time.monotonic() - start, *usage)
+            self.metrics["successes"] += 1
+            self.breaker.record_success()
+            return texts
+
+        self.metrics["failures"] += 1
+        self.breaker.record_failure()
+        raise last_error
+
+    async def _hedged_call(self, prompt: str, route: str, model: str, max_tokens: int, temperature: float) -> str:
+        """对单个模型发起调用，超过p95延迟时追加一次对冲请求"""
+        loop = asyncio.get_running_loop()
+
+        primary_start = time.monotonic()
+        primary = loop.create_task(self._call_with_key(prompt, model, max_tokens, temperature))
+        started = {primary: primary_start}
+
+        hedge_delay = self._hedge_delay(model)
+        if hedge_delay is not None:
+            done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+            if not done:
+                logger.info(f"模型 {model} 调用超过p95延迟 {hedge_delay:.1f}秒，发起对冲请求")
+                hedge = loop.create_task(self._call_with_key(prompt, model, max_tokens, temperature))
+                started[hedge] = time.monotonic()
+                self.metrics["hedges_issued"] += 1
+
+        pending = set(started)
+        last_error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is not None:
+                    last_error = fut.exception()
+                    continue
+
+                # 先返回者胜出，其余请求的结果直接丢弃
+                for other in pending:
+                    other.add_done_callback(self._discard_result)
+                if fut is not primary:
+                    self.metrics["hedge_wins"] += 1
+                latency = time.monotonic() - started[fut]
+                text, usage = fut.result()
+                self._record_latency(model, latency)
+                self.router.record(route, model, latency, *usage)
+                return text
+
+        self.router.record(route, model, time.monotonic() - primary_start, success=False)
+        raise last_error
+
+    async def _call_with_key(self, prompt: str, model: str, max_tokens: int, temperature: float,
+                             samples: int = None) -> Tuple[Any, Tuple[int, int]]:
+        """
+        从密钥池取密钥调用；密钥被限流时换一个密钥重试
+
+        samples 不为None时以 n 参数请求多个候选，返回候选列表
+        """
+        loop = asyncio.get_running_loop()
+        last_error = None
+        for _ in range(len(self.key_pool)):
+            api_key = await self.key_pool.acquire()
+            try:
+                if samples is None:
+                    text, usage = await loop.run_in_executor(
+                        None, self._sync_call, prompt, model, max_tokens, temperature, api_key
+                    )
+                else:
+                    text, usage = await loop.run_in_executor(
+                        None, self._sync_call_samples, prompt, model, max_tokens, temperature, samples, api_key
+                    )
+            except RateLimitError as e:
+                self.key_pool.mark_throttled(api_key)
+                last_error = e
+                continue
+            self.key_pool.report(api_key, sum(usage))
+            return text, usage
+        raise last_error
+
+    async def stream(self, prompt: str, on_delta: Callable[[str], bool], route: str = 'news_generation', model: str = None,
+                     max_tokens: int = 2000, temperature: float = 0.3) -> str:
+        """
+        按路由流式调用千问API，每收到一段增量文本就调用on_delta；
+        只有在尚未输出任何文本时失败才沿回退链切换模型
+
+        Args:
+            on_delta: 增量文本回调（在工作线程中执行），返回False时中止生成
+
+        Returns:
+            已生成的完整文本（中止时为中止前的部分）
+
+        Raises:
+            CircuitOpenError: 熔断器打开，调用被快速拒绝
+        """
+        models = self._resolve_models(route, model)
+        if not self.breaker.allow():
+            raise CircuitOpenError("LLM熔断器已打开，请稍后重试")
+
+        self.metrics["calls"] += 1
+        loop = asyncio.get_running_loop()
+        delivered = []
+
+        def _on_delta(delta: str) -> bool:
+            delivered.append(delta)
+            return on_delta(delta)
+
+        last_error = None
+        for index, current_model in enumerate(models):
+            if index > 0:
+                self.metrics["fallbacks"] += 1
+                logger.warning(f"路由 {route} 回退到模型 {current_model}")
+            start = time.monotonic()
+            result = None
+            # 与 _call_with_key 相同：尚未输出任何文本时密钥被限流，换一个密钥重试
+            for _ in range(len(self.key_pool)):
+                api_key = await self.key_pool.acquire()
+                try:
+                    result = await loop.run_in_executor(
+                        None, self._sync_stream, prompt, current_model, max_tokens, temperature, _on_delta, api_key
+                    )
+                except RateLimitError as e:
+                    self.key_pool.mark_throttled(api_key)
+                    last_error = e
+                    if delivered:
+                        break
+                    continue
+                except Exception as e:
+                    last_error = e
+                break
+
+            if result is None:
+                self.router.record(route, current_model, time.monotonic() - start, success=False)
+                if delivered:
+                    # 已有部分输出交给解析器，换模型会产生重复内容
+                    break
+                continue
+
+            text, aborted, usage = result
+
+            latency = time.monotonic() - start
+            self.key_pool.report(api_key, sum(usage))
+            self.router.record(route, current_model, latency, *usage)
+            self.metrics["successes"] += 1
+            self.breaker.record_success()
+            if aborted:
+                self.metrics["stream_aborts"] += 1
+            else:
+                # 中止的调用耗时偏短，不计入延迟统计
+                self._record_latency(current_model, latency)
+            return text
+
+        self.metrics["failures"] += 1
+        self.breaker.record_failure()
+        raise last_error
+
+    def _sync_stream(self, prompt: str, model: str, max_tokens: int, temperature: float,
+                     on_delta: Callable[[str], bool], api_key: str) -> Tuple[str, bool, Tuple[int, int]]:
+        """同步流式调用千问API，返回(文本, 是否中止, (输入token, 输出token))"""
+        try:
+            responses = Generation.call(
+                model=model,
+                prompt=prompt,
+                api_key=api_key,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True,
+                incremental_output=True
+            )
+
+            parts = []
+            aborted = False
+            usage = (0, 0)
+            for response in responses:
+                self._check_response(response)
+                usage = self._parse_usage(response)
+                delta = response.output.text or ""
+                if not delta:
+                    continue
+                parts.append(delta)
+                if on_delta(delta) is False:
+                    # 关闭生成器即断开流式连接，不再消耗后续token
+                    aborted = True
+                    responses.close()
+                    break
+
+            return "".join(parts), aborted, usage
+
+        except Exception as e:
+            logger.error(f"千问API流式调用失败: {str(e)}")
+            raise e
+
+    def _sync_call(self, prompt: str, model: str, max_tokens: int, temperature: float,
+                   api_key: str) -> Tuple[str, Tuple[int, int]]:
+        """同步调用千问API，返回(文本, (输入token, 输出token))"""
+        try:
+            response = Generation.call(
+                model=model,
+                prompt=prompt,
+                api_key=api_key,
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
+
+            self._check_response(response)
+            return response.output.text, self._parse_usage(response)
+
+        except Exception as e:
+            logger.error(f"千问API调用失败: {str(e)}")
+            raise e
+
+    def _sync_call_samples(self, prompt: str, model: str, max_tokens: int, temperature: float, n: int,
+                           api_key: str) -> Tuple[List[str], Tuple[int, int]]:
+        """同步调用千问API生成n个候选（n>1 需使用 message 格式的返回结果）"""
+        if n <= 1:
+            text, usage = self._sync_call(prompt, model, max_tokens, temperature, api_key)
+            return [text], usage
+        try:
+            response = Generation.call(
+                model=model,
+                messages=[{'role': 'user', 'content': prompt}],
+                api_key=api_key,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                n=n,
+                result_format='message'
+            )
+
+            self._check_response(response)
+            texts = [choice.message.content for choice in response.output.choices if choice.message.content]
+            return texts, self._parse_usage(response)
+
+        except Exception as e:
+            logger.error(f"千问API多候选调用失败: {str(e)}")
+            raise e
+
+    @staticmethod
+    def _check_response(response):
+        """检查响应状态，限流单独抛出RateLimitError"""
+        if response.status_code == 200:
+            return
+        if response.status_code == 429 or str(getattr(response, 'code', '')).startswith('Throttling'):
+            raise RateLimitError(f"API限流: {response.message}")
+        raise Exception(f"API调用失败: {response.message}")
+
+    @staticmethod
+    def _parse_usage(response) -> Tuple[int, int]:
+        """提取响应中的token用量"""
+        usage = getattr(response, 'usage', None)
+        if not usage:
+            return 0, 0
+        return usage.get('input_tokens', 0) or 0, usage.get('output_tokens', 0) or 0
+
+    @staticmethod
+    def _discard_result(fut: asyncio.Future):
+        """取走落败请求的结果/异常，避免未读取异常的告警"""
+        if not fut.cancelled():
+            fut.exception()
+
+    def _record_latency(self, model: str, latency: float):
+        samples = self.latencies.setdefault(model, deque(maxlen=self.latency_window))
+        samples.append(latency)
+
+    def _percentile(self, model: str, quantile: float) -> Optional[float]:
+        samples = self.latencies.get(model)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(quantile * len(ordered)))
+        return ordered[index]
+
+    def _hedge_delay(self, model: str) -> Optional[float]:
+        """根据历史延迟计算对冲等待时间，样本不足时返回None表示不对冲"""
+        samples = self.latencies.get(model)
+        if not samples or len(samples) < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, self._percentile(model, self.hedge_quantile))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """导出对冲/熔断及延迟指标"""
+        latency = {}
+        for model, samples in self.latencies.items():
+            latency[model] = {
+                "samples": len(samples),
+                "p50": self._percentile(model, 0.5),
+                "p95": self._percentile(model, 0.95),
+            }
+
+        return {
+            **self.metrics,
+            "breaker": self.breaker.get_metrics(),
+            "latency": latency,
+            "routes": self.router.get_stats(),
+            "keys": self.key_pool.get_usage(),
+        }
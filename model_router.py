@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型路由模块
+按调用类型（评分、章节检测、资讯生成、摘要草稿与补写、VLM bbox检测）选择模型，
+支持回退链，并记录每条路由的实际延迟与token成本
+"""
+
+import logging
+from collections import deque
+from typing import Dict, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 调用类型 -> 模型回退链（依次尝试）
+DEFAULT_ROUTES = {
+    'scoring': ['qwen-plus-2025-07-14', 'qwen-plus'],
+    'section_detection': ['qwen-turbo', 'qwen-plus-2025-07-14'],  # 类分类调用，优先小模型
+    'news_generation': ['qwen-plus-2025-09-11', 'qwen-plus'],
+    'news_draft': ['qwen-turbo', 'qwen-plus'],  # 摘要快讯草稿，优先低延迟模型
+    'news_repair': ['qwen-plus', 'qwen-turbo'],  # 补写生成结果中不合格的单个部分
+    'vlm_bbox': ['qwen3-vl-30b-a3b-instruct', 'qwen3-vl-8b-instruct'],
+}
+
+# 支持单次请求返回多个候选（n 参数）的模型前缀及候选数上限
+MULTI_SAMPLE_MODEL_PREFIXES = ('qwen-plus',)
+MAX_SAMPLES_PER_CALL = 4
+
+# 模型单价（元/千token，(输入, 输出)），参考价，可在构造时覆盖
+DEFAULT_PRICES = {
+    'qwen-turbo': (0.0003, 0.0006),
+    'qwen-plus': (0.0008, 0.002),
+    'qwen-plus-2025-07-14': (0.0008, 0.002),
+    'qwen-plus-2025-09-11': (0.0008, 0.002),
+    'qwen3-vl-8b-instruct': (0.0005, 0.002),
+    'qwen3-vl-30b-a3b-instruct': (0.00075, 0.003),
+}
+
+
+class ModelRouter:
+    """模型路由表"""
+
+    def __init__(self, routes: Dict[str, List[str]] = None, prices: Dict[str, Tuple[float, float]] = None,
+                 latency_window: int = 100):
+        self.routes = dict(DEFAULT_ROUTES)
+        if routes:
+            self.routes.update(routes)
+        self.prices = dict(DEFAULT_PRICES)
+        if prices:
+            self.prices.update(prices)
+        self.latency_window = latency_window
+
+        self.stats = {}  # {(route, model): {...}}
+
+    def models_for(self, route: str) -> List[str]:
+        """获取路由对应的模型回退链"""
+        if route not in self.routes:
+            raise KeyError(f"未知的调用类型: {route}")
+        return list(self.routes[route])
+
+    @staticmethod
+    def max_samples(model: str) -> int:
+        """单次请求最多可返回的候选数，不支持 n 参数的模型为1"""
+        return MAX_SAMPLES_PER_CALL if model.startswith(MULTI_SAMPLE_MODEL_PREFIXES) else 1
+
+    def record(self, route: str, model: str, latency: float, input_tokens: int = 0,
+               output_tokens: int = 0, success: bool = True):
+        """记录一次调用的延迟与token消耗"""
+        stat = self.stats.setdefault((route, model), {
+            'calls': 0,
+            'failures': 0,
+            'input_tokens': 0,
+            'output_tokens': 0,
+            'cost': 0.0,
+            'latencies': deque(maxlen=self.latency_window),
+        })
+        stat['calls'] += 1
+        if not success:
+            stat['failures'] += 1
+            return
+
+        stat['latencies'].append(latency)
+        stat['input_tokens'] += input_tokens
+        stat['output_tokens'] += output_tokens
+        input_price, output_price = self.prices.get(model, (0.0, 0.0))
+        stat['cost'] += input_tokens / 1000 * input_price + output_tokens / 1000 * output_price
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """按路由汇总的延迟与成本统计"""
+        report = {}
+        for (route, model), stat in self.stats.items():
+            latencies = sorted(stat['latencies'])
+            report.setdefault(route, {})[model] = {
+                'calls': stat['calls'],
+                'failures': stat['failures'],
+                'avg_latency': sum(latencies) / len(latencies) if latencies else None,
+                'p95_latency': latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] if latencies else None,
+                'input_tokens': stat['input_tokens'],
+                'output_tokens': stat['output_tokens'],
+                'cost': round(stat['cost'], 6),
+            }
+        return report
@@ -14,12 +14,125 @@ import re
 
 logger = logging.getLogger(__name__)
 
+# 论文id末尾的版本号，草稿输出位置按不带版本号的id记录
+VERSION_SUFFIX_PATTERN = re.compile(r'v\d+$')
+
+class StreamingContentParser:
+    """
+    流式资讯内容的增量解析器
+    每当 标题/备选标题/详细内容总结/话题标签 中的一个部分完整输出时立即回调，
+    标题或详细内容总结为 NOT_PROVIDED 时标记中止；
+    OutputFormatter 解析已保存的内容时也使用同一解析规则（parse）
+    """
+
+    # 备选标题需排在标题之前，保证同一位置优先匹配更长的部分名
+    HEADER_PATTERN = re.compile(r'(备选标题|详细内容总结|话题标签|标题)[：:]')
+    LIST_SECTIONS = {'备选标题', '话题标签'}
+    REQUIRED_SECTIONS = {'标题', '详细内容总结'}
+    MAX_HEADER_LENGTH = 7  # 最长部分名+冒号
+
+    def __init__(self, on_section=None):
+        self.on_section = on_section  # 回调 on_section(name, value)
+        self.buffer = ""
+        self.sections = {}
+        self.current = None  # (部分名, 内容起始位置)
+        self.scan_pos = 0
+        self.aborted = False
+
+    def feed(self, delta: str) -> bool:
+        """输入一段增量文本，返回False表示应中止生成"""
+        if self.aborted:
+            return False
+        self._scan(delta)
+
+        # 模型直接返回 NOT_PROVIDED，或必需部分以 NOT_PROVIDED 开头时提前中止
+        if self.current is None:
+            if self.buffer.strip().startswith('NOT_PROVIDED'):
+                self.aborted = True
+        elif self.current[0] in self.REQUIRED_SECTIONS:
+            partial = self.buffer[self.current[1]:].strip().lstrip('[')
+            if partial.startswith('NOT_PROVIDED'):
+                self.aborted = True
+
+        if self.aborted:
+            logger.warning("生成内容缺少必需部分(NOT_PROVIDED)，提前中止生成")
+        return not self.aborted
+
+    @classmethod
+    def parse(cls, content: str) -> Dict[str, Any]:
+        """
+        解析完整的资讯内容（已保存的结果、补写输出等）
+
+        完整文本不存在提前中止：必需部分为 NOT_PROVIDED 时其余部分照常解析
+        """
+        parser = cls()
+        parser._scan(content)
+        parser.aborted = False
+        return parser.close()
+
+    def _scan(self, delta: str):
+        """追加文本，完成已结束的部分"""
+        self.buffer += delta
+
+        # 只扫描新文本（保留可能被截断的部分名）
+        while True:
+            match = self.HEADER_PATTERN.search(self.buffer, self.scan_pos)
+            if not match:
+                break
+            if self.current:
+                self._complete(self.current[0], self.buffer[self.current[1]:match.start()])
+            self.current = (match.group(1), match.end())
+            self.scan_pos = match.end()
+        self.scan_pos = max(self.scan_pos, len(self.buffer) - self.MAX_HEADER_LENGTH)
+
+    def close(self) -> Dict[str, Any]:
+        """流结束时收尾，返回与 OutputFormatter._parse_single_content 相同结构的结果"""
+        if self.current and not self.aborted:
+            self._complete(self.current[0], self.buffer[self.current[1]:])
+            self.current = None
+
+        return {
+            'title': self.sections.get('标题', 'NOT_PROVIDED'),
+            'alternative_titles': self.sections.get('备选标题', []),
+            'content_summary': self.sections.get('详细内容总结', 'NOT_PROVIDED'),
+            'tags': self.sections.get('话题标签', [])
+        }
+
+    def _complete(self, name: str, raw: str):
+        """某个部分输出完整"""
+        if name in self.sections:
+            # 与非流式解析保持一致，只取第一次出现的部分
+            return
+        section_content = raw.strip()
+        if name in self.LIST_SECTIONS:
+            value = self._split_items(section_content)
+        else:
+            value = section_content if section_content else 'NOT_PROVIDED'
+        self.sections[name] = value
+
+        if name in self.REQUIRED_SECTIONS and value == 'NOT_PROVIDED':
+            self.aborted = True
+        if self.on_section:
+            self.on_section(name, value)
+
+    @staticmethod
+    def _split_items(section_content: str) -> List[str]:
+        """按分隔符拆分列表型部分"""
+        if not section_content:
+            return []
+        for separator in [',', '，', '\n']:
+            if separator in section_content:
+                return [t.strip() for t in section_content.split(separator) if t.strip()]
+        return [section_content.strip()]
+
 class OutputFormatter:
     """输出格式化器"""
     
     def __init__(self, timestamp: str, base_output_dir: str = "/media/home/pengyunning/arXiv2xhs/output"):
         self.timestamp = timestamp
         self.base_output_dir =os.path.join(base_output_dir, "output")
+        # 摘要草稿的输出位置 {不带版本号的论文id: 文件路径（不含扩展名）}，正文版本生成后覆盖同一文件
+        self.draft_slots_path = os.path.join(self.base_output_dir, "draft_slots.json")
     
     def ensure_output_dir(self, output_dir: str):
         """确保输出目录存在"""
@@ -83,169 +196,17 @@ class OutputFormatter:
         return {
             'paper_info': paper_info,
             'content': parsed,
+            'draft': news.get('draft', False),
+            'content_source': news.get('content_source', 'full_text'),
+            'repairs': news.get('repairs', []),
+            # 多版本模式下的全部版本（第一个与 content 相同），供编辑挑选
+            'variants': [{'style': variant['style'], 'content': self._parse_single_content(variant['content']),
+                          'repairs': variant.get('repairs', [])} for variant in news.get('variants', [])],
         }
     
     def _parse_single_content(self, content: str) -> Dict[str, Any]:
-        """解析单个内容版本"""
-        if not content:
-            return {
-                'title': 'NOT_PROVIDED',
-                'alternative_titles': [],
-                'content_summary': 'NOT_PROVIDED',
-                'tags': []
-            }
-        
-        # 提取标题
-        title = self._extract_section(content, '标题')
-        
-        # 提取备选标题
-        alternative_titles = self._extract_alternative_titles(content)
-        
-        # 提取详细内容总结
-        content_summary = self._extract_section(content, '详细内容总结')
-        
-        # 提取话题标签
-        tags = self._extract_tags(content)
-        
-        return {
-            'title': title,
-            'alternative_titles': alternative_titles,
-            'content_summary': content_summary,
-            'tags': tags
-        }
-    
-    def _extract_alternative_titles(self, content: str) -> List[str]:
-        """提取备选标题"""
-        try:
-            # 查找备选标题部分
-            start_pattern = "备选标题："
-            start_pos = content.find(start_pattern)
-            
-            if start_pos == -1:
-                start_pattern = "备选标题:"
-                start_pos = content.find(start_pattern)
-            
-            if start_pos == -1:
-                return []
-            
-            start_pos += len(start_pattern)
-            
-            # 查找下一个部分标题
-            end_pos = len(content)
-            for next_section in ['详细内容总结', '话题标签', '标题']:
-                if next_section != '备选标题':
-                    next_pos = content.find(f"{next_section}：", start_pos)
-                    if next_pos != -1 and next_pos < end_pos:
-                        end_pos = next_pos
-                    
-                    next_pos = content.find(f"{next_section}:", start_pos)
-                    if next_pos != -1 and next_pos < end_pos:
-                        end_pos = next_pos
-            
-            section_content = content[start_pos:end_pos].strip()
-            if not section_content:
-                return []
-            
-            # 解析标题列表
-            titles = []
-            # 尝试不同的分隔符
-            for separator in [',', '，', '\n']:
-                if separator in section_content:
-                    titles = [t.strip() for t in section_content.split(separator) if t.strip()]
-                    break
-            
-            if not titles:
-                titles = [section_content.strip()]
-            
-            return titles
-            
-        except Exception as e:
-            logger.warning(f"提取备选标题失败: {str(e)}")
-            return []
-    
-    def _extract_tags(self, content: str) -> List[str]:
-        """提取话题标签"""
-        try:
-            # 查找话题标签部分
-            start_pattern = "话题标签："
-            start_pos = content.find(start_pattern)
-            
-            if start_pos == -1:
-                start_pattern = "话题标签:"
-                start_pos = content.find(start_pattern)
-            
-            if start_pos == -1:
-                return []
-            
-            start_pos += len(start_pattern)
-            
-            # 查找下一个部分标题
-            end_pos = len(content)
-            for next_section in ['标题', '备选标题', '详细内容总结']:
-                if next_section != '话题标签':
-                    next_pos = content.find(f"{next_section}：", start_pos)
-                    if next_pos != -1 and next_pos < end_pos:
-                        end_pos = next_pos
-                    
-                    next_pos = content.find(f"{next_section}:", start_pos)
-                    if next_pos != -1 and next_pos < end_pos:
-                        end_pos = next_pos
-            
-            section_content = content[start_pos:end_pos].strip()
-            if not section_content:
-                return []
-            
-            # 解析标签列表
-            tags = []
-            # 尝试不同的分隔符
-            for separator in [',', '，', '\n']:
-                if separator in section_content:
-                    tags = [t.strip() for t in section_content.split(separator) if t.strip()]
-                    break
-            
-            if not tags:
-                tags = [section_content.strip()]
-            
-            return tags
-            
-        except Exception as e:
-            logger.warning(f"提取话题标签失败: {str(e)}")
-            return []
-    
-    def _extract_section(self, content: str, section_name: str) -> str:
-        """提取内容中的特定部分"""
-        try:
-            # 查找部分标题
-            start_pattern = f"{section_name}："
-            start_pos = content.find(start_pattern)
-            
-            if start_pos == -1:
-                start_pattern = f"{section_name}:"
-                start_pos = content.find(start_pattern)
-            
-            if start_pos == -1:
-                return "NOT_PROVIDED"
-            
-            start_pos += len(start_pattern)
-            
-            # 查找下一个部分标题
-            end_pos = len(content)
-            for next_section in ['标题', '备选标题', '详细内容总结', '话题标签']:
-                if next_section != section_name:
-                    next_pos = content.find(f"{next_section}：", start_pos)
-                    if next_pos != -1 and next_pos < end_pos:
-                        end_pos = next_pos
-                    
-                    next_pos = content.find(f"{next_section}:", start_pos)
-                    if next_pos != -1 and next_pos < end_pos:
-                        end_pos = next_pos
-            
-            section_content = content[start_pos:end_pos].strip()
-            return section_content if section_content else "NOT_PROVIDED"
-            
-        except Exception as e:
-            logger.warning(f"提取部分内容失败: {str(e)}")
-            return "NOT_PROVIDED"
+        """解析单个内容版本（与流式生成共用 StreamingContentParser 的解析规则）"""
+        return StreamingContentParser.parse(content or "")
     
     def save_output(self, output: Dict[str, Any], query: str) -> List[str]:
         """保存输出到文件 - 每篇文章分开存储"""
@@ -263,12 +224,15 @@ class OutputFormatter:
             self.ensure_output_dir(output_dir)
             
             saved_files = []
+            draft_slots = self._load_draft_slots()
+            slots_changed = False
             
             # 为每篇论文单独保存文件
             news_content = output.get('news_content', [])
             for i, news in enumerate(news_content):
                 paper_info = news.get('paper_info', {})
                 paper_id = paper_info.get('paper_id', f'paper_{i+1}')
+                draft = news.get('draft', False)
                 
                 # 构建单篇论文的输出数据
                 single_paper_output = {
@@ -277,25 +241,45 @@ class OutputFormatter:
                     'query': query,
                     'paper_info': paper_info,
                     'content': news.get('content', {}),
+                    'draft': draft,
+                    'content_source': news.get('content_source', 'full_text'),
+                    'repairs': news.get('repairs', []),
+                    'variants': news.get('variants', []),
                 }
                 
-                # 生成文件名
-                base_filename = f"news_{paper_id}_{self.timestamp}"
+                # 生成文件名；该论文已有摘要草稿时写入草稿的位置（覆盖草稿）
+                slot_key = VERSION_SUFFIX_PATTERN.sub('', paper_id)
+                slot = draft_slots.get(slot_key)
+                if slot and os.path.exists(slot + ".json"):
+                    base_path = slot
+                else:
+                    base_path = os.path.join(output_dir, f"news_{paper_id}_{self.timestamp}")
+                base_filename = os.path.basename(base_path)
                 
                 # 保存JSON格式
-                json_path = os.path.join(output_dir, f"{base_filename}.json")
+                json_path = f"{base_path}.json"
                 with open(json_path, 'w', encoding='utf-8') as f:
                     json.dump(single_paper_output, f, ensure_ascii=False, indent=2)
                 
                 # 保存Markdown格式
-                md_path = os.path.join(output_dir, f"{base_filename}.md")
+                md_path = f"{base_path}.md"
                 md_content = self._generate_single_paper_markdown(single_paper_output)
                 with open(md_path, 'w', encoding='utf-8') as f:
                     f.write(md_content)
                 
+                if draft:
+                    draft_slots[slot_key] = base_path
+                    slots_changed = True
+                elif slot_key in draft_slots:
+                    del draft_slots[slot_key]
+                    slots_changed = True
+                    logger.info(f"论文 {paper_id} 的摘要草稿已由正文版本覆盖: {base_filename}")
+                
                 saved_files.append(base_filename)
-                logger.info(f"论文 {paper_id} 输出保存完成: {base_filename}")
+                logger.info(f"论文 {paper_id} 输出保存完成: {base_filename}{'（摘要草稿）' if draft else ''}")
             
+            if slots_changed:
+                self._save_draft_slots(draft_slots)
             logger.info(f"所有输出保存完成，共 {len(saved_files)} 个文件")
             return saved_files
             
@@ -303,6 +287,20 @@ class OutputFormatter:
             logger.error(f"保存输出时出错: {str(e)}")
             return []
     
+    def _load_draft_slots(self) -> Dict[str, str]:
+        try:
+            with open(self.draft_slots_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_draft_slots(self, draft_slots: Dict[str, str]):
+        os.makedirs(self.base_output_dir, exist_ok=True)
+        tmp_path = self.draft_slots_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(draft_slots, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.draft_slots_path)
+
     def _generate_single_paper_markdown(self, output: Dict[str, Any]) -> str:
         """生成单篇论文的Markdown内容"""
         try:
@@ -310,6 +308,8 @@ class OutputFormatter:
             
             md_content = f"# {output.get('title', '')}\n\n"
             md_content += f"生成时间: {output.get('generation_time', '')}\n\n"
+            if output.get('draft'):
+                md_content += "> 草稿：仅依据论文摘要生成，正文解读生成后将覆盖本文件\n\n"
             
             # 论文基本信息
             md_content += "## 📄 论文信息\n\n"
@@ -328,10 +328,16 @@ class OutputFormatter:
             
             md_content += "---\n\n"
             
-            # 三个版本的内容
-            content_data = output.get('content', {})
-            if content_data.get('title') != 'NOT_PROVIDED':
-                md_content += f"## {content_data.get('title', '')}\n\n"
+            # 多版本模式下依次输出各版本，否则只输出主版本
+            variants = output.get('variants') or [{'style': None, 'content': output.get('content', {})}]
+            for number, variant in enumerate(variants, 1):
+                content_data = variant['content']
+                if content_data.get('title') == 'NOT_PROVIDED':
+                    continue
+                if len(variants) > 1:
+                    md_content += f"## 版本{number}（{variant['style']}）: {content_data.get('title', '')}\n\n"
+                else:
+                    md_content += f"## {content_data.get('title', '')}\n\n"
                 
                 # 备选标题
                 alt_titles = content_data.get('alternative_titles', [])
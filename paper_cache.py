@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+结构化论文缓存模块
+将 parse_arxiv_html_stream 的结果（{"title", "sections"}）按 arXiv id+版本 以msgpack二进制格式持久化，
+读取时只解码文件头中的标题大纲，一级章节在被访问时才解码
+
+文件格式: [4字节头部长度][msgpack头部][各一级章节的msgpack数据块...]
+头部: {"format": 版本, "title": 论文标题, "outline": 标题大纲, "offsets": [(起始, 长度), ...]}
+"""
+
+import os
+import struct
+import logging
+from collections.abc import Sequence
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# msgpack为可选依赖，未安装时退回JSON编码（体积更大、解码更慢）
+try:
+    import msgpack
+
+    def _packb(obj) -> bytes:
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def _unpackb(data) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+    CACHE_SUFFIX = ".msgpack"
+except ImportError:
+    import json
+
+    def _packb(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def _unpackb(data) -> Any:
+        return json.loads(bytes(data).decode('utf-8'))
+
+    CACHE_SUFFIX = ".json"
+
+# 解析逻辑或缓存格式变化时递增，旧缓存自动失效
+STRUCTURE_FORMAT_VERSION = 1
+
+HEADER_LENGTH = struct.Struct(">I")
+
+
+def section_outline(section: Dict[str, Any]) -> List[Any]:
+    """章节的标题大纲: [标题, [子章节大纲...]]，段落节点不计入"""
+    return [
+        section.get("title") or "",
+        [section_outline(sub) for sub in section.get("subsections", []) if "text" not in sub],
+    ]
+
+
+class LazySections(Sequence):
+    """按需解码的一级章节列表，行为与普通章节列表一致"""
+
+    def __init__(self, data: memoryview, outline: List[Any], offsets: List[List[int]]):
+        self._data = data
+        self.outline = outline
+        self._offsets = offsets
+        self._decoded = {}  # {下标: 已解码的章节}
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index not in self._decoded:
+            start, length = self._offsets[index]
+            self._decoded[index] = _unpackb(self._data[start:start + length])
+        return self._decoded[index]
+
+    @property
+    def decoded_count(self) -> int:
+        """已解码的一级章节数"""
+        return len(self._decoded)
+
+    def titles(self) -> List[str]:
+        """先序遍历的全部章节标题（只读大纲，不解码章节）"""
+        titles = []
+        stack = list(reversed(self.outline))
+        while stack:
+            title, children = stack.pop()
+            if title:
+                titles.append(title)
+            stack.extend(reversed(children))
+        return titles
+
+    def first_match(self, keyword: str) -> Optional[int]:
+        """
+        先序遍历中第一个标题包含keyword的章节所在的一级章节下标（只读大纲）
+
+        Args:
+            keyword: 小写关键词
+        """
+        if not keyword:
+            return 0 if len(self) else None
+        for index, node in enumerate(self.outline):
+            stack = [node]
+            while stack:
+                title, children = stack.pop()
+                if keyword in title.lower():
+                    return index
+                stack.extend(children)
+        return None
+
+
+class StructuredPaperCache:
+    """结构化论文磁盘缓存"""
+
+    def __init__(self, cache_dir: str = "cache/structured", max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes  # 缓存总大小上限（字节）
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evicted': 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + CACHE_SUFFIX)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存的结构化论文
+
+        Returns:
+            {"title": 标题, "sections": LazySections}，未命中返回None
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = memoryview(f.read())
+            (header_length,) = HEADER_LENGTH.unpack_from(data, 0)
+            body_start = HEADER_LENGTH.size + header_length
+            header = _unpackb(data[HEADER_LENGTH.size:body_start])
+        except FileNotFoundError:
+            self.stats['misses'] += 1
+            return None
+        except Exception as e:
+            logger.warning(f"结构化论文缓存 {key} 读取失败: {str(e)}")
+            self.stats['misses'] += 1
+            return None
+
+        if header.get("format") != STRUCTURE_FORMAT_VERSION:
+            self.stats['misses'] += 1
+            return None
+
+        self.stats['hits'] += 1
+        try:
+            os.utime(path)  # 更新访问时间，用于LRU淘汰
+        except OSError:
+            pass
+        logger.info(f"结构化论文缓存命中: {key}")
+        return {
+            "title": header["title"],
+            "sections": LazySections(data[body_start:], header["outline"], header["offsets"]),
+        }
+
+    def put(self, key: str, paper: Dict[str, Any]):
+        """写入结构化论文（各一级章节单独编码，便于按需解码）"""
+        sections = paper.get("sections", [])
+        blocks = [_packb(section) for section in sections]
+        offsets = []
+        position = 0
+        for block in blocks:
+            offsets.append([position, len(block)])
+            position += len(block)
+
+        header = _packb({
+            "format": STRUCTURE_FORMAT_VERSION,
+            "title": paper.get("title"),
+            "outline": [section_outline(section) for section in sections],
+            "offsets": offsets,
+        })
+
+        path = self._path(key)
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(HEADER_LENGTH.pack(len(header)))
+                f.write(header)
+                for block in blocks:
+                    f.write(block)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"结构化论文缓存 {key} 写入失败: {str(e)}")
+            return
+        self.stats['stores'] += 1
+        self._evict()
+
+    def _evict(self):
+        """缓存总大小超过上限时，按最近访问时间从旧到新淘汰"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+            self.stats['evicted'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """缓存命中统计"""
+        return dict(self.stats)
@@ -8,18 +8,29 @@
 import logging
 import asyncio
 from typing import Dict, Any, List, Optional
-from dashscope import Generation
+from llm_client import LLMClient, CircuitOpenError
+from structure_prefetcher import StructurePrefetcher
 
 logger = logging.getLogger(__name__)
 
 class PaperQualityScorer:
     """论文质量打分器 - 规则层+LLM层混合评分"""
     
-    def __init__(self, api_key: str, w_rule: float = 0.3, w_llm: float = 0.7):
+    def __init__(self, api_key: str, w_rule: float = 0.3, w_llm: float = 0.7, llm_client: LLMClient = None,
+                 prefetcher: StructurePrefetcher = None, prefetch_stage: str = 'score',
+                 prefetch_min_score: Optional[float] = None, min_score: float = 6.0):
         self.api_key = api_key
-        self.model = "qwen-plus-2025-07-14"  # Qwen3
+        # 共享LLM调用客户端（模型路由+对冲请求+熔断器），评分走 scoring 路由
+        self.llm_client = llm_client or LLMClient(api_key)
         # self.w_rule = w_rule  # 规则层 重
-        self.min_score = 6.0
+        self.min_score = min_score  # LLM得分低于该值的论文被过滤
+        # 正文预取：rule 在通过规则层时即预取（投机，LLM评分期间完成下载解析，未达分数线再取消），
+        # score 在LLM得分达到 prefetch_min_score（默认 min_score）后预取
+        if prefetch_stage not in ('rule', 'score'):
+            raise ValueError(f"未知的预取时机: {prefetch_stage}")
+        self.prefetcher = prefetcher
+        self.prefetch_stage = prefetch_stage
+        self.prefetch_min_score = prefetch_min_score
         
         # 顶会列表（可根据需要扩展）
         self.top_conferences = {
@@ -193,7 +204,10 @@ class PaperQualityScorer:
                 "paper_type": llm_result.get('paper_type', 'method'),
                 "paper_type_reason": llm_result.get('paper_type_reason', '默认为method'),
             }
-            
+
+        except CircuitOpenError:
+            raise
+
         except Exception as e:
             logger.error(f"LLM评分失败: {str(e)}")
             return {
@@ -221,10 +235,13 @@ class PaperQualityScorer:
                     "llm_details": {}
 
                 }
+            if self.prefetcher is not None and self.prefetch_stage == 'rule':
+                self.prefetcher.prefetch(paper)
             
             # 2. LLM层评分（包含文章类型判断）
             llm_result = await self.llm_filter(paper)
             llm_score = llm_result["llm_score"]
+            self._update_prefetch(paper, llm_score)
             llm_details = llm_result["llm_details"]
             paper_type = llm_result["paper_type"]
             paper_type_reason = llm_result["paper_type_reason"]
@@ -246,7 +263,22 @@ class PaperQualityScorer:
             
             logger.info(f"论文 {paper.get('id', 'unknown')} 质量评估完成 - 得分: {llm_score:.2f}, 类型: {paper_type}")
             return score_result
-            
+
+        except CircuitOpenError:
+            # 熔断期间推迟评分，而不是按0分过滤
+            if self.prefetcher is not None:
+                self.prefetcher.discard(paper)
+            logger.warning(f"LLM熔断中，论文 {paper.get('id', 'unknown')} 推迟评分")
+            return {
+                    "paper_id": paper.get('id', ''),
+                    "paper_title": paper.get('title', ''),
+                    "rule_passed": filter_result["passed"],
+                    "rule_details": filter_result["details"],
+                    "llm_score": 0.0,
+                    "llm_details": {},
+                    "deferred": True,
+                }
+
         except Exception as e:
             logger.error(f"评估论文质量时出错: {str(e)}")
             return {
@@ -263,12 +295,23 @@ class PaperQualityScorer:
                 }
 
     
+    def _update_prefetch(self, paper: Dict[str, Any], llm_score: float):
+        """得分达到分数线的论文预取正文，未达到的取消投机预取"""
+        if self.prefetcher is None:
+            return
+        min_score = self.min_score if self.prefetch_min_score is None else self.prefetch_min_score
+        if llm_score >= min_score:
+            self.prefetcher.prefetch(paper)
+        else:
+            self.prefetcher.discard(paper)
+
     async def batch_score_papers(self, papers: List[Dict[str, Any]]) -> Dict[str, Any]:
         """批量评估论文质量并过滤低质量论文"""
         try:
             logger.info(f"开始批量评估 {len(papers)} 篇论文的质量")
             
             scored_papers = []
+            deferred_papers = []
             rule_filtered_count = 0
             score_filtered_count = 0
             total_processed = 0
@@ -279,6 +322,11 @@ class PaperQualityScorer:
                 # 评估单篇论文
                 score_result = await self._score_paper(paper)
                 total_processed += 1
+
+                # 熔断推迟的论文单独记录，不计入过滤统计
+                if score_result.get('deferred'):
+                    deferred_papers.append(paper)
+                    continue
                 
                 # 检查是否被规则层筛选掉
                 rule_passed = score_result.get('rule_passed', False)
@@ -294,6 +342,9 @@ class PaperQualityScorer:
                         logger.info(f"论文 {paper.get('id', 'unknown')} 通过质量筛选 (总分: {total_score:.2f})")
                     else:
                         score_filtered_count += 1
+                        # 预取分数线低于过滤分数线时，已预取的正文不会再被使用
+                        if self.prefetcher is not None:
+                            self.prefetcher.discard(paper)
                         logger.info(f"论文 {paper.get('id', 'unknown')} 未通过质量筛选 (总分: {total_score:.2f})")
                 
                 else:
@@ -305,14 +356,16 @@ class PaperQualityScorer:
                 # 添加延迟避免API限制
                 await asyncio.sleep(1)
             
-            logger.info(f"批量评估完成，通过筛选: {len(scored_papers)} 篇，规则层过滤: {rule_filtered_count} 篇，分数过滤: {score_filtered_count} 篇")
+            logger.info(f"批量评估完成，通过筛选: {len(scored_papers)} 篇，规则层过滤: {rule_filtered_count} 篇，分数过滤: {score_filtered_count} 篇，推迟: {len(deferred_papers)} 篇")
             
             return {
                 'scored_papers': scored_papers,
+                'deferred_papers': deferred_papers,
                 'statistics': {
                     'total_processed': total_processed,
                     'rule_filtered': rule_filtered_count,
                     'score_filtered': score_filtered_count,
+                    'deferred': len(deferred_papers),
                     'passed': len(scored_papers),
                     'rule_filter_rate': rule_filtered_count / total_processed if total_processed > 0 else 0,
                     'score_filter_rate': score_filtered_count / total_processed if total_processed > 0 else 0,
@@ -324,10 +377,12 @@ class PaperQualityScorer:
             logger.error(f"批量评估论文质量时出错: {str(e)}")
             return {
                 'scored_papers': [],
+                'deferred_papers': [],
                 'statistics': {
                     'total_processed': 0,
                     'rule_filtered': 0,
                     'score_filtered': 0,
+                    'deferred': 0,
                     'passed': 0,
                     'rule_filter_rate': 0,
                     'score_filter_rate': 0,
@@ -402,39 +457,13 @@ class PaperQualityScorer:
     async def _call_qwen_api(self, prompt: str) -> str:
         """调用千问API"""
         try:
-            # 使用异步方式调用千问API
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, 
-                self._sync_call_qwen_api, 
-                prompt
-            )
-            return response
-            
+            # 降低温度以获得更稳定的评分
+            return await self.llm_client.call(prompt, route='scoring', max_tokens=2000, temperature=0.3)
+
         except Exception as e:
             logger.error(f"调用千问API失败: {str(e)}")
             raise e
     
-    def _sync_call_qwen_api(self, prompt: str) -> str:
-        """同步调用千问API"""
-        try:
-            response = Generation.call(
-                model=self.model,
-                prompt=prompt,
-                api_key=self.api_key,
-                max_tokens=2000,
-                temperature=0.3  # 降低温度以获得更稳定的评分
-            )
-            
-            if response.status_code == 200:
-                return response.output.text
-            else:
-                raise Exception(f"API调用失败: {response.message}")
-                
-        except Exception as e:
-            logger.error(f"千问API调用失败: {str(e)}")
-            raise e
-    
     def generate_quality_report(self, batch_result: Dict[str, Any]) -> Dict[str, Any]:
         """生成质量评估报告"""
         try:
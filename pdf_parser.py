@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF解析模块
+arXiv未提供HTML（新提交尚未转换或LaTeXML转换失败）时，从PDF提取正文：
+按页分组在进程池中提取文本行及字号/粗体信息，再按编号与字号规则重建章节标题，
+输出与 parse_arxiv_html_bytes 相同结构的章节树，无需调用LLM识别结构
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+# 编号标题，如 "3 Method", "3.1. Overview", "A.2 Proofs", "IV. Experiments"
+HEADING_NUMBER_PATTERN = re.compile(r'^(?:(\d{1,2}(?:\.\d{1,2})*)|([A-H](?:\.\d{1,2})*)|([IVX]{1,5}))\.?\s+([A-Z].*)$')
+# 不带编号、但按惯例作为一级标题的章节名
+UNNUMBERED_HEADINGS = {
+    'abstract', 'introduction', 'related work', 'conclusion', 'conclusions', 'discussion', 'limitations',
+    'references', 'bibliography', 'acknowledgements', 'acknowledgments', 'acknowledgement', 'appendix',
+}
+# 之后的正文不再收集，直到下一个标题（摘要已在论文元数据中，参考文献条目对生成无用）
+SKIPPED_HEADINGS = {'abstract', 'references', 'bibliography'}
+NUMBER_ONLY_PATTERN = re.compile(r'^(?:\d{1,2}(?:\.\d{1,2})*|[A-H](?:\.\d{1,2})*)\.?$')
+CAPTION_PATTERN = re.compile(r'^(Figure|Fig\.|Table)\s*\d+\s*[:.|]', re.IGNORECASE)
+CITATION_PATTERN = re.compile(r'\[\s*\d+(?:\s*[,–-]\s*\d+)*\s*\]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+LIGATURES = str.maketrans({'ﬁ': 'fi', 'ﬂ': 'fl', 'ﬀ': 'ff', 'ﬃ': 'ffi', 'ﬄ': 'ffl'})
+ROMAN_VALUES = {'I': 1, 'V': 5, 'X': 10}
+
+# 字号比正文大该值以上视为“大字”（单位pt）
+SIZE_MARGIN = 0.8
+MAX_HEADING_CHARS = 120
+MAX_HEADING_WORDS = 16
+
+# 文本行: (文本, 字号, 是否粗体, 是否为文本块首行)
+Line = Tuple[str, float, bool, bool]
+
+
+def page_ranges(page_count: int, workers: int) -> List[Tuple[int, int]]:
+    """将页码按进程数切分为连续的 [起始, 结束) 区间"""
+    workers = max(1, min(workers, page_count))
+    size = -(-page_count // workers)
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def count_pdf_pages(pdf_bytes: bytes) -> int:
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return doc.page_count
+
+
+def extract_pdf_lines(pdf_bytes: bytes, start: int, stop: int) -> List[List[Line]]:
+    """
+    提取 [start, stop) 页的文本行（进程池工作函数，需定义在模块顶层以便pickle）
+
+    Returns:
+        每页的文本行列表
+    """
+    pages = []
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        for page_number in range(start, min(stop, doc.page_count)):
+            lines = []
+            for block in doc[page_number].get_text("dict", flags=fitz.TEXTFLAGS_TEXT)["blocks"]:
+                first = True
+                for line in block.get("lines", []):
+                    # 跳过竖排文字（如页边的arXiv编号水印）
+                    if abs(line["dir"][0] - 1.0) > 1e-3:
+                        continue
+                    spans = [span for span in line["spans"] if span["text"].strip()]
+                    if not spans:
+                        continue
+                    text = "".join(span["text"] for span in line["spans"]).strip()
+                    # 以行内最长片段的字号为准，避免上下标影响
+                    size = max(spans, key=lambda span: len(span["text"]))["size"]
+                    bold = all(span["flags"] & fitz.TEXT_FONT_BOLD or "bold" in span["font"].lower()
+                               for span in spans)
+                    lines.append((text, round(size, 1), bool(bold), first))
+                    first = False
+            pages.append(lines)
+    return pages
+
+
+def body_font_size(lines: List[Line]) -> float:
+    """正文字号：按字符数加权出现最多的字号"""
+    counter = Counter()
+    for text, size, _, _ in lines:
+        counter[size] += len(text)
+    return counter.most_common(1)[0][0] if counter else 0.0
+
+
+class PDFSectionBuilder:
+    """按字号/粗体与编号规则从文本行重建章节树"""
+
+    def __init__(self, body_size: float):
+        self.body_size = body_size
+        # 当前编号，用于排除编号倒退或跳号的误判标题（如以 "A "、"I " 开头的强调行）
+        self.numbering = []  # 数字编号，如 [3, 1]
+        self.roman = 0  # 罗马数字一级编号，如 "IV." 为4
+        self.letter = 0  # 字母编号，如 "B" 为2：附录，或罗马数字编号论文中的二级章节
+        self.letter_numbering = []  # 字母编号下的数字子编号，如 "A.2" 为 [2]
+        self.section_style = None  # 数字一级标题的 (字号, 是否粗体)，附录标题需与之一致
+
+    def heading(self, line: Line) -> Optional[Tuple[int, str]]:
+        """
+        判断文本行是否为章节标题
+
+        Returns:
+            (层级, 标题)，一级章节为1；不是标题时返回None
+        """
+        text = line[0]
+        if len(text) > MAX_HEADING_CHARS or len(text.split()) > MAX_HEADING_WORDS or text[-1] in '.,;:':
+            return None
+        if not self.emphasized(line):
+            return None
+
+        match = HEADING_NUMBER_PATTERN.match(text)
+        if match:
+            digits, letters, roman, _ = match.groups()
+            if digits:
+                numbering = [int(part) for part in digits.split('.')]
+                if not _follows(numbering, self.numbering):
+                    return None
+                self.numbering = numbering
+                if len(numbering) == 1:
+                    self.section_style = line[1:3]
+                return len(numbering), text
+            if letters:
+                return self._letter_heading(letters, line)
+            value = _roman_value(roman)
+            if value != self.roman + 1:
+                return None
+            self.roman, self.letter, self.letter_numbering = value, 0, []
+            return 1, text
+
+        if normalize(text) in UNNUMBERED_HEADINGS:
+            return 1, text
+        return None
+
+    def emphasized(self, line: Line) -> bool:
+        """字号明显大于正文，或与正文同字号的粗体"""
+        _, size, bold, _ = line
+        return size >= self.body_size + SIZE_MARGIN or (bold and size >= self.body_size - 0.2)
+
+    def _letter_heading(self, letters: str, line: Line) -> Optional[Tuple[int, str]]:
+        """
+        字母编号标题：罗马数字编号的论文中为二级章节（"II. Method" 下的 "A. Overview"），
+        否则为数字章节之后、与数字一级标题同样式的附录（"A Proofs"、"A.1 Lemma"）；字母需按顺序接续
+        """
+        text = line[0]
+        letter, *parts = letters.split('.')
+        index = ord(letter) - ord('A') + 1
+        in_roman = self.roman > 0 and not self.numbering
+        if not parts:
+            if index != self.letter + 1:
+                return None
+            if not in_roman and (not self.numbering or line[1:3] != self.section_style):
+                return None
+            self.letter, self.letter_numbering = index, []
+            return (2 if in_roman else 1), text
+
+        numbering = [int(part) for part in parts]
+        if in_roman or index != self.letter or not _follows(numbering, self.letter_numbering):
+            return None
+        self.letter_numbering = numbering
+        return len(numbering) + 1, text
+
+
+def _follows(numbering: List[int], current: List[int]) -> bool:
+    """
+    编号需接续当前编号：前缀与当前章节一致，且同层级的最后一位递增（"3.1" 不能出现在 "3.2" 之后）；
+    进入更深层级（"3" 之后的 "3.1"）时不限制
+    """
+    depth = len(numbering) - 1
+    if current[:depth] != numbering[:depth]:
+        return False
+    return len(current) <= depth or numbering[-1] > current[depth]
+
+
+def _roman_value(numeral: str) -> int:
+    values = [ROMAN_VALUES[char] for char in numeral]
+    return sum(-value if value < following else value
+               for value, following in zip(values, values[1:] + [0]))
+
+
+def normalize(title: str) -> str:
+    return WHITESPACE_PATTERN.sub(' ', title).strip().casefold()
+
+
+def clean_text(text: str) -> str:
+    """移除参考文献标记并清理多余空格"""
+    text = CITATION_PATTERN.sub('', text.translate(LIGATURES))
+    return WHITESPACE_PATTERN.sub(' ', text).strip()
+
+
+def _new_section(title=None) -> Dict[str, Any]:
+    return {
+        "title": title,
+        "figures": [],
+        "tables": [],
+        "subsections": []
+    }
+
+
+def build_pdf_paper(pages: List[List[Line]]) -> Dict[str, Any]:
+    """
+    由各页文本行构建论文数据结构
+
+    - 首页最大字号的连续行作为标题
+    - 第一个章节标题之前的内容（作者、单位、摘要）不收集
+    - 图表标题块放入当前章节的 figures / tables，其余文本块按段落追加到 subsections
+
+    Returns:
+        {"title": 标题, "sections": 章节树}
+    """
+    lines = [line for page in pages for line in page]
+    body_size = body_font_size(lines)
+    first_page = pages[0] if pages else []
+    # 标题行不参与标题判断（如 "A Simple Framework for ..." 会被误判为附录A）
+    title_lines = _title_lines(first_page, body_size)
+    title = WHITESPACE_PATTERN.sub(' ', " ".join(first_page[index][0] for index in title_lines)).strip()
+    paper = {"title": title or None, "sections": []}
+    builder = PDFSectionBuilder(body_size)
+
+    virtual_root = _new_section()
+    stack = [(0, virtual_root)]
+    skipping = True  # 第一个章节标题之前跳过
+    caption = None
+    paragraph = []
+
+    def _flush():
+        nonlocal caption
+        text = clean_text(_join_lines(paragraph))
+        paragraph.clear()
+        if not text or skipping or len(stack) == 1:
+            caption = None
+            return
+        section = stack[-1][1]
+        if caption == 'table':
+            section["tables"].append({"id": None, "caption": text, "content": ""})
+        elif caption == 'figure':
+            section["figures"].append({"id": None, "url": None, "caption": text})
+        else:
+            section["subsections"].append({"text": text})
+        caption = None
+
+    heading_line = None  # 上一个标题行，标题换行时续接
+    paragraph_size = None
+    pending_number = None  # 单独成行的标题编号，如 "3" 与 "Method" 分处两行
+    for index, line in enumerate(lines):
+        if index in title_lines:
+            continue
+        text, size, bold, block_start = line
+        if NUMBER_ONLY_PATTERN.match(text):
+            if builder.emphasized(line):
+                pending_number = line
+            continue  # 编号或页码
+        if pending_number is not None:
+            if (size, bold) == pending_number[1:3]:
+                text = pending_number[0].rstrip('.') + " " + text
+                line = (text, size, bold, pending_number[3])
+            pending_number = None
+        if heading_line is not None and not block_start and (size, bold) == heading_line[1:3]:
+            stack[-1][1]["title"] += " " + text
+            continue
+        heading_line = None
+        heading = builder.heading(line)
+        if heading is not None:
+            _flush()
+            level, title = heading
+            while stack[-1][0] >= level:
+                stack.pop()
+            section = _new_section(title=title)
+            stack[-1][1]["subsections"].append(section)
+            stack.append((level, section))
+            heading_line = line
+            skipping = normalize(_strip_number(title)) in SKIPPED_HEADINGS
+            continue
+
+        # 文本块开头、图表标题开头或字号变化处分段（相邻文本框可能被合并为同一块）
+        caption_match = CAPTION_PATTERN.match(text)
+        if block_start or caption_match or size != paragraph_size:
+            _flush()
+            if caption_match:
+                caption = 'table' if caption_match.group(1).lower() == 'table' else 'figure'
+        paragraph.append(text)
+        paragraph_size = size
+    _flush()
+
+    paper["sections"] = virtual_root["subsections"]
+    return paper
+
+
+def _title_lines(first_page: List[Line], body_size: float) -> List[int]:
+    """首页字号最大的连续行（标题）的行号"""
+    if not first_page:
+        return []
+    max_size = max(size for _, size, _, _ in first_page)
+    if max_size < body_size + SIZE_MARGIN:
+        return []
+    indices = []
+    for index, (_, size, _, _) in enumerate(first_page):
+        if size == max_size:
+            indices.append(index)
+        elif indices:
+            break
+    return indices
+
+
+def _strip_number(title: str) -> str:
+    match = HEADING_NUMBER_PATTERN.match(title)
+    return match.group(4) if match else title
+
+
+def _join_lines(lines: List[str]) -> str:
+    """拼接同一段落的各行，处理行尾连字符断词"""
+    text = ""
+    for line in lines:
+        if text.endswith('-') and line[:1].islower():
+            text = text[:-1] + line
+        elif text:
+            text += " " + line
+        else:
+            text = line
+    return text
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提示词预算模块
+本地快速估算token数，并按配额裁剪引言/方法/结论等章节文本
+"""
+
+import re
+import logging
+from typing import Dict, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 中日韩字符约1个token，其余文本约4个字符1个token（千问分词器的经验值）
+CJK_PATTERN = re.compile(r'[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]')
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?。！？])\s+')
+NUMBER_PATTERN = re.compile(r'\d')
+
+# 章节文本段落分隔符，与 ContentGenerator._collect_texts 保持一致
+PARAGRAPH_SEPARATOR = '/n'
+
+
+def estimate_tokens(text: str) -> int:
+    """快速估算文本的token数"""
+    if not text:
+        return 0
+    cjk_count = len(CJK_PATTERN.findall(text))
+    return cjk_count + (len(text) - cjk_count + 3) // 4
+
+
+class PromptBudgeter:
+    """按token配额裁剪章节文本：优先保留开头段落和含数字的句子"""
+
+    DEFAULT_BUDGETS = {
+        'introduction': 1200,
+        'method': 1500,
+        'conclusion': 600,
+    }
+
+    def __init__(self, budgets: Dict[str, int] = None, leading_paragraphs: int = 2):
+        self.budgets = dict(self.DEFAULT_BUDGETS)
+        if budgets:
+            self.budgets.update(budgets)
+        self.leading_paragraphs = leading_paragraphs  # 优先完整保留的开头段落数
+
+    def apply(self, sections: Dict[str, str]) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """
+        按配额裁剪各章节
+
+        Args:
+            sections: {章节名: 文本}，如 {'introduction': '...', 'method': '...'}
+
+        Returns:
+            (裁剪后的章节, 节省统计)
+        """
+        trimmed = {}
+        report = {'sections': {}, 'original_tokens': 0, 'trimmed_tokens': 0}
+
+        for name, text in sections.items():
+            budget = self.budgets.get(name)
+            original_tokens = estimate_tokens(text)
+            trimmed[name] = self.trim(text, budget) if budget else text
+            trimmed_tokens = estimate_tokens(trimmed[name])
+
+            report['sections'][name] = {
+                'budget': budget,
+                'original_tokens': original_tokens,
+                'trimmed_tokens': trimmed_tokens,
+            }
+            report['original_tokens'] += original_tokens
+            report['trimmed_tokens'] += trimmed_tokens
+
+        report['saved_tokens'] = report['original_tokens'] - report['trimmed_tokens']
+        return trimmed, report
+
+    def trim(self, text: str, budget: int) -> str:
+        """将文本裁剪到budget个token以内，保持原有顺序"""
+        if estimate_tokens(text) <= budget:
+            return text
+
+        paragraphs = [p for p in text.split(PARAGRAPH_SEPARATOR) if p.strip()]
+        sentences = [SENTENCE_SPLIT_PATTERN.split(p) for p in paragraphs]
+        costs = [[estimate_tokens(s) + 1 for s in para] for para in sentences]
+
+        selected = set()
+        remaining = budget
+
+        excluded = set()
+
+        def _select(candidates: List[Tuple[int, int]], contiguous: bool = False):
+            """
+            按顺序加入放得下的句子
+
+            contiguous 为True时遇到第一个放不下的句子即停止，其后不含数字的句子不再加入；
+            含数字的句子仍交给下一步按配额挑选
+            """
+            nonlocal remaining
+            for index, key in enumerate(candidates):
+                if key in selected or key in excluded:
+                    continue
+                cost = costs[key[0]][key[1]]
+                if cost > remaining:
+                    if contiguous:
+                        excluded.update(k for k in candidates[index:]
+                                        if not NUMBER_PATTERN.search(sentences[k[0]][k[1]]))
+                        break
+                    continue
+                selected.add(key)
+                remaining -= cost
+
+        # 1. 开头段落（逐句连续加入，放不下时截断，只保留其前部，不留空洞）
+        leading = [(i, j) for i in range(min(self.leading_paragraphs, len(sentences)))
+                   for j in range(len(sentences[i]))]
+        _select(leading, contiguous=True)
+
+        # 2. 含数字的句子（提示词要求用【】引用原句）
+        numeric = [(i, j) for i, para in enumerate(sentences)
+                   for j, sentence in enumerate(para) if NUMBER_PATTERN.search(sentence)]
+        _select(numeric)
+
+        # 3. 剩余配额按原文顺序填充
+        rest = [(i, j) for i, para in enumerate(sentences) for j in range(len(para))]
+        _select(rest)
+
+        kept_paragraphs = []
+        for i, para in enumerate(sentences):
+            kept = [sentence for j, sentence in enumerate(para) if (i, j) in selected]
+            if kept:
+                kept_paragraphs.append(' '.join(kept))
+        return PARAGRAPH_SEPARATOR.join(kept_paragraphs)
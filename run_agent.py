@@ -20,6 +20,9 @@ from paper_quality_scorer import PaperQualityScorer
 from content_generator import ContentGenerator
 from output_formatter import OutputFormatter
 from image_extractor import ImageExtractor
+from llm_client import LLMClient
+from api_key_pool import APIKeyPool
+from html_cache import ArxivHTMLCache
 
 # 配置日志
 logging.basicConfig(
@@ -32,7 +35,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def main_workflow(query: str, id_list: List[str], category: str = None, time_code: str = None, max_results: int = 10, start_index:int=0,min_quality_score: float = 6.0, work_dir:str =None):
+async def main_workflow(query: str, id_list: List[str], category: str = None, time_code: str = None, max_results: int = 10, start_index:int=0,min_quality_score: float = 6.0, work_dir:str =None, parse_workers: int = None,
+                        max_concurrency: int = 4, paper_timeout: float = 600.0, generation_mode: str = 'two_step',
+                        structure_sources: List[str] = None, fast: bool = False, prefetch_concurrency: int = 2,
+                        prefetch_cache_size: int = 32, prefetch_stage: str = 'score', validate_output: bool = True,
+                        variants: int = 1, variant_styles: List[str] = None):
     """主工作流程"""
     
     os.chdir(work_dir)
@@ -40,16 +47,22 @@ async def main_workflow(query: str, id_list: List[str], category: str = None, ti
 
     load_dotenv()
     
-    # 获取API密钥
-    api_key = os.getenv('API_KEY')
-    if not api_key:
+    # 获取API密钥（API_KEYS可配置多个密钥，逗号分隔）
+    key_pool = APIKeyPool.from_env()
+    if not key_pool:
         logger.error("请提供千问API密钥")
         return
+    api_key = key_pool.states[0].key
+    logger.info(f"已加载 {len(key_pool)} 个API密钥")
     
     # 创建时间戳
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     day_timestamp = datetime.now().strftime('%Y%m%d')
     output_dir = f"output/{day_timestamp}"
+
+    # 评分与生成共用一个LLM客户端，共享延迟统计与熔断状态
+    llm_client = LLMClient(key_pool=key_pool)
+    deferred_ids = []
     
     try:
 
@@ -69,55 +82,90 @@ async def main_workflow(query: str, id_list: List[str], category: str = None, ti
         logger.info("保存搜索结果")
         searcher.save_results(papers, query, format='json')
         
-        # 2. 质量检查
-        if query and not id_list:
-            logger.info("步骤2: 质量检查")
-            quality_scorer = PaperQualityScorer(api_key)
-            quality_result = await quality_scorer.batch_score_papers(papers)
+        # 生成器在质量检查之前创建：评分期间即可预取入选论文的正文（快速模式不读取正文，不预取）
+        html_cache = ArxivHTMLCache()
+        content_generator = ContentGenerator(api_key, llm_client=llm_client, parse_workers=parse_workers,
+                                             html_cache=html_cache, generation_mode=generation_mode,
+                                             structure_sources=structure_sources or ('html', 'pdf'),
+                                             prefetch_concurrency=0 if fast else prefetch_concurrency,
+                                             prefetch_cache_size=prefetch_cache_size, validate_output=validate_output,
+                                             variants=variants, variant_styles=variant_styles)
+        
+        # 质量检查与生成期间启动的预取任务和解析进程池，在任何退出路径上都要关闭
+        try:
+            # 2. 质量检查
+            if query and not id_list:
+                logger.info("步骤2: 质量检查")
+                quality_scorer = PaperQualityScorer(api_key, llm_client=llm_client, min_score=min_quality_score,
+                                                    prefetcher=content_generator.prefetcher, prefetch_stage=prefetch_stage)
+                quality_result = await quality_scorer.batch_score_papers(papers)
+                deferred_ids.extend(p.get('id', 'unknown') for p in quality_result.get('deferred_papers', []))
             
-            # 过滤低质量论文
-            scored_papers = quality_result.get('scored_papers', [])
-            filtered_papers = []
+                # 过滤低质量论文
+                scored_papers = quality_result.get('scored_papers', [])
+                filtered_papers = []
             
-            for item in scored_papers:
-                paper = item['paper']
-                quality_score = item['quality_score']
-                llm_score = quality_score.get('llm_score', 0)
+                for item in scored_papers:
+                    paper = item['paper']
+                    quality_score = item['quality_score']
+                    llm_score = quality_score.get('llm_score', 0)
                 
-                if llm_score >= min_quality_score:
-                    filtered_papers.append(item)
-                else:
-                    logger.info(f"论文 {paper.get('id', 'unknown')} 质量分数 {llm_score:.2f} 低于阈值 {min_quality_score}，已过滤")
-            
-            if not filtered_papers:
-                logger.error("没有论文通过质量检查")
-                return
+                    if llm_score >= min_quality_score:
+                        filtered_papers.append(item)
+                    else:
+                        logger.info(f"论文 {paper.get('id', 'unknown')} 质量分数 {llm_score:.2f} 低于阈值 {min_quality_score}，已过滤")
             
-            logger.info(f"质量检查完成，通过 {len(filtered_papers)} 篇论文")
-            papers = filtered_papers
-        else:
-            logger.info("无需步骤2: 质量检查")
-        
-        # 3. 生成资讯内容
-        logger.info("步骤3: 生成资讯内容")
-        content_generator = ContentGenerator(api_key)
-        news_content = []
-        
-        for paper in papers:
-            paper_id = paper.get('id', 'unknown')
+                if not filtered_papers:
+                    logger.error("没有论文通过质量检查")
+                    return
             
-            logger.info(f"生成论文 {paper_id} 的资讯内容")
-            news = await content_generator.generate_news(paper)
-            
-            news_content.append(news)
-            
-            # 添加延迟避免API限制
-            await asyncio.sleep(1)
+                logger.info(f"质量检查完成，通过 {len(filtered_papers)} 篇论文")
+                papers = [item['paper'] for item in filtered_papers]
+            else:
+                logger.info("无需步骤2: 质量检查")
+        
+            # 3. 生成资讯内容
+            logger.info("步骤3: 生成资讯内容")
+            # 多篇论文并发生成，结果与papers顺序一致；API限流由密钥池控制
+            # 快速模式只依据摘要生成草稿，之后的正文生成结果覆盖同一输出文件
+            news_content = await content_generator.generate_news_batch(
+                papers, max_concurrency=max_concurrency, paper_timeout=paper_timeout, fast=fast
+            )
+        finally:
+            await content_generator.close()
+        
+        deferred_ids.extend(paper.get('id', 'unknown') for paper, news in zip(papers, news_content) if news.get('deferred'))
+        timeout_ids = [paper.get('id', 'unknown') for paper, news in zip(papers, news_content) if news.get('timeout')]
+        if timeout_ids:
+            logger.warning(f"生成超时的论文: {', '.join(timeout_ids)}")
+        
+        cache_stats = html_cache.get_stats()
+        logger.info(f"HTML缓存: 命中 {cache_stats['hits']} 次，重新验证 {cache_stats['revalidated']} 次，"
+                    f"下载 {cache_stats['misses']} 次（{cache_stats['bytes_downloaded'] / 1024:.1f} KB）")
+        paper_cache_stats = content_generator.paper_cache.get_stats()
+        logger.info(f"结构化论文缓存: 命中 {paper_cache_stats['hits']} 次，写入 {paper_cache_stats['stores']} 次")
+        locator_stats = content_generator.section_locator.get_stats()
+        if locator_stats['hit_rate'] is not None:
+            logger.info(f"章节规则定位: 命中 {locator_stats['located']} 篇，回退LLM {locator_stats['fallbacks']} 篇，"
+                        f"命中率 {locator_stats['hit_rate']:.0%}")
+        memo_stats = content_generator.section_memo.get_stats()
+        logger.info(f"章节签名备忘录: 命中 {memo_stats['hits']} 次，新增 {memo_stats['stores']} 条，共 {memo_stats['entries']} 条")
+        logger.info("正文结构来源: " + "，".join(f"{source} {count} 篇"
+                                            for source, count in content_generator.structure_source_counts.items()))
+        repair_stats = content_generator.repair_stats
+        if repair_stats['validated']:
+            logger.info(f"生成结果校验: {repair_stats['validated']} 篇，直接合格 {repair_stats['passed']} 篇，"
+                        f"补写成功 {repair_stats['repaired']} 处，未解决 {repair_stats['unresolved']} 处")
+        if content_generator.prefetcher is not None and content_generator.prefetcher.stats['scheduled']:
+            prefetch_stats = content_generator.prefetcher.get_stats()
+            logger.info(f"正文预取: 预取 {prefetch_stats['scheduled']} 篇，命中 {prefetch_stats['hits']} 篇，"
+                        f"未命中 {prefetch_stats['misses']} 篇，取消 {prefetch_stats['discarded'] + prefetch_stats['evicted']} 篇，"
+                        f"未使用 {prefetch_stats['wasted']} 篇，命中率 {prefetch_stats['hit_rate'] or 0:.0%}")
         
         # region
         # 4. 提取图片
         # logger.info("步骤4: 提取图片")
-        # image_extractor = ImageExtractor(output_dir)
+        # image_extractor = ImageExtractor(output_dir, html_cache=html_cache)
         # all_images = []
         
         # for item in filtered_papers:
@@ -162,6 +210,9 @@ async def main_workflow(query: str, id_list: List[str], category: str = None, ti
         #     logger.info(f"图片信息已保存到: {images_file}")
         
         logger.info(f"文件保存完成，保存 {len(saved_files)} 个文件")
+
+        # 导出LLM调用指标（对冲/熔断/延迟）
+        save_llm_metrics(llm_client, deferred_ids, output_dir, timestamp)
         
         # 输出结果
         print("\n" + "="*50)
@@ -174,6 +225,8 @@ async def main_workflow(query: str, id_list: List[str], category: str = None, ti
         print(f"生成资讯: {len(news_content)}")
         # print(f"提取图片: {len(all_images)}")
         print(f"保存文件: {len(saved_files)}")
+        if deferred_ids:
+            print(f"推迟论文: {', '.join(deferred_ids)}")
         print("="*50)
         
         return True
@@ -184,6 +237,28 @@ async def main_workflow(query: str, id_list: List[str], category: str = None, ti
         logger.error(f"详细错误信息:\n{traceback.format_exc()}")
         return False
 
+def save_llm_metrics(llm_client: LLMClient, deferred_ids: List[str], output_dir: str, timestamp: str) -> str:
+    """保存LLM调用指标"""
+    metrics = llm_client.get_metrics()
+    metrics['deferred_papers'] = deferred_ids
+    logger.info(f"LLM调用指标: 调用 {metrics['calls']} 次，对冲 {metrics['hedges_issued']} 次（胜出 {metrics['hedge_wins']} 次），"
+                f"熔断 {metrics['breaker']['open_count']} 次，快速拒绝 {metrics['breaker']['rejected_count']} 次")
+    for usage in metrics['keys']:
+        logger.info(f"API密钥 {usage['key']}: 请求 {usage['total_requests']} 次，token {usage['total_tokens']}，"
+                    f"限流 {usage['throttle_count']} 次")
+    for route, models in metrics['routes'].items():
+        for model, stat in models.items():
+            avg_latency = f"{stat['avg_latency']:.1f}秒" if stat['avg_latency'] is not None else "-"
+            logger.info(f"路由 {route} / {model}: 调用 {stat['calls']} 次，失败 {stat['failures']} 次，"
+                        f"平均延迟 {avg_latency}，token {stat['input_tokens']}+{stat['output_tokens']}，成本 {stat['cost']:.4f} 元")
+
+    metrics_file = os.path.join(output_dir, f"llm_metrics_{timestamp}.json")
+    os.makedirs(output_dir, exist_ok=True)
+    with open(metrics_file, 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, ensure_ascii=False, indent=2)
+    logger.info(f"LLM调用指标已保存到: {metrics_file}")
+    return metrics_file
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description='资讯生成:使用关键词批量搜索或使用arxiv id精准搜索')
@@ -195,6 +270,24 @@ def main():
     parser.add_argument('--start-index', '-i', type=int, default=0, help='起始索引')
     parser.add_argument('--min-score', '-s', type=float, default=6.5, help='最低质量分数阈值')
     parser.add_argument('--work-dir', '-d', type=str, default="./", help='工作路径')
+    parser.add_argument('--parse-workers', type=int, default=None, help='HTML解析进程数（默认CPU核心数，0为在主进程内解析）')
+    parser.add_argument('--max-concurrency', type=int, default=4, help='同时生成资讯的论文数上限')
+    parser.add_argument('--paper-timeout', type=float, default=600.0, help='单篇论文资讯生成超时时间（秒）')
+    parser.add_argument('--generation-mode', choices=['two_step', 'single_call'], default='two_step',
+                        help='two_step: 先检测章节再生成; single_call: 章节摘录一次性交给模型选取并生成')
+    parser.add_argument('--fast', action='store_true',
+                        help='快速模式：只依据摘要等元数据生成资讯草稿（不下载正文），之后正常运行会覆盖草稿')
+    parser.add_argument('--structure-sources', nargs='+', choices=['html', 'latex', 'pdf'], default=['html', 'pdf'],
+                        help='正文结构来源及尝试顺序（html: arXiv HTML页面, latex: e-print源码包, pdf: PDF文本）')
+    parser.add_argument('--prefetch-concurrency', type=int, default=2, help='质量检查期间同时预取正文的论文数（0为不预取）')
+    parser.add_argument('--prefetch-cache-size', type=int, default=32, help='内存中保留的预取结果数上限')
+    parser.add_argument('--variants', type=int, default=1, help='每篇论文生成的资讯版本数（不同风格，并发生成，供编辑挑选）')
+    parser.add_argument('--variant-styles', nargs='+', choices=['default', 'casual', 'brief', 'story'], default=None,
+                        help='各版本依次使用的风格（默认 default casual brief story 循环使用）')
+    parser.add_argument('--no-validate', action='store_true',
+                        help='不校验生成结果（默认校验四个部分、长度与【】标注，不合格的部分单独补写）')
+    parser.add_argument('--prefetch-stage', choices=['rule', 'score'], default='score',
+                        help='预取时机（rule: 通过规则层即预取; score: LLM评分达到阈值后预取）')
     
     args = parser.parse_args()
     
@@ -207,7 +300,19 @@ def main():
         max_results=args.max_results,
         start_index=args.start_index,
         min_quality_score=args.min_score,
-        work_dir=args.work_dir
+        work_dir=args.work_dir,
+        parse_workers=args.parse_workers,
+        max_concurrency=args.max_concurrency,
+        paper_timeout=args.paper_timeout,
+        generation_mode=args.generation_mode,
+        structure_sources=args.structure_sources,
+        fast=args.fast,
+        prefetch_concurrency=args.prefetch_concurrency,
+        prefetch_cache_size=args.prefetch_cache_size,
+        prefetch_stage=args.prefetch_stage,
+        validate_output=not args.no_validate,
+        variants=args.variants,
+        variant_styles=args.variant_styles
     ))
     
     return 0 if success else 1
@@ -6,7 +6,9 @@ import io
 from PIL import Image, ImageDraw, ImageFont
 import dashscope
 import logging
+import time
 from dotenv import load_dotenv
+from model_router import ModelRouter
 
 logger = logging.getLogger(__name__)
 dashscope.base_http_api_url = "https://dashscope.aliyuncs.com/api/v1"
@@ -15,9 +17,10 @@ load_dotenv()
 
 # QwenClient：官方 MultiModalConversation 模式
 class QwenClient:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, router: ModelRouter = None):
         self.api_key = '...'#输入apikey
-        self.model = "qwen3-vl-30b-a3b-instruct"#"qwen3-vl-8b-instruct"
+        # bbox检测走 vlm_bbox 路由，默认 qwen3-vl-30b-a3b-instruct，失败回退 qwen3-vl-8b-instruct
+        self.router = router or ModelRouter()
 
     def ask_with_image(self, prompt: str, image_pil) -> str:
         """使用官方示例的 MultiModalConversation.call"""
@@ -40,10 +43,28 @@ class QwenClient:
             }
         ]
 
-        # --- 调用 API ---
+        # --- 按路由调用 API，失败时沿回退链切换模型 ---
+        last_error = None
+        for model in self.router.models_for("vlm_bbox"):
+            start = time.monotonic()
+            try:
+                text, usage = self._call_model(model, messages)
+            except Exception as e:
+                self.router.record("vlm_bbox", model, time.monotonic() - start, success=False)
+                logger.warning(f"{model} 调用失败: {e}")
+                last_error = e
+                continue
+            self.router.record("vlm_bbox", model, time.monotonic() - start,
+                               usage.get("input_tokens", 0) or 0, usage.get("output_tokens", 0) or 0)
+            return text
+
+        raise last_error
+
+    def _call_model(self, model: str, messages):
+        """调用单个VL模型，返回(文本, token用量)"""
         response = dashscope.MultiModalConversation.call(
             api_key=self.api_key,
-            model=self.model,
+            model=model,
             messages=messages,
             max_tokens=1000,
             temperature=0.3,
@@ -59,7 +80,7 @@ class QwenClient:
 
         try:
             text = response.output.choices[0].message.content[0]["text"]
-            return text
+            return text, getattr(response, "usage", None) or {}
         except Exception as e:
             raise RuntimeError(f"Qwen3-VL 返回解析失败: {e}\n原始返回: {response}")
 
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+章节索引模块
+将章节树按先序遍历展平一次：小写标题、父节点、子树范围与拼接好的段落文本，
+关键词路径查找不再反复递归整棵树
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+
+from paper_cache import LazySections
+from prompt_budget import PARAGRAPH_SEPARATOR
+
+
+class SectionIndex:
+    """先序展平的章节索引，查找语义与 _find_section_by_keyword_path 一致（标题子串匹配、先序优先）"""
+
+    def __init__(self, sections):
+        self._sections = sections
+        self.titles = []   # 小写标题
+        self.labels = []   # 原始标题
+        self.depths = []   # 层级，一级章节为 0
+        self.parents = []  # 父节点下标，一级章节为 -1
+        self.ends = []     # 子树结束位置（不含），子孙节点下标位于 (i, ends[i])
+        self._nodes = []   # 章节dict；缓存读取的章节为 (一级章节下标, 子章节路径)，访问时再解码
+        self._texts = {}   # {下标: 拼接好的段落文本}
+        self._lookups = {}  # {(起始, 结束, 关键词): 命中下标}
+
+        if isinstance(sections, LazySections):
+            # 只读标题大纲，不解码章节内容
+            for top, node in enumerate(sections.outline):
+                self._add_outline(node, -1, (top, ()))
+        else:
+            for section in sections:
+                self._add_section(section, -1)
+
+    def _add_section(self, section: Dict[str, Any], parent: int):
+        if "title" not in section:
+            return
+        index = len(self.titles)
+        label = section.get("title") or ""
+        self.titles.append(label.lower())
+        self.labels.append(label)
+        self.depths.append(self.depths[parent] + 1 if parent != -1 else 0)
+        self.parents.append(parent)
+        self.ends.append(index + 1)
+        self._nodes.append(section)
+        for sub in section.get("subsections", []):
+            self._add_section(sub, index)
+        self.ends[index] = len(self.titles)
+
+    def _add_outline(self, node: List[Any], parent: int, location: Tuple[int, Tuple[int, ...]]):
+        title, children = node
+        index = len(self.titles)
+        self.titles.append(title.lower())
+        self.labels.append(title)
+        self.depths.append(self.depths[parent] + 1 if parent != -1 else 0)
+        self.parents.append(parent)
+        self.ends.append(index + 1)
+        self._nodes.append(location)
+        top, path = location
+        for position, child in enumerate(children):
+            self._add_outline(child, index, (top, path + (position,)))
+        self.ends[index] = len(self.titles)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def find(self, keyword: str, start: int = 0, end: Optional[int] = None) -> Optional[int]:
+        """在 [start, end) 范围内按先序查找第一个标题包含keyword的章节"""
+        if end is None:
+            end = len(self.titles)
+        key = (start, end, keyword)
+        if key not in self._lookups:
+            found = None
+            for index in range(start, end):
+                if keyword in self.titles[index]:
+                    found = index
+                    break
+            self._lookups[key] = found
+        return self._lookups[key]
+
+    def find_path(self, *keywords: str) -> Optional[int]:
+        """
+        按路径查找章节：find_path("method", "overview")
+        后一个关键词只在前一个命中章节的子树中查找
+        """
+        index = None
+        start, end = 0, len(self.titles)
+        for keyword in keywords:
+            index = self.find(keyword.lower(), start, end)
+            if index is None:
+                return None
+            start, end = index + 1, self.ends[index]
+        return index
+
+    def node(self, index: int) -> Dict[str, Any]:
+        """下标对应的章节dict"""
+        node = self._nodes[index]
+        if isinstance(node, tuple):
+            top, path = node
+            node = self._sections[top]
+            for position in path:
+                node = [sub for sub in node.get("subsections", []) if "text" not in sub][position]
+            self._nodes[index] = node
+        return node
+
+    def text(self, index: int) -> str:
+        """章节直属段落拼接后的文本（与 _collect_texts 结果相同）"""
+        if index not in self._texts:
+            texts = [sub["text"] for sub in self.node(index).get("subsections", []) if "text" in sub]
+            self._texts[index] = PARAGRAPH_SEPARATOR.join(filter(None, texts))
+        return self._texts[index]
+
+    def path_of(self, index: int) -> List[str]:
+        """从一级章节到该章节的标题路径"""
+        path = []
+        while index != -1:
+            path.append(self.titles[index])
+            index = self.parents[index]
+        return path[::-1]
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+章节定位模块
+用本地规则识别方法概述与结论章节的关键词路径，置信度不足时再交给LLM（detect_section_keywords）；
+已确认的路径按章节结构签名持久化，结构相同的论文直接复用
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from paper_cache import LazySections, section_outline
+
+logger = logging.getLogger(__name__)
+
+# 标题编号，如 "3 ", "3.1 ", "III. ", "A.1 "（附录）
+NUMBERING_PATTERN = re.compile(r'^\s*(?:\d+(?:\.\d+)*\.?|[IVXLC]+\.|[A-Z](?:\.\d+)+\.?)\s+')
+
+METHOD_SYNONYMS = (
+    'method', 'methods', 'methodology', 'approach', 'proposed method', 'proposed approach',
+    'our method', 'our approach', 'proposed framework', 'framework', 'technical approach',
+    'model', 'our model',
+)
+# 过于宽泛的同义词只接受完全匹配（"Model Evaluation Protocol" 不是方法章节）
+GENERIC_METHOD_SYNONYMS = ('model', 'framework', 'approach')
+CONCLUSION_SYNONYMS = ('conclusion', 'conclusions', 'concluding remarks')
+CONCLUSION_FALLBACKS = ('discussion', 'summary', 'discussion and conclusion', 'discussions')
+OVERVIEW_SYNONYMS = ('overview', 'framework', 'architecture', 'general', 'pipeline', 'overall')
+
+# 不可能是方法章节的一级章节
+NON_METHOD_PATTERN = re.compile(
+    r'introduction|related work|background|preliminar|experiment|evaluation|result|ablation|'
+    r'conclusion|discussion|summary|limitation|reference|acknowledg|appendix|future work|dataset|implementation',
+    re.IGNORECASE)
+PRELUDE_PATTERN = re.compile(r'introduction|related work|background|preliminar|problem (?:setting|formulation)|notation',
+                             re.IGNORECASE)
+
+# 模型名：单个词，允许连字符/点/加号，如 "GPT-4" / "LLaMA-2" / "T5"
+MODEL_NAME_PATTERN = re.compile(r'^[A-Za-z][\w.+-]*$')
+
+# 各规则的置信度
+CONFIDENCE = {
+    'method_synonym': 0.9,
+    'model_name': 0.85,
+    'method_position': 0.5,
+    'conclusion': 0.95,
+    'conclusion_fallback': 0.8,
+}
+
+
+def normalize_title(title: str) -> str:
+    """去掉编号并规范空白与大小写"""
+    return re.sub(r'\s+', ' ', NUMBERING_PATTERN.sub('', title or '')).strip().casefold()
+
+
+class SectionLocator:
+    """基于规则的章节定位器"""
+
+    def __init__(self, min_confidence: float = 0.7):
+        self.min_confidence = min_confidence  # 低于该置信度时回退到LLM
+        self.stats = {'located': 0, 'fallbacks': 0}
+
+    def locate(self, sections, paper_title: str = '') -> Dict[str, Any]:
+        """
+        定位方法概述与结论章节
+
+        Args:
+            sections: 章节树（list 或 LazySections）
+            paper_title: 论文标题，用于识别以模型名命名的方法章节
+
+        Returns:
+            与 detect_section_keywords 相同结构的结果，另含 'confidence' 与 'reasons'
+        """
+        outline = sections.outline if isinstance(sections, LazySections) else [section_outline(s) for s in sections]
+
+        method_path, method_confidence, method_reason = self._locate_method(outline, paper_title)
+        conclusion_path, conclusion_confidence, conclusion_reason = self._locate_conclusion(outline)
+
+        return {
+            'introduction': ['introduction'],
+            'method': method_path,
+            'conclusion': conclusion_path,
+            'confidence': min(method_confidence, conclusion_confidence),
+            'reasons': {'method': method_reason, 'conclusion': conclusion_reason},
+        }
+
+    def is_confident(self, result: Dict[str, Any]) -> bool:
+        return result['confidence'] >= self.min_confidence
+
+    def record(self, located: bool):
+        """记录一次定位是否由规则完成（否则回退LLM）"""
+        self.stats['located' if located else 'fallbacks'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """规则命中率统计"""
+        total = self.stats['located'] + self.stats['fallbacks']
+        return {
+            **self.stats,
+            'hit_rate': round(self.stats['located'] / total, 3) if total else None,
+        }
+
+    def _locate_method(self, outline: List[Any], paper_title: str) -> Tuple[List[str], float, str]:
+        top_level = [(index, normalize_title(node[0])) for index, node in enumerate(outline) if node[0]]
+
+        # 1. 同义词：Method / Approach / Methodology / Proposed Method ...
+        for index, title in top_level:
+            if NON_METHOD_PATTERN.search(title):
+                continue
+            if title in METHOD_SYNONYMS or any(title.startswith(s + ' ') for s in METHOD_SYNONYMS
+                                               if s not in GENERIC_METHOD_SYNONYMS):
+                return self._method_path(outline, index, CONFIDENCE['method_synonym'], 'synonym')
+
+        # 2. 以论文提出的模型名命名的章节，如 "SynthNet" / "SynthNet Architecture"
+        model_name = self._model_name(paper_title)
+        if model_name:
+            for index, title in top_level:
+                if model_name in title and not NON_METHOD_PATTERN.search(title):
+                    return self._method_path(outline, index, CONFIDENCE['model_name'], 'model_name')
+
+        # 3. 位置规则：引言/相关工作/预备知识之后的第一个正文章节（置信度低，交由LLM确认）
+        seen_prelude = False
+        for index, title in top_level:
+            if PRELUDE_PATTERN.search(title):
+                seen_prelude = True
+                continue
+            if seen_prelude and not NON_METHOD_PATTERN.search(title):
+                return self._method_path(outline, index, CONFIDENCE['method_position'], 'position')
+
+        return [], 0.0, 'not_found'
+
+    def _method_path(self, outline: List[Any], index: int, confidence: float, reason: str) -> Tuple[List[str], float, str]:
+        """方法根章节 + 概述子章节（如有）"""
+        root_title, children = outline[index]
+        root_keyword = self._unique_keyword(outline, root_title, outline[index])
+        if root_keyword is None:
+            return [], 0.0, reason + '_ambiguous'
+
+        for child in children:
+            child_title = normalize_title(child[0])
+            if any(s in child_title for s in OVERVIEW_SYNONYMS):
+                child_keyword = self._unique_keyword(children, child[0], child)
+                if child_keyword is not None:
+                    return [root_keyword, child_keyword], confidence, reason
+        # 无概述子章节时，方法概述写在根章节下
+        return [root_keyword], confidence, reason
+
+    def _locate_conclusion(self, outline: List[Any]) -> Tuple[List[str], float, str]:
+        top_level = [(index, normalize_title(node[0])) for index, node in enumerate(outline) if node[0]]
+        for synonyms, confidence, reason in ((CONCLUSION_SYNONYMS, CONFIDENCE['conclusion'], 'conclusion'),
+                                             (CONCLUSION_FALLBACKS, CONFIDENCE['conclusion_fallback'], 'fallback')):
+            # 按文档顺序取第一个匹配，正文结论排在附录之前
+            for index, title in top_level:
+                if title in synonyms or any(title.startswith(s) for s in synonyms):
+                    keyword = self._unique_keyword(outline, outline[index][0], outline[index])
+                    if keyword is not None:
+                        return [keyword], confidence, reason
+        return [], 0.0, 'not_found'
+
+    @staticmethod
+    def _model_name(paper_title: str) -> Optional[str]:
+        """论文标题冒号前的短名称，如 "SynthNet: A Synthetic Model ..." -> "synthnet" """
+        if not paper_title or ':' not in paper_title:
+            return None
+        name = paper_title.split(':', 1)[0].strip()
+        # 只接受像模型名的单个词：含数字或首字母以外的大写（"SynthNet" / "GPT-4"），排除 "Deep Learning" 之类的主题词
+        if not MODEL_NAME_PATTERN.match(name):
+            return None
+        if not (any(c.isdigit() for c in name) or any(c.isupper() for c in name[1:])):
+            return None
+        return name.casefold()
+
+    @staticmethod
+    def _unique_keyword(siblings: List[Any], title: str, target: List[Any]) -> Optional[str]:
+        """
+        选取能在 _find_section_by_keyword（子串匹配+先序遍历）中唯一命中target的关键词
+        依次尝试去编号标题、原始标题
+        """
+        stripped = NUMBERING_PATTERN.sub('', title).strip()
+        for keyword in (stripped, title.strip()):
+            if keyword and SectionLocator._first_match(siblings, keyword.lower()) is target:
+                return keyword
+        return None
+
+    @staticmethod
+    def _first_match(nodes: List[Any], keyword: str) -> Optional[List[Any]]:
+        """在大纲上模拟 _find_section_by_keyword 的先序查找"""
+        stack = list(reversed(nodes))
+        while stack:
+            node = stack.pop()
+            if keyword in node[0].lower():
+                return node
+            stack.extend(reversed(node[1]))
+        return None
+
+
+class SectionSignatureMemo:
+    """
+    章节结构签名备忘录（持久化到JSON文件）
+    以去编号、大小写归一后的标题层级结构为签名，记录已确认可用的方法/结论路径，
+    结构相同的论文直接复用，无需再调用LLM
+    """
+
+    def __init__(self, path: str = "cache/section_signatures.json", max_entries: int = 5000):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = self._load()
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0}
+
+    @staticmethod
+    def signature(sections) -> str:
+        """章节标题结构签名：先序遍历的 (层级, 归一化标题) 序列的哈希"""
+        outline = sections.outline if isinstance(sections, LazySections) else [section_outline(s) for s in sections]
+        parts = []
+        stack = [(0, node) for node in reversed(outline)]
+        while stack:
+            depth, (title, children) = stack.pop()
+            title = normalize_title(title)
+            if title:
+                parts.append(f"{depth}:{title}")
+            stack.extend((depth + 1, child) for child in reversed(children))
+        return hashlib.sha1("\n".join(parts).encode('utf-8')).hexdigest()
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"章节签名备忘录读取失败，重新建立: {str(e)}")
+            return {}
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"章节签名备忘录写入失败: {str(e)}")
+
+    def lookup(self, sections) -> Optional[Dict[str, Any]]:
+        """查找结构相同论文已确认的章节路径"""
+        signature = self.signature(sections)
+        entry = self.entries.get(signature)
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        # 移到末尾并写回，淘汰顺序即最近使用顺序（跨运行保持）
+        self.entries[signature] = self.entries.pop(signature)
+        self._save()
+        return {
+            'introduction': ['introduction'],
+            'method': list(entry['method']),
+            'conclusion': list(entry['conclusion']),
+        }
+
+    def store(self, sections, result: Dict[str, Any]):
+        """记录已确认可用的章节路径（内容提取成功后调用）"""
+        if not result.get('conclusion'):
+            return
+        signature = self.signature(sections)
+        self.entries.pop(signature, None)
+        if len(self.entries) >= self.max_entries:
+            # 超出容量时淘汰最久未使用的条目（字典按使用顺序排列）
+            del self.entries[next(iter(self.entries))]
+        self.entries[signature] = {
+            'method': list(result.get('method') or []),
+            'conclusion': list(result['conclusion']),
+        }
+        self.stats['stores'] += 1
+        self._save()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'entries': len(self.entries)}
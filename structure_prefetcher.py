@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+正文结构预取模块
+质量评分阶段对可能通过筛选的论文提前下载并解析正文（后台任务，并发数与缓存条目数有上限），
+生成阶段直接取用已解析的章节树，并统计预取命中率
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Awaitable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StructurePrefetcher:
+    """论文正文结构预取器"""
+
+    def __init__(self, parse: Callable[[Dict[str, Any]], Awaitable[dict]], max_concurrency: int = 2,
+                 max_entries: int = 32):
+        """
+        Args:
+            parse: 解析函数 parse(paper) -> 论文数据结构（如 ContentGenerator.parse_paper_structure）
+            max_concurrency: 同时预取的论文数上限
+            max_entries: 内存中保留的预取结果数上限，超出时淘汰最早的条目（磁盘缓存仍然有效）
+        """
+        self.parse = parse
+        self.max_entries = max_entries
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._tasks = OrderedDict()  # {论文id: asyncio.Task}
+        self.stats = {'scheduled': 0, 'hits': 0, 'misses': 0, 'evicted': 0, 'discarded': 0, 'failed': 0, 'wasted': 0}
+
+    def prefetch(self, paper: Dict[str, Any]):
+        """在后台预取论文正文结构（同一论文只预取一次）"""
+        paper_id = paper.get('id', 'unknown')
+        if paper_id in self._tasks:
+            return
+        self._tasks[paper_id] = asyncio.create_task(self._run(paper))
+        self.stats['scheduled'] += 1
+        logger.info(f"预取论文 {paper_id} 的正文")
+
+        while len(self._tasks) > self.max_entries:
+            _, task = self._tasks.popitem(last=False)
+            task.cancel()
+            self.stats['evicted'] += 1
+
+    async def _run(self, paper: Dict[str, Any]) -> dict:
+        async with self._semaphore:
+            return await self.parse(paper)
+
+    async def take(self, paper: Dict[str, Any]) -> Optional[dict]:
+        """
+        取出预取结果，预取仍在进行时等待其完成
+
+        Returns:
+            论文数据结构，未预取或预取失败时返回None（由调用方自行解析）
+        """
+        task = self._tasks.pop(paper.get('id', 'unknown'), None)
+        if task is None:
+            self.stats['misses'] += 1
+            return None
+        try:
+            # shield：调用方超时取消时不打断预取任务本身
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            self.stats['misses'] += 1
+            return None
+        except Exception as e:
+            logger.warning(f"论文 {paper.get('id', 'unknown')} 预取失败: {str(e)}")
+            self.stats['failed'] += 1
+            return None
+        self.stats['hits'] += 1
+        return result
+
+    def discard(self, paper: Dict[str, Any]):
+        """论文未入选时取消其预取"""
+        task = self._tasks.pop(paper.get('id', 'unknown'), None)
+        if task is not None:
+            task.cancel()
+            self.stats['discarded'] += 1
+
+    async def close(self):
+        """取消尚未完成的预取任务，并等待其结束（解析函数收到取消后才真正退出）"""
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        self.stats['wasted'] += len(tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """预取命中统计；wasted 为已预取但未被生成阶段使用的论文数（含关闭时取消的）"""
+        requests = self.stats['hits'] + self.stats['misses'] + self.stats['failed']
+        return {
+            **self.stats,
+            'wasted': self.stats['wasted'] + len(self._tasks),
+            'hit_rate': round(self.stats['hits'] / requests, 3) if requests else None,
+        }